@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from src.process_data import fetch_high_elo_matches as crawler
+    from src.process_data.crawler.mock_riot_server import add_server_args, server_from_args, base_urls
+except ImportError:
+    import fetch_high_elo_matches as crawler
+    from crawler.mock_riot_server import add_server_args, server_from_args, base_urls
+
+def _serve(server_args, ready):
+    """Roda o mock em outro processo para não disputar o GIL com o crawler medido."""
+    server = server_from_args(argparse.Namespace(**server_args))
+    ready.put(base_urls(server))
+    server.serve_forever()
+
+def run_benchmark(args):
+    ctx = multiprocessing.get_context('spawn')
+    ready = ctx.Queue()
+    server_proc = ctx.Process(target=_serve, args=(vars(args), ready), daemon=True)
+    server_proc.start()
+    api_base, ddragon_base = ready.get(timeout=60)
+
+    work_dir = tempfile.mkdtemp(prefix="crawler_bench_")
+    try:
+        # Aponta o crawler para o mock e para um banco descartável
+        crawler.RIOT_API_BASE = api_base
+        crawler.DDRAGON_BASE = ddragon_base
+        crawler.DB_PATH = os.path.join(work_dir, 'bench.db')
+        crawler.ARCHIVE_DIR = os.path.join(work_dir, 'raw_archive')
+        crawler.ARCHIVE_RAW = not args.no_archive
+        crawler.CONCURRENCY = args.concurrency
+        crawler.PARSE_WORKERS = args.parse_workers
+        crawler.MATCHES_PER_PLAYER = args.matches_per_player
+
+        print(f"🏁 Benchmark | {args.players} jogadores x {args.matches_per_player} partidas | "
+              f"App limit {args.app_limits} | Latência {args.latency_ms}ms")
+        start = time.monotonic()
+        with crawler.create_parse_pool(args.parse_workers) as pool:
+            stats = asyncio.run(crawler.crawl(pool))
+        elapsed = time.monotonic() - start
+
+        conn = sqlite3.connect(crawler.DB_PATH)
+        matches = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        conn.close()
+    finally:
+        server_proc.terminate()
+        if args.keep:
+            print(f"📁 Arquivos mantidos em {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary = stats.summary() if stats else {}
+    report = {
+        'matches_saved': matches,
+        'elapsed_s': round(elapsed, 2),
+        'matches_per_s': round(matches / elapsed, 2) if elapsed else 0.0,
+        'requests': summary.get('requests', 0),
+        'requests_per_s': round(summary.get('requests', 0) / elapsed, 2) if elapsed else 0.0,
+        'rate_429': round(summary.get('rate_429', 0.0), 4),
+        'errors_5xx': summary.get('errors_5xx', 0),
+        'latency_p50_ms': round(summary.get('latency_p50_ms', 0.0), 1),
+        'latency_p99_ms': round(summary.get('latency_p99_ms', 0.0), 1),
+        'config': {
+            'concurrency': args.concurrency, 'parse_workers': args.parse_workers,
+            'app_limits': args.app_limits, 'latency_ms': args.latency_ms,
+            'service_429_rate': args.service_429_rate, 'error_5xx_rate': args.error_5xx_rate,
+        },
+    }
+
+    print("\n--- Resultado ---")
+    print(f"Partidas/s:   {report['matches_per_s']}  ({matches} em {report['elapsed_s']}s)")
+    print(f"Requests/s:   {report['requests_per_s']}  ({report['requests']} tentativas)")
+    print(f"Taxa de 429:  {report['rate_429']:.2%}")
+    print(f"Erros 5xx:    {report['errors_5xx']}")
+    print(f"Latência p50: {report['latency_p50_ms']}ms | p99: {report['latency_p99_ms']}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Relatório salvo em {args.json}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do fetch_high_elo_matches contra o mock local da Riot API")
+    add_server_args(parser)
+    parser.add_argument("--concurrency", type=int, default=crawler.CONCURRENCY)
+    parser.add_argument("--parse-workers", type=int, default=crawler.PARSE_WORKERS)
+    parser.add_argument("--no-archive", action="store_true", help="Desliga o arquivo cru durante a medição")
+    parser.add_argument("--json", help="Salva o relatório neste arquivo")
+    parser.add_argument("--keep", action="store_true", help="Mantém o banco/arquivo gerados")
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,399 @@
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from src.process_data.crawler.rate_limiter import parse_rate_limit_header
+    from src.process_data.crawler.raw_archive import RawArchive
+except ImportError:
+    from crawler.rate_limiter import parse_rate_limit_header
+    from crawler.raw_archive import RawArchive
+
+# --- CONFIGURAÇÕES PADRÃO DO SERVIDOR FALSO ---
+DEFAULT_APP_LIMITS = "500:10,30000:600"     # Production Key
+DEFAULT_METHOD_LIMITS = {
+    'league-v4': "50:10",
+    'summoner-v4': "1600:60",
+    'match-v5.ids': "2000:10",
+    'match-v5.match': "2000:10",
+    'match-v5.timeline': "2000:10",
+}
+
+# Rotas de URL -> chave de método (o mesmo agrupamento da Riot)
+ROUTES = [
+    (re.compile(r'^/lol/league/v4/(challengerleagues|grandmasterleagues|masterleagues)/by-queue/[^/]+$'), 'league-v4'),
+    (re.compile(r'^/lol/summoner/v4/summoners/([^/]+)$'), 'summoner-v4'),
+    (re.compile(r'^/lol/match/v5/matches/by-puuid/([^/]+)/ids$'), 'match-v5.ids'),
+    (re.compile(r'^/lol/match/v5/matches/([^/]+)/timeline$'), 'match-v5.timeline'),
+    (re.compile(r'^/lol/match/v5/matches/([^/]+)$'), 'match-v5.match'),
+]
+
+LANES = [('TOP', 'SOLO'), ('JUNGLE', 'NONE'), ('MIDDLE', 'SOLO'), ('BOTTOM', 'CARRY'), ('BOTTOM', 'SUPPORT')]
+LANE_SPELLS = [(4, 12), (4, 11), (4, 14), (4, 7), (4, 3)]
+
+class FixedWindow:
+    """Janela fixa igual à da Riot: o contador zera 'window' segundos após o primeiro request."""
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.count = 0
+        self.start = None
+
+    def hit(self, now):
+        """Registra o request. Retorna (permitido, segundos_até_resetar)."""
+        if self.start is None or now - self.start >= self.window:
+            self.start = now
+            self.count = 0
+        if self.count >= self.limit:
+            return False, self.window - (now - self.start)
+        self.count += 1
+        return True, 0.0
+
+class MockRateLimits:
+    """Limites de App (por rota) e de Método (por rota + método), com os headers da Riot."""
+    def __init__(self, app_limits, method_limits):
+        self.app_header = app_limits
+        self.method_headers = method_limits
+        self.lock = threading.Lock()
+        self.app_windows = {}
+        self.method_windows = {}
+
+    def _windows(self, store, key, header):
+        if key not in store:
+            store[key] = [FixedWindow(l, w) for l, w in parse_rate_limit_header(header)]
+        return store[key]
+
+    def check(self, route, method):
+        """Retorna (limit_type ou None, retry_after, headers)."""
+        now = time.monotonic()
+        method_header = self.method_headers.get(method, "2000:10")
+        with self.lock:
+            app = self._windows(self.app_windows, route, self.app_header)
+            meth = self._windows(self.method_windows, (route, method), method_header)
+
+            limit_type, retry_after = None, 0.0
+            for kind, windows in (('application', app), ('method', meth)):
+                for w in windows:
+                    ok, wait = w.hit(now)
+                    if not ok:
+                        limit_type, retry_after = kind, max(retry_after, wait)
+                if limit_type:
+                    break
+
+            headers = {
+                'X-App-Rate-Limit': self.app_header,
+                'X-App-Rate-Limit-Count': ",".join(f"{w.count}:{w.window}" for w in app),
+                'X-Method-Rate-Limit': method_header,
+                'X-Method-Rate-Limit-Count': ",".join(f"{w.count}:{w.window}" for w in meth),
+            }
+        return limit_type, retry_after, headers
+
+class SyntheticData:
+    """
+    Jogadores, listas de partidas e payloads determinísticos (mesma seed = mesmos dados).
+    As listas compartilham um pool de partidas, então jogadores se repetem entre si
+    como no High Elo real, e só as partidas mais recentes são do patch atual.
+    Outras plataformas (na1, kr...) recebem cópias com IDs prefixados ('na1-puuid-0', 'NA1_...').
+    """
+    def __init__(self, players=300, matches_per_player=20, current_fraction=0.6,
+                 current_version="15.1.1", old_version="15.0.1", frames=35, seed=42):
+        self.players = players
+        self.current_version = current_version
+        self.old_version = old_version
+        self.frames = frames
+        self.seed = seed
+
+        rnd = random.Random(seed)
+        # Pool menor que jogadores x partidas: ~3 jogadores do dataset por partida
+        pool_size = max(matches_per_player, players * matches_per_player // 3)
+        self.base_id = 3000000000
+        self.cutoff = self.base_id + int(pool_size * (1 - current_fraction))
+        self.match_lists = {}
+        for i in range(players):
+            ids = rnd.sample(range(self.base_id, self.base_id + pool_size), min(matches_per_player, pool_size))
+            self.match_lists[f"puuid-{i}"] = [f"BR1_{n}" for n in sorted(ids, reverse=True)]
+
+        self.cache = {}
+        self.cache_lock = threading.Lock()
+
+    @staticmethod
+    def _prefix(platform):
+        return '' if platform in (None, 'br1') else f"{platform}-"
+
+    def league(self, endpoint, platform=None):
+        prefix = self._prefix(platform)
+        tiers = {'challengerleagues': (0, 0.1), 'grandmasterleagues': (0.1, 0.3), 'masterleagues': (0.3, 1.0)}
+        lo, hi = tiers[endpoint]
+        entries = []
+        for i in range(int(self.players * lo), int(self.players * hi)):
+            entry = {'summonerId': f"{prefix}summoner-{i}", 'summonerName': f"{prefix}Player{i}",
+                     'leaguePoints': 2000 - i, 'wins': 100 + i, 'losses': 90 + i}
+            # Parte dos jogadores já vem com PUUID (formato novo da league-v4)
+            if i % 2 == 0:
+                entry['puuid'] = f"{prefix}puuid-{i}"
+            entries.append(entry)
+        return {'tier': endpoint.replace('leagues', '').upper(), 'entries': entries}
+
+    def summoner(self, summoner_id):
+        return {'id': summoner_id, 'puuid': summoner_id.replace('summoner-', 'puuid-')}
+
+    def match_ids(self, puuid, start, count):
+        platform, _, base = puuid.rpartition('-puuid-')
+        if platform:
+            # Mesma lista do jogador base, com o prefixo da plataforma
+            ids = [f"{platform.upper()}_{m.split('_')[1]}" for m in self.match_lists.get(f"puuid-{base}", [])]
+        else:
+            ids = self.match_lists.get(puuid, [])
+        return ids[start:start + count]
+
+    def _cached(self, key, builder):
+        with self.cache_lock:
+            if key in self.cache:
+                return self.cache[key]
+        data = json.dumps(builder(), separators=(',', ':')).encode('utf-8')
+        with self.cache_lock:
+            self.cache[key] = data
+        return data
+
+    def match_bytes(self, match_id):
+        return self._cached(('match', match_id), lambda: self._build_match(match_id))
+
+    def timeline_bytes(self, match_id):
+        return self._cached(('timeline', match_id), lambda: self._build_timeline(match_id))
+
+    def _build_match(self, match_id):
+        n = int(match_id.split('_')[1])
+        rnd = random.Random(n)
+        version = self.current_version if n >= self.cutoff else self.old_version
+        blue_win = rnd.random() < 0.5
+        champs = rnd.sample(range(1, 170), 10)
+
+        participants = []
+        for idx in range(10):
+            team = 100 if idx < 5 else 200
+            lane, role = LANES[idx % 5]
+            s1, s2 = LANE_SPELLS[idx % 5]
+            participants.append({
+                'puuid': f"{match_id}-p{idx + 1}", 'championId': champs[idx], 'teamId': team,
+                'participantId': idx + 1, 'win': blue_win == (team == 100),
+                'kills': rnd.randint(0, 15), 'deaths': rnd.randint(0, 12), 'assists': rnd.randint(0, 20),
+                'goldEarned': rnd.randint(6000, 18000), 'goldSpent': rnd.randint(5000, 17000),
+                'totalMinionsKilled': rnd.randint(10, 300), 'neutralMinionsKilled': rnd.randint(0, 200),
+                'visionScore': rnd.randint(5, 90), 'wardsPlaced': rnd.randint(2, 40), 'wardsKilled': rnd.randint(0, 15),
+                'summoner1Id': s1, 'summoner2Id': s2,
+                'perks': {'styles': [{'style': rnd.choice([8000, 8100, 8200, 8300, 8400])},
+                                     {'style': rnd.choice([8000, 8100, 8200, 8300, 8400])}]},
+                **{f'item{k}': rnd.randint(1000, 7000) for k in range(7)},
+                'totalDamageDealtToChampions': rnd.randint(3000, 50000),
+                'physicalDamageDealtToChampions': rnd.randint(0, 30000),
+                'magicDamageDealtToChampions': rnd.randint(0, 30000),
+                'trueDamageDealtToChampions': rnd.randint(0, 5000),
+                'totalDamageTaken': rnd.randint(5000, 50000), 'damageDealtToTurrets': rnd.randint(0, 10000),
+                'damageSelfMitigated': rnd.randint(1000, 40000), 'timeCCingOthers': rnd.randint(0, 60),
+                'totalHeal': rnd.randint(0, 20000), 'totalUnitsHealed': rnd.randint(1, 5),
+                'lane': lane, 'role': role,
+            })
+
+        teams = []
+        for team in (100, 200):
+            won = blue_win == (team == 100)
+            teams.append({
+                'teamId': team, 'win': won,
+                'bans': [{'championId': rnd.randint(1, 170), 'pickTurn': t + (0 if team == 100 else 5)} for t in range(1, 6)],
+                'objectives': {k: {'first': won and rnd.random() < 0.6, 'kills': rnd.randint(0, 4)}
+                               for k in ('baron', 'champion', 'dragon', 'horde', 'inhibitor', 'riftHerald', 'tower')},
+            })
+
+        return {'metadata': {'matchId': match_id},
+                'info': {'platformId': match_id.split('_')[0], 'gameVersion': f"{version}.123", 'gameDuration': rnd.randint(1200, 2400),
+                         'teams': teams, 'participants': participants}}
+
+    def _build_timeline(self, match_id):
+        rnd = random.Random(int(match_id.split('_')[1]) * 7)
+        frames = []
+        gold = [500] * 10
+        for minute in range(self.frames):
+            events = []
+            for _ in range(rnd.randint(0, 6)):
+                kind = rnd.random()
+                if kind < 0.6:
+                    events.append({'type': 'CHAMPION_KILL', 'killerId': rnd.randint(0, 10), 'timestamp': minute * 60000})
+                elif kind < 0.8:
+                    events.append({'type': 'BUILDING_KILL', 'buildingType': 'TOWER_BUILDING',
+                                   'teamId': rnd.choice([100, 200]), 'timestamp': minute * 60000})
+                elif kind < 0.9:
+                    events.append({'type': 'ELITE_MONSTER_KILL', 'monsterType': 'DRAGON',
+                                   'killerTeamId': rnd.choice([100, 200]), 'timestamp': minute * 60000})
+                else:
+                    events.append({'type': 'WARD_PLACED', 'timestamp': minute * 60000})
+            pframes = {}
+            for p in range(10):
+                gold[p] += rnd.randint(250, 550)
+                pframes[str(p + 1)] = {
+                    'participantId': p + 1, 'totalGold': gold[p], 'currentGold': rnd.randint(0, 1500),
+                    'xp': minute * rnd.randint(300, 500), 'level': min(18, 1 + minute // 2),
+                    'minionsKilled': minute * rnd.randint(4, 9), 'jungleMinionsKilled': rnd.randint(0, minute * 4 + 1),
+                    'position': {'x': rnd.randint(0, 14000), 'y': rnd.randint(0, 14000)},
+                }
+            frames.append({'timestamp': minute * 60000, 'events': events, 'participantFrames': pframes})
+        return {'metadata': {'matchId': match_id}, 'info': {'frameInterval': 60000, 'frames': frames}}
+
+class RecordedData(SyntheticData):
+    """
+    Serve payloads gravados no arquivo cru (RawArchive) em vez de sintéticos.
+    As partidas do arquivo são distribuídas entre jogadores falsos.
+    """
+    def __init__(self, archive_dir, players=300, matches_per_player=20, seed=42):
+        self.archive = RawArchive(archive_dir)
+        self.archive_lock = threading.Lock()
+        ids = [r[0] for r in self.archive.index.execute("SELECT match_id FROM raw_index ORDER BY match_id DESC")]
+        super().__init__(players=players, matches_per_player=matches_per_player, seed=seed)
+        rnd = random.Random(seed)
+        for i in range(players):
+            sample = rnd.sample(ids, min(matches_per_player, len(ids)))
+            self.match_lists[f"puuid-{i}"] = sorted(sample, reverse=True)
+
+    def _record(self, match_id):
+        with self.archive_lock:
+            return self.archive.read(match_id)
+
+    def match_bytes(self, match_id):
+        return self._cached(('match', match_id), lambda: (self._record(match_id) or {}).get('details'))
+
+    def timeline_bytes(self, match_id):
+        return self._cached(('timeline', match_id), lambda: (self._record(match_id) or {}).get('timeline'))
+
+class MockRiotHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass # Silencioso
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cfg = self.server.config
+        data = self.server.data
+        url = urlparse(self.path)
+
+        if url.path == '/ddragon/api/versions.json':
+            return self._send(200, json.dumps([data.current_version, data.old_version]).encode())
+
+        # /<rota>/lol/... -> rota 'br1' ou 'americas'
+        parts = url.path.split('/', 2)
+        if len(parts) < 3:
+            return self._send(404)
+        route, path = parts[1], '/' + parts[2]
+
+        method, match = None, None
+        for pattern, key in ROUTES:
+            match = pattern.match(path)
+            if match:
+                method = key
+                break
+        if not method:
+            return self._send(404)
+
+        if self.headers.get('X-Riot-Token') is None:
+            return self._send(403, b'{"status":{"message":"Forbidden","status_code":403}}')
+
+        if cfg['latency_ms']:
+            time.sleep(random.uniform(0.5, 1.5) * cfg['latency_ms'] / 1000)
+
+        limit_type, retry_after, headers = self.server.limits.check(route, method)
+        if limit_type:
+            headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+            headers['X-Rate-Limit-Type'] = limit_type
+            return self._send(429, b'{"status":{"message":"Rate limit exceeded","status_code":429}}', headers)
+
+        # Erros injetados: 429 de serviço (sem tipo) e 5xx
+        roll = random.random()
+        if roll < cfg['service_429_rate']:
+            headers['Retry-After'] = '1'
+            return self._send(429, b'{"status":{"message":"Rate limit exceeded","status_code":429}}', headers)
+        if roll < cfg['service_429_rate'] + cfg['error_5xx_rate']:
+            return self._send(random.choice([500, 502, 503, 504]), b'{}', headers)
+
+        body = None
+        if method == 'league-v4':
+            body = json.dumps(data.league(match.group(1), route)).encode()
+        elif method == 'summoner-v4':
+            body = json.dumps(data.summoner(match.group(1))).encode()
+        elif method == 'match-v5.ids':
+            qs = parse_qs(url.query)
+            start = int(qs.get('start', ['0'])[0])
+            count = int(qs.get('count', ['20'])[0])
+            body = json.dumps(data.match_ids(match.group(1), start, count)).encode()
+        elif method == 'match-v5.match':
+            body = data.match_bytes(match.group(1))
+        elif method == 'match-v5.timeline':
+            body = data.timeline_bytes(match.group(1))
+
+        if body is None or body == b'null':
+            return self._send(404, b'{"status":{"message":"Data not found","status_code":404}}', headers)
+        return self._send(200, body, headers)
+
+def create_server(port=0, host='127.0.0.1', data=None, app_limits=DEFAULT_APP_LIMITS, method_limits=None,
+                  latency_ms=0, service_429_rate=0.0, error_5xx_rate=0.0):
+    server = ThreadingHTTPServer((host, port), MockRiotHandler)
+    server.daemon_threads = True
+    server.data = data or SyntheticData()
+    server.limits = MockRateLimits(app_limits, method_limits or DEFAULT_METHOD_LIMITS)
+    server.config = {'latency_ms': latency_ms, 'service_429_rate': service_429_rate, 'error_5xx_rate': error_5xx_rate}
+    return server
+
+def base_urls(server):
+    """Templates para RIOT_API_BASE / DDRAGON_BASE do crawler apontarem para este servidor."""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/{{route}}", f"http://{host}:{port}/ddragon"
+
+def add_server_args(parser):
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--matches-per-player", type=int, default=20)
+    parser.add_argument("--current-fraction", type=float, default=0.6, help="Fração do pool de partidas no patch atual")
+    parser.add_argument("--archive", help="Serve payloads gravados deste diretório do RawArchive")
+    parser.add_argument("--app-limits", default=DEFAULT_APP_LIMITS)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--service-429-rate", type=float, default=0.0)
+    parser.add_argument("--error-5xx-rate", type=float, default=0.0)
+
+def server_from_args(args, port=0):
+    if args.archive:
+        data = RecordedData(args.archive, players=args.players, matches_per_player=args.matches_per_player)
+    else:
+        data = SyntheticData(players=args.players, matches_per_player=args.matches_per_player,
+                             current_fraction=args.current_fraction)
+    return create_server(port=port, data=data, app_limits=args.app_limits, latency_ms=args.latency_ms,
+                         service_429_rate=args.service_429_rate, error_5xx_rate=args.error_5xx_rate)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita league-v4, summoner-v4 e match-v5")
+    parser.add_argument("--port", type=int, default=8080)
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, port=args.port)
+    api_base, ddragon_base = base_urls(server)
+    print(f"🧪 Mock Riot API em {api_base}")
+    print(f"   RIOT_API_BASE='{api_base}' DDRAGON_BASE='{ddragon_base}'")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
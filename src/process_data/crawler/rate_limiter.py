@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+# Limites padrão de uma Development Key (usados até a primeira resposta da Riot)
+DEFAULT_APP_LIMITS = "20:1,100:120"
+DEFAULT_METHOD_LIMITS = "20:1,100:120"
+
+# Margem de segurança: usamos apenas essa fração de cada janela
+# (evita 429 por diferença de relógio entre nós e o servidor da Riot)
+SAFETY_MARGIN = 0.95
+
+def parse_rate_limit_header(value):
+    """
+    Converte o formato da Riot em lista de (limite, janela_em_segundos).
+    Ex: "20:1,100:120" -> [(20, 1), (100, 120)]
+    """
+    limits = []
+    if not value:
+        return limits
+    for part in value.split(','):
+        try:
+            limit, window = part.strip().split(':')
+            limits.append((int(limit), int(window)))
+        except ValueError:
+            continue
+    return limits
+
+class TokenBucket:
+    """
+    Balde de tokens de uma janela da Riot (ex: 100 requests a cada 120s).
+    A Riot conta por janela fixa que começa no primeiro request,
+    então o balde é reabastecido por completo quando a janela expira.
+    """
+    def __init__(self, limit, window):
+        self.window = window
+        self.capacity = max(1, int(limit * SAFETY_MARGIN))
+        self.tokens = self.capacity
+        self.window_start = None
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        if self.window_start is not None and now - self.window_start >= self.window:
+            self.tokens = self.capacity
+            self.window_start = None
+
+    def wait_time(self, now):
+        """Segundos até existir um token disponível (0 = pode consumir já)."""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens > 0:
+            return 0.0
+        return self.window - (now - self.window_start)
+
+    def consume(self, now):
+        if self.window_start is None:
+            self.window_start = now
+        self.tokens -= 1
+
+    def sync_count(self, used, now):
+        """Alinha o consumo local com o contador devolvido pelo servidor."""
+        if self.window_start is None:
+            self.window_start = now
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def block(self, seconds, now):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+class RiotRateLimiter:
+    """
+    Controla os limites de Aplicação e de Método da Riot para um host/rota.
+    Os limites reais são aprendidos pelos headers X-App-Rate-Limit e
+    X-Method-Rate-Limit; Retry-After bloqueia o balde responsável pelo 429.
+    """
+    def __init__(self, app_limits=DEFAULT_APP_LIMITS, method_limits=DEFAULT_METHOD_LIMITS):
+        self.default_method_limits = method_limits
+        self.app_buckets = self._build_buckets(app_limits)
+        self.app_signature = app_limits
+        # { method_key: ([TokenBucket], assinatura_do_header) }
+        self.method_buckets = {}
+
+    @staticmethod
+    def _build_buckets(header_value):
+        return [TokenBucket(limit, window) for limit, window in parse_rate_limit_header(header_value)]
+
+    def _get_method_buckets(self, method_key):
+        if method_key not in self.method_buckets:
+            self.method_buckets[method_key] = (self._build_buckets(self.default_method_limits), self.default_method_limits)
+        return self.method_buckets[method_key][0]
+
+    async def acquire(self, method_key):
+        """Espera até que exista token em TODOS os baldes (app + método) e consome."""
+        while True:
+            now = time.monotonic()
+            buckets = self.app_buckets + self._get_method_buckets(method_key)
+            wait = max((b.wait_time(now) for b in buckets), default=0.0)
+            if wait <= 0:
+                for b in buckets:
+                    b.consume(now)
+                return
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, method_key, headers):
+        """Ajusta os baldes com os limites e contadores reais devolvidos pela Riot."""
+        now = time.monotonic()
+
+        app_limits = headers.get('X-App-Rate-Limit')
+        if app_limits and app_limits != self.app_signature:
+            self.app_buckets = self._build_buckets(app_limits)
+            self.app_signature = app_limits
+        self._sync_counts(self.app_buckets, headers.get('X-App-Rate-Limit-Count'), now)
+
+        method_limits = headers.get('X-Method-Rate-Limit')
+        if method_limits:
+            current = self.method_buckets.get(method_key)
+            if current is None or current[1] != method_limits:
+                self.method_buckets[method_key] = (self._build_buckets(method_limits), method_limits)
+        self._sync_counts(self._get_method_buckets(method_key), headers.get('X-Method-Rate-Limit-Count'), now)
+
+    @staticmethod
+    def _sync_counts(buckets, counts_header, now):
+        counts = {window: used for used, window in parse_rate_limit_header(counts_header)}
+        for b in buckets:
+            if b.window in counts:
+                b.sync_count(counts[b.window], now)
+
+    def penalize(self, method_key, retry_after, limit_type=None):
+        """
+        Aplica o Retry-After de um 429.
+        limit_type vem de X-Rate-Limit-Type ('application', 'method' ou 'service').
+        Em 'service' (sobrecarga do servidor) ninguém é bloqueado: só o request atual espera.
+        """
+        now = time.monotonic()
+        if limit_type == 'application':
+            targets = self.app_buckets
+        elif limit_type == 'method':
+            targets = self._get_method_buckets(method_key)
+        else:
+            return
+        for b in targets:
+            b.block(retry_after, now)
@@ -0,0 +1,184 @@
+import gzip
+import json
+import os
+import sqlite3
+import time
+
+# zstd é opcional: sem ele o arquivo cai para gzip (maior, mas sem dependência extra)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_LEVEL = 6
+ARCHIVE_EXT = '.jsonl.zst' if zstandard else '.jsonl.gz'
+
+# Compressores por processo (as funções abaixo também rodam nos workers de parse)
+_zstd_compressor = None
+_zstd_decompressor = None
+
+def compress_frame(data):
+    global _zstd_compressor
+    if zstandard:
+        if _zstd_compressor is None:
+            _zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return _zstd_compressor.compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def decompress_frame(shard, data):
+    global _zstd_decompressor
+    if shard.endswith('.zst'):
+        if not zstandard:
+            raise RuntimeError(f"Shard {shard} exige o pacote 'zstandard'.")
+        if _zstd_decompressor is None:
+            _zstd_decompressor = zstandard.ZstdDecompressor()
+        return _zstd_decompressor.decompress(data)
+    return gzip.decompress(data)
+
+def _json_bytes(payload):
+    """Aceita dict ou o JSON cru (bytes/str) da Riot. JSON não tem quebra de linha dentro de strings."""
+    if payload is None:
+        return b'null'
+    if isinstance(payload, bytes):
+        return payload.replace(b'\n', b' ')
+    if isinstance(payload, str):
+        return payload.replace('\n', ' ').encode('utf-8')
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def encode_record(match_id, patch, details, timeline):
+    """Monta o frame comprimido de uma partida (uma linha JSON) sem reserializar o JSON cru."""
+    line = (b'{"match_id":' + json.dumps(match_id).encode('utf-8') +
+            b',"patch":' + json.dumps(patch).encode('utf-8') +
+            b',"details":' + _json_bytes(details) +
+            b',"timeline":' + _json_bytes(timeline) + b'}\n')
+    return compress_frame(line)
+
+class RawArchive:
+    """
+    Arquivo append-only dos JSONs crus (details + timeline) baixados da Riot.
+
+    Cada patch vira um shard '<patch>.jsonl.zst' (ou '.jsonl.gz' sem zstandard).
+    Cada partida é gravada como UM frame comprimido contendo uma linha JSON, e o
+    index.db guarda (shard, offset, tamanho) por match_id, então dá para ler uma
+    partida isolada ou o shard inteiro em sequência. Bytes gravados após a última
+    flush() (ex: queda do processo) ficam fora do índice e são ignorados.
+    """
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        os.makedirs(archive_dir, exist_ok=True)
+
+        self.index = sqlite3.connect(os.path.join(archive_dir, 'index.db'))
+        self.index.execute('''
+            CREATE TABLE IF NOT EXISTS raw_index (
+                match_id TEXT PRIMARY KEY,
+                patch TEXT,
+                shard TEXT,
+                offset INTEGER,
+                length INTEGER,
+                archived_at REAL
+            )
+        ''')
+        self.index.commit()
+
+        self.files = {}     # shard -> arquivo aberto em append
+        self.pending = {}   # match_id -> linha do índice ainda não gravada
+
+    # --- ESCRITA ---
+
+    def _get_file(self, shard):
+        if shard not in self.files:
+            self.files[shard] = open(os.path.join(self.archive_dir, shard), 'ab')
+        return self.files[shard]
+
+    def contains(self, match_id):
+        if match_id in self.pending:
+            return True
+        return self.index.execute("SELECT 1 FROM raw_index WHERE match_id = ?", (match_id,)).fetchone() is not None
+
+    def append(self, match_id, patch, details, timeline):
+        """Grava o payload da partida (dicts ou JSON cru) no shard do patch."""
+        if self.contains(match_id):
+            return False
+        return self.append_frame(match_id, patch, encode_record(match_id, patch, details, timeline))
+
+    def append_frame(self, match_id, patch, frame):
+        """Grava um frame já comprimido por encode_record (ex: montado num worker de parse)."""
+        if self.contains(match_id):
+            return False
+
+        shard = f"{patch}{ARCHIVE_EXT}"
+        f = self._get_file(shard)
+        offset = f.tell()
+        f.write(frame)
+        self.pending[match_id] = (match_id, patch, shard, offset, len(frame), time.time())
+        return True
+
+    def flush(self):
+        """Leva os shards ao disco e só então publica as entradas no índice."""
+        if not self.pending:
+            return
+        for f in self.files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        self.index.executemany("INSERT OR IGNORE INTO raw_index VALUES (?, ?, ?, ?, ?, ?)", list(self.pending.values()))
+        self.index.commit()
+        self.pending = {}
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        self.index.close()
+
+    # --- LEITURA ---
+
+    def read(self, match_id):
+        """Retorna o registro {'match_id', 'patch', 'details', 'timeline'} ou None."""
+        row = self.index.execute(
+            "SELECT shard, offset, length FROM raw_index WHERE match_id = ?", (match_id,)).fetchone()
+        if not row:
+            return None
+        shard, offset, length = row
+        with open(os.path.join(self.archive_dir, shard), 'rb') as f:
+            f.seek(offset)
+            return json.loads(decompress_frame(shard, f.read(length)))
+
+    def patches(self):
+        return [r[0] for r in self.index.execute("SELECT DISTINCT patch FROM raw_index ORDER BY patch")]
+
+    def iter_frames(self, patches=None):
+        """
+        Percorre os shards em ordem de gravação devolvendo (match_id, shard, frame comprimido).
+        A leitura é sequencial por arquivo, sem rede; descomprimir/parsear fica com quem consome
+        (ex: os workers de parse do replay).
+        """
+        query = "SELECT match_id, shard, offset, length FROM raw_index"
+        params = []
+        if patches:
+            query += f" WHERE patch IN ({','.join('?' * len(patches))})"
+            params = list(patches)
+        query += " ORDER BY shard, offset"
+
+        current_shard, f = None, None
+        try:
+            for match_id, shard, offset, length in self.index.execute(query, params):
+                if shard != current_shard:
+                    if f: f.close()
+                    f = open(os.path.join(self.archive_dir, shard), 'rb')
+                    current_shard = shard
+                if f.tell() != offset:
+                    f.seek(offset)
+                yield match_id, shard, f.read(length)
+        finally:
+            if f: f.close()
+
+    def iter_records(self, patches=None):
+        for _, shard, frame in self.iter_frames(patches):
+            yield json.loads(decompress_frame(shard, frame))
+
+    def count(self, patches=None):
+        if patches:
+            return self.index.execute(
+                f"SELECT COUNT(*) FROM raw_index WHERE patch IN ({','.join('?' * len(patches))})", list(patches)).fetchone()[0]
+        return self.index.execute("SELECT COUNT(*) FROM raw_index").fetchone()[0]
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import sys
+import time
+
+import aiohttp
+
+try:
+    from src.process_data.crawler.rate_limiter import RiotRateLimiter
+except ImportError:
+    from crawler.rate_limiter import RiotRateLimiter
+
+MAX_RETRIES = 5
+
+class RequestStats:
+    """Métricas de cada tentativa HTTP (usadas pelo benchmark do crawler)."""
+    def __init__(self):
+        self.requests = 0
+        self.status_counts = {}
+        self.latencies = []
+        self.started_at = time.monotonic()
+
+    def record(self, status, latency):
+        self.requests += 1
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        self.latencies.append(latency)
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'requests': self.requests,
+            'elapsed_s': elapsed,
+            'requests_per_s': self.requests / elapsed if elapsed else 0.0,
+            'rate_429': self.status_counts.get(429, 0) / self.requests if self.requests else 0.0,
+            'errors_5xx': sum(v for k, v in self.status_counts.items() if isinstance(k, int) and k >= 500),
+            'latency_p50_ms': self.percentile(50) * 1000,
+            'latency_p99_ms': self.percentile(99) * 1000,
+            'status_counts': self.status_counts,
+        }
+
+class AsyncRiotClient:
+    """
+    Cliente HTTP assíncrono da Riot API.
+    Mantém um RiotRateLimiter por rota (ex: 'br1', 'americas'), pois a Riot
+    contabiliza os limites separadamente para cada host. Plataformas que usam o
+    mesmo host regional (br1 e na1 -> 'americas') dividem o limitador dele.
+    global_limits (ex: "500:10") é um teto opcional somando todos os hosts.
+    """
+    def __init__(self, api_key, max_connections=50, global_limits=None):
+        self.headers = {"X-Riot-Token": api_key}
+        self.max_connections = max_connections
+        self.limiters = {}
+        self.global_limiter = RiotRateLimiter(app_limits=global_limits, method_limits="") if global_limits else None
+        self.session = None
+        self.stats = RequestStats()
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def _get_limiter(self, route):
+        if route not in self.limiters:
+            self.limiters[route] = RiotRateLimiter()
+        return self.limiters[route]
+
+    async def get_json(self, url, route=None, method_key=None):
+        """Igual a get_bytes, já decodificando o JSON."""
+        data = await self.get_bytes(url, route, method_key)
+        return json.loads(data) if data is not None else None
+
+    async def get_bytes(self, url, route=None, method_key=None):
+        """
+        GET com rate limit por headers.
+        route=None desliga o limitador (ex: Data Dragon, que não exige chave).
+        Retorna o corpo cru (bytes), ou None em 404 / falha após MAX_RETRIES.
+        """
+        limiter = self._get_limiter(route) if route else None
+        retries = 0
+        while retries < MAX_RETRIES:
+            if limiter:
+                if self.global_limiter:
+                    await self.global_limiter.acquire(None)
+                await limiter.acquire(method_key)
+            sent_at = time.monotonic()
+            try:
+                async with self.session.get(url) as resp:
+                    body = await resp.read()
+                    self.stats.record(resp.status, time.monotonic() - sent_at)
+                    if limiter:
+                        limiter.update_from_headers(method_key, resp.headers)
+
+                    if resp.status == 200:
+                        return body
+
+                    elif resp.status == 429:
+                        retry_after = int(resp.headers.get('Retry-After', 5))
+                        limit_type = resp.headers.get('X-Rate-Limit-Type')
+                        if limiter:
+                            limiter.penalize(method_key, retry_after, limit_type)
+                        if retry_after > 5:
+                            print(f"\n⏳ Rate Limit ({limit_type or 'service'})! Pausa de {retry_after}s...")
+                        if limit_type not in ('application', 'method'):
+                            # Sem balde responsável: só este request espera
+                            await asyncio.sleep(retry_after)
+                        retries += 1
+                        continue
+
+                    elif resp.status == 403:
+                        print(f"\n❌ ERRO 403: API Key inválida ou expirada.")
+                        sys.exit(1)
+
+                    elif resp.status == 404:
+                        return None
+
+                    else:
+                        # Erros de servidor (500, 503)
+                        await asyncio.sleep(2)
+                        retries += 1
+
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.stats.record('network_error', time.monotonic() - sent_at)
+                await asyncio.sleep(2)
+                retries += 1
+
+        return None
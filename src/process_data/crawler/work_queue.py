@@ -0,0 +1,330 @@
+import time
+
+# Estados de um jogador na varredura
+PLAYER_PENDING = 'pending'   # Ainda precisa de PUUID / lista de partidas
+PLAYER_LISTED = 'listed'     # Partidas já enfileiradas, falta baixá-las
+PLAYER_DONE = 'done'
+PLAYER_FAILED = 'failed'     # Sem PUUID
+
+# Estados de uma partida
+MATCH_PENDING = 'pending'
+MATCH_IN_FLIGHT = 'in_flight'
+MATCH_DONE = 'done'
+MATCH_FAILED = 'failed'
+MATCH_OLD_PATCH = 'old_patch'
+
+# Partidas que falharam são tentadas de novo na próxima varredura até esse limite
+MAX_MATCH_ATTEMPTS = 3
+
+# Bancos anteriores à coleta multi-região só tinham essa plataforma
+LEGACY_PLATFORM = 'br1'
+
+def ensure_column(conn, table, column, decl):
+    """ALTER TABLE para bancos criados antes da coluna existir. Retorna True se a coluna foi criada."""
+    columns = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        return True
+    return False
+
+class CrawlQueue:
+    """
+    Fila de trabalho persistente do crawler (tabelas crawl_* no próprio banco).
+
+    Guarda os jogadores da varredura atual, seus PUUIDs, as partidas descobertas
+    e o estado de cada item. Ao reiniciar, o crawler continua exatamente de onde
+    parou: jogadores já listados não pedem a lista de novo e partidas concluídas
+    não são baixadas outra vez.
+
+    Entre execuções também guarda um cache summonerId -> PUUID e, por PUUID, a
+    partida mais nova já listada e o total de jogos (wins + losses) da liga nesse
+    momento. Jogador sem jogos novos não é listado de novo; os demais só pedem as
+    páginas mais novas que a última listagem.
+
+    Cada plataforma (br1, na1, kr...) tem a sua CrawlQueue sobre as mesmas tabelas:
+    jogadores, partidas e a varredura são separados pela coluna/chave 'platform'.
+    """
+    def __init__(self, conn, platform=LEGACY_PLATFORM):
+        self.conn = conn
+        self.platform = platform
+        self._init_tables()
+
+    def _init_tables(self):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_players (
+                player_key TEXT PRIMARY KEY,
+                summoner_id TEXT,
+                puuid TEXT,
+                summoner_name TEXT,
+                league_points INTEGER,
+                position INTEGER,
+                state TEXT,
+                updated_at REAL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_matches (
+                match_id TEXT PRIMARY KEY,
+                player_key TEXT,
+                list_pos INTEGER,
+                state TEXT,
+                attempts INTEGER DEFAULT 0,
+                error TEXT,
+                updated_at REAL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_crawl_matches_player ON crawl_matches (player_key, list_pos)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_puuid_cache (
+                summoner_id TEXT PRIMARY KEY,
+                puuid TEXT,
+                updated_at REAL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_list_cache (
+                puuid TEXT PRIMARY KEY,
+                newest_match_id TEXT,
+                games INTEGER,
+                listed_at REAL
+            )
+        ''')
+        # Jogos ranqueados (wins + losses) informados pela liga na varredura atual
+        ensure_column(self.conn, 'crawl_players', 'games', 'INTEGER')
+
+        # Multi-região: filas antigas pertencem à plataforma única da época
+        for table in ('crawl_players', 'crawl_matches'):
+            if ensure_column(self.conn, table, 'platform', 'TEXT'):
+                cursor.execute(f"UPDATE {table} SET platform = ?", (LEGACY_PLATFORM,))
+        cursor.execute("UPDATE crawl_meta SET key = ? || '.' || key WHERE key IN ('patch', 'sweep_status')",
+                       (LEGACY_PLATFORM,))
+        self.conn.commit()
+
+    # --- META / VARREDURA ---
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM crawl_meta WHERE key = ?", (f"{self.platform}.{key}",)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO crawl_meta VALUES (?, ?)", (f"{self.platform}.{key}", value))
+
+    def recover(self):
+        """
+        Partidas que estavam 'em voo' quando o processo caiu voltam para a fila.
+        O jogador vira 'done' assim que entrega as partidas ao parse, antes de o writer
+        gravá-las: quem ficou com partidas pendentes volta a 'listed' para ser retomado.
+        """
+        cursor = self.conn.execute("UPDATE crawl_matches SET state = ? WHERE state = ? AND platform = ?",
+                                   (MATCH_PENDING, MATCH_IN_FLIGHT, self.platform))
+        recovered = cursor.rowcount
+        self.conn.execute('''
+            UPDATE crawl_players SET state = ?
+            WHERE state = ? AND platform = ? AND position IS NOT NULL
+              AND player_key IN (SELECT player_key FROM crawl_matches WHERE state = ? AND platform = ?)
+        ''', (PLAYER_LISTED, PLAYER_DONE, self.platform, MATCH_PENDING, self.platform))
+        self.conn.commit()
+        return recovered
+
+    def needs_new_sweep(self, patch_prefix):
+        """Uma nova varredura (com listagem de jogadores) só é necessária se a anterior terminou ou o patch mudou."""
+        return self._get_meta('sweep_status') != 'running' or self._get_meta('patch') != patch_prefix
+
+    def start_sweep(self, patch_prefix, players):
+        """Registra os jogadores de uma nova varredura e sincroniza com as partidas já salvas."""
+        now = time.time()
+        cursor = self.conn.cursor()
+
+        cursor.execute("UPDATE crawl_players SET state = ?, position = NULL WHERE platform = ?",
+                       (PLAYER_DONE, self.platform))
+        rows = []
+        for pos, p in enumerate(players):
+            player_key = p.get('puuid') or p.get('summonerId')
+            if not player_key:
+                continue
+            games = p.get('wins', 0) + p.get('losses', 0) if 'wins' in p else None
+            rows.append((player_key, p.get('summonerId'), p.get('puuid'), p.get('summonerName', 'Anon'),
+                         p.get('leaguePoints', 0), pos, PLAYER_PENDING, now, games, self.platform))
+        cursor.executemany('''
+            INSERT INTO crawl_players
+                (player_key, summoner_id, puuid, summoner_name, league_points, position, state, updated_at, games, platform)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(player_key) DO UPDATE SET
+                platform = excluded.platform,
+                summoner_name = excluded.summoner_name,
+                league_points = excluded.league_points,
+                position = excluded.position,
+                state = excluded.state,
+                puuid = COALESCE(crawl_players.puuid, excluded.puuid),
+                games = excluded.games,
+                updated_at = excluded.updated_at
+        ''', rows)
+
+        # PUUIDs já resolvidos em execuções anteriores não pedem summoner-v4 de novo
+        cursor.execute('''
+            UPDATE crawl_players SET puuid = (
+                SELECT c.puuid FROM crawl_puuid_cache c WHERE c.summoner_id = crawl_players.summoner_id)
+            WHERE puuid IS NULL AND position IS NOT NULL AND platform = ?
+              AND summoner_id IN (SELECT summoner_id FROM crawl_puuid_cache)
+        ''', (self.platform,))
+        # Sem jogos novos desde a última listagem: a lista não mudou, só falta o que ainda está pendente
+        cursor.execute('''
+            UPDATE crawl_players SET state = ?
+            WHERE state = ? AND position IS NOT NULL AND platform = ? AND games IS NOT NULL AND EXISTS (
+                SELECT 1 FROM crawl_list_cache l WHERE l.puuid = crawl_players.puuid AND l.games = crawl_players.games)
+        ''', (PLAYER_LISTED, PLAYER_PENDING, self.platform))
+
+        # Tudo o que já está em 'matches' conta como concluído (substitui o antigo cache em memória)
+        cursor.execute('''
+            INSERT OR IGNORE INTO crawl_matches (match_id, state, updated_at)
+            SELECT match_id, ?, ? FROM matches
+        ''', (MATCH_DONE, now))
+        cursor.execute('''
+            UPDATE crawl_matches SET state = ?
+            WHERE state != ? AND match_id IN (SELECT match_id FROM matches)
+        ''', (MATCH_DONE, MATCH_DONE))
+
+        # Partidas que falharam ganham nova chance
+        cursor.execute("UPDATE crawl_matches SET state = ? WHERE state = ? AND attempts < ? AND platform = ?",
+                       (MATCH_PENDING, MATCH_FAILED, MAX_MATCH_ATTEMPTS, self.platform))
+
+        self._set_meta('patch', patch_prefix)
+        self._set_meta('sweep_status', 'running')
+        self.conn.commit()
+
+    def finish_sweep(self):
+        self._set_meta('sweep_status', 'finished')
+        self.conn.commit()
+
+    # --- JOGADORES ---
+
+    def players_to_process(self):
+        """Jogadores da varredura atual que ainda têm trabalho, na ordem original (LP)."""
+        cursor = self.conn.execute('''
+            SELECT player_key, summoner_id, puuid, summoner_name, state, games
+            FROM crawl_players
+            WHERE state IN (?, ?) AND platform = ?
+            ORDER BY position
+        ''', (PLAYER_PENDING, PLAYER_LISTED, self.platform))
+        return [
+            {'player_key': r[0], 'summonerId': r[1], 'puuid': r[2], 'summonerName': r[3], 'state': r[4], 'games': r[5]}
+            for r in cursor.fetchall()
+        ]
+
+    def count_players(self):
+        return self.conn.execute("SELECT COUNT(*) FROM crawl_players WHERE position IS NOT NULL AND platform = ?",
+                                 (self.platform,)).fetchone()[0]
+
+    def count_unchanged_players(self):
+        """Jogadores da varredura que entram já 'listados' porque a lista deles não mudou."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM crawl_players WHERE position IS NOT NULL AND state = ? AND platform = ?",
+            (PLAYER_LISTED, self.platform)).fetchone()[0]
+
+    def set_player_puuid(self, player_key, puuid, summoner_id=None):
+        now = time.time()
+        self.conn.execute("UPDATE crawl_players SET puuid = ?, updated_at = ? WHERE player_key = ?",
+                          (puuid, now, player_key))
+        if summoner_id:
+            self.conn.execute("INSERT OR REPLACE INTO crawl_puuid_cache VALUES (?, ?, ?)", (summoner_id, puuid, now))
+        self.conn.commit()
+
+    def set_player_state(self, player_key, state):
+        self.conn.execute("UPDATE crawl_players SET state = ?, updated_at = ? WHERE player_key = ?",
+                          (state, time.time(), player_key))
+        self.conn.commit()
+
+    def get_list_cache(self, puuid):
+        """(partida mais nova já listada, momento da listagem) ou None se o PUUID nunca foi listado."""
+        return self.conn.execute(
+            "SELECT newest_match_id, listed_at FROM crawl_list_cache WHERE puuid = ?", (puuid,)).fetchone()
+
+    def enqueue_matches(self, player_key, match_ids, puuid=None, games=None, prepend=False):
+        """
+        Enfileira a lista de partidas do jogador (ordem da Riot: mais nova -> mais velha)
+        e marca o jogador como listado na mesma transação.
+        Partidas já concluídas não mudam; pendentes passam para o jogador que listou por último.
+        prepend=True: a lista só tem as partidas mais novas que a listagem anterior, então as
+        posições antigas do jogador são deslocadas para manter a ordem cronológica.
+        Com puuid, o cache de listagem é atualizado junto.
+        """
+        now = time.time()
+        if prepend and match_ids:
+            self.conn.execute("UPDATE crawl_matches SET list_pos = list_pos + ? WHERE player_key = ?",
+                              (len(match_ids), player_key))
+        self.conn.executemany('''
+            INSERT INTO crawl_matches (match_id, player_key, list_pos, state, updated_at, platform)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(match_id) DO UPDATE SET
+                player_key = excluded.player_key,
+                list_pos = excluded.list_pos,
+                platform = excluded.platform
+            WHERE crawl_matches.state = 'pending'
+        ''', [(m_id, player_key, pos, MATCH_PENDING, now, self.platform) for pos, m_id in enumerate(match_ids)])
+        self.conn.execute("UPDATE crawl_players SET state = ?, updated_at = ? WHERE player_key = ?",
+                          (PLAYER_LISTED, now, player_key))
+        if puuid:
+            self.conn.execute('''
+                INSERT INTO crawl_list_cache VALUES (?, ?, ?, ?)
+                ON CONFLICT(puuid) DO UPDATE SET
+                    newest_match_id = COALESCE(excluded.newest_match_id, crawl_list_cache.newest_match_id),
+                    games = excluded.games,
+                    listed_at = excluded.listed_at
+            ''', (puuid, match_ids[0] if match_ids else None, games, now))
+        self.conn.commit()
+
+    # --- PARTIDAS ---
+
+    def pending_matches(self, player_key):
+        cursor = self.conn.execute('''
+            SELECT match_id, list_pos FROM crawl_matches
+            WHERE player_key = ? AND state = ?
+            ORDER BY list_pos
+        ''', (player_key, MATCH_PENDING))
+        return cursor.fetchall()
+
+    def claim_match(self, match_id):
+        """
+        Marca a partida como 'em voo'. Retorna False se outro worker já a pegou.
+        Sem commit próprio: 'em voo' volta a 'pending' no recover(), então a marca
+        pode esperar a próxima transação (normalmente o lote do MatchWriter).
+        """
+        cursor = self.conn.execute('''
+            UPDATE crawl_matches SET state = ?, attempts = attempts + 1, updated_at = ?
+            WHERE match_id = ? AND state = ?
+        ''', (MATCH_IN_FLIGHT, time.time(), match_id, MATCH_PENDING))
+        return cursor.rowcount == 1
+
+    def mark_match(self, match_id, state, error=None):
+        self.conn.execute("UPDATE crawl_matches SET state = ?, error = ?, updated_at = ? WHERE match_id = ?",
+                          (state, error, time.time(), match_id))
+        self.conn.commit()
+
+    def mark_done_many(self, match_ids):
+        """Marca um lote como concluído SEM commit: roda dentro da transação do MatchWriter."""
+        now = time.time()
+        self.conn.executemany("UPDATE crawl_matches SET state = ?, error = NULL, updated_at = ? WHERE match_id = ?",
+                              [(MATCH_DONE, now, m_id) for m_id in match_ids])
+
+    def mark_old_patch(self, player_key, match_id, list_pos):
+        """A lista é cronológica: a partida antiga e todas as seguintes do jogador são descartadas."""
+        now = time.time()
+        self.conn.execute("UPDATE crawl_matches SET state = ?, updated_at = ? WHERE match_id = ?",
+                          (MATCH_OLD_PATCH, now, match_id))
+        self.conn.execute('''
+            UPDATE crawl_matches SET state = ?, updated_at = ?
+            WHERE player_key = ? AND list_pos > ? AND state = ?
+        ''', (MATCH_OLD_PATCH, now, player_key, list_pos, MATCH_PENDING))
+        self.conn.commit()
+
+    def stats(self):
+        cursor = self.conn.execute("SELECT state, COUNT(*) FROM crawl_matches WHERE platform = ? GROUP BY state",
+                                   (self.platform,))
+        return dict(cursor.fetchall())
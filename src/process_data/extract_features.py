@@ -1,12 +1,56 @@
+import argparse
+import json
 import sqlite3
+import numpy as np
 import pandas as pd
 import os
-import re
 
 # Configuração de caminhos
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 DB_PATH = os.path.join(BASE_DIR, 'data', 'lol_database.db')
 
+# Dicionário de mecânicas e suas palavras-chave (PT-BR + termos em inglês).
+# Cada termo é procurado como trecho do texto (ex: 'atordo' pega 'atordoa' e 'atordoado').
+# Um JSON externo pode substituir esta lista (ver load_keyword_config)
+MECHANICS = {
+    # --- Controle de Grupo (CC) ---
+    'has_hard_cc': ['atordo', 'stun', 'arremess', 'knockup', 'temor', 'fear', 'suprim', 'provoca', 'taunt', 'enraíz', 'root', 'adormec', 'sleep'],
+    'has_soft_cc': ['lentid', 'slow', 'cegueira', 'blind', 'silêncio', 'silence', 'polimorf'],
+    'has_hook': ['puxa', 'arrasta', 'gancho'], # Ex: Blitz, Thresh, Nautilus
+
+    # --- Sustentação e Defesa ---
+    'has_heal': ['curar', 'restaura vida', 'curam', 'regenera'],
+    'has_shield': ['escudo', 'barreira', 'shield'],
+    'has_immortality': ['imortal', 'não pode morrer', 'revive', 'zumbis'], # Ex: Trynda, Zilean, Sion
+
+    # --- Dano e Ofensiva ---
+    'has_true_damage': ['dano verdadeiro', 'true damage'],
+    'has_execute': ['executa', 'abaixo de', 'vida perdida'], # Ex: Pyke, Garen, Riven
+    'has_percent_hp_dmg': ['vida máxima', 'vida atual', '% da vida'], # Anti-tank
+
+    # --- Mobilidade ---
+    'has_dash': ['avança', 'investida', 'dash', 'desliza'],
+    'has_blink': ['teleporte', 'transloca', 'piscar', 'blink', 'surgir atrás'], # Ex: Ezreal, Kat, Zed
+    'has_ms_buff': ['velocidade de movimento', 'bônus de velocidade'],
+
+    # --- Mecânicas Específicas ---
+    'has_stealth': ['invisí', 'camufla', 'furtiv'],
+    'has_summon': ['invoca', 'cria', 'torre', 'margarida', 'tibbers', 'voidling'], # Pets
+    'is_stacking': ['acúmulo', 'permanentemente', 'infinito', 'stacks'] # Nasus, Veigar, Aurelion
+}
+
+# Expressões que, logo antes de um termo, anulam o match (ex: 'imune a' + 'lentidão').
+# Vazio por padrão: cada termo conta onde aparecer
+NEGATIONS = []
+
+WORD_MODES = (None, 'start', 'end', 'both')
+
+# Só colunas com estes prefixos vão para champion_features (ver save_features)
+FEATURE_PREFIXES = ('has_', 'is_')
+
+# Validação do run(): (rótulo, mecânica) esperadas na Blitzcrank
+BLITZCRANK_CHECK = [('Hook', 'has_hook'), ('Hard CC', 'has_hard_cc'), ('Shield', 'has_shield')]
+
 def load_data(conn):
     """Carrega campeões e habilidades, unindo os textos."""
     print("Carregando dados do banco...")
@@ -40,44 +84,164 @@ def load_data(conn):
     
     return df_full
 
-def apply_keywords(df):
+def _negation_list(negations, where):
+    """Negations têm de ser uma lista de strings (uma string solta viraria uma negação por letra)."""
+    if not isinstance(negations, (list, tuple)) or not all(isinstance(n, str) for n in negations):
+        raise ValueError(f"{where}: negations deve ser uma lista de strings ({negations!r})")
+    return tuple(n.lower().strip() for n in negations if n.strip())
+
+def _keyword_rules(mechanics, negations):
+    """
+    Normaliza as entradas de cada mecânica em (termo, feature, word, negations).
+    Entrada: 'termo' ou {'term': 'termo', 'word': None|'start'|'end'|'both', 'negations': [...]}.
+      word      -> o termo precisa começar ('start'), terminar ('end') ou as duas coisas
+                   ('both') numa fronteira de palavra
+      negations -> expressões que anulam o termo quando vêm logo antes dele
+                   (padrão: as negations globais)
+    """
+    global_negs = _negation_list(negations, "negations globais")
+    rules = []
+    for feature, (name, entries) in enumerate(mechanics.items()):
+        if not isinstance(entries, (list, tuple)):
+            raise ValueError(f"Mecânica '{name}': as palavras-chave devem vir numa lista")
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {'term': entry}
+            elif not isinstance(entry, dict):
+                raise ValueError(f"Mecânica '{name}': entrada deve ser um termo ou um objeto ({entry!r})")
+            term = str(entry.get('term', '')).lower()
+            if not term:
+                raise ValueError(f"Mecânica '{name}': termo vazio ({entry})")
+            word = entry.get('word')
+            if word is True:
+                word = 'both'
+            if word not in WORD_MODES:
+                raise ValueError(f"Mecânica '{name}', termo '{term}': word deve ser um de {WORD_MODES}")
+            if 'negations' in entry:
+                negs = _negation_list(entry['negations'], f"Mecânica '{name}', termo '{term}'")
+            else:
+                negs = global_negs
+            rules.append((term, feature, word, negs))
+    return rules
+
+class KeywordMatcher:
+    """
+    Todas as palavras-chave de todas as mecânicas num único autômato de Aho-Corasick:
+    cada texto é percorrido uma vez e todas as flags saem juntas, em vez de um
+    str.contains por mecânica. Termos repetidos entre mecânicas viram um nó só.
+    A montagem é linear no tamanho dos termos, então continua instantânea com mais
+    palavras-chave; textos repetidos (mesmo campeão em vários patches) são
+    avaliados uma vez só (flags).
+    """
+    def __init__(self, mechanics=None, negations=None):
+        mechanics = MECHANICS if mechanics is None else mechanics
+        negations = NEGATIONS if negations is None else negations
+        self.features = list(mechanics)
+
+        # Trie: goto[nó] = {caractere: nó}; outputs[nó] = regras dos termos que terminam ali
+        self.goto = [{}]
+        self.outputs = [[]]
+        for term, feature, word, negs in _keyword_rules(mechanics, negations):
+            node = 0
+            for ch in term:
+                if ch not in self.goto[node]:
+                    self.goto[node][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.outputs.append([])
+                node = self.goto[node][ch]
+            rule = (feature, len(term), word, negs)
+            if rule not in self.outputs[node]:
+                self.outputs[node].append(rule)
+
+        # Links de falha em BFS; cada nó herda as saídas do seu link (sufixos que também são termos)
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for ch, child in self.goto[node].items():
+                link = self.fail[node]
+                while link and ch not in self.goto[link]:
+                    link = self.fail[link]
+                self.fail[child] = self.goto[link].get(ch, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+                queue.append(child)
+
+    @classmethod
+    def from_config(cls, path):
+        mechanics, negations = load_keyword_config(path)
+        return cls(mechanics, negations)
+
+    @staticmethod
+    def _negated(text, start, negations):
+        end = start
+        while end > 0 and text[end - 1].isspace():
+            end -= 1
+        return any(text.endswith(neg, 0, end) for neg in negations)
+
+    def match(self, text):
+        """Índices (em self.features) das mecânicas encontradas no texto (já em minúsculo)."""
+        found = set()
+        total = len(self.features)
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for feature, length, word, negs in outputs[node]:
+                if feature in found:
+                    continue
+                start = i - length + 1
+                if word in ('start', 'both') and start > 0 and text[start - 1].isalnum():
+                    continue
+                if word in ('end', 'both') and i + 1 < len(text) and text[i + 1].isalnum():
+                    continue
+                if negs and self._negated(text, start, negs):
+                    continue
+                found.add(feature)
+                if len(found) == total:
+                    return found
+        return found
+
+    def flags(self, texts):
+        """Matriz (len(texts) x mecânicas) de 0/1; cada texto distinto é percorrido uma vez."""
+        codes, unique_texts = pd.factorize(pd.Series(texts, dtype=object).fillna(''))
+        unique_flags = np.zeros((len(unique_texts), len(self.features)), dtype=np.int64)
+        for row, text in enumerate(unique_texts):
+            unique_flags[row, list(self.match(text))] = 1
+        return unique_flags[codes] if len(codes) else np.zeros((0, len(self.features)), dtype=np.int64)
+
+def load_keyword_config(path):
+    """
+    Lê mecânicas/palavras-chave de um JSON:
+        {
+          "mechanics": { "has_hard_cc": ["atordo", {"term": "root", "word": "both"}], ... },
+          "negations": ["não pode ser", "imune a"]
+        }
+    'negations' é opcional. Os nomes das mecânicas viram colunas de champion_features
+    e devem começar com has_ ou is_ (ValueError se não, em vez de sumirem no save_features).
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    mechanics = config.get('mechanics')
+    if not isinstance(mechanics, dict) or not mechanics:
+        raise ValueError(f"{path}: 'mechanics' deve ser um objeto com as mecânicas")
+    unsaved = [name for name in mechanics if not name.startswith(FEATURE_PREFIXES)]
+    if unsaved:
+        raise ValueError(f"{path}: mecânicas sem prefixo {' ou '.join(FEATURE_PREFIXES)} "
+                         f"não seriam salvas: {', '.join(unsaved)}")
+    negations = config.get('negations', [])
+    _keyword_rules(mechanics, negations)
+    return mechanics, negations
+
+def apply_keywords(df, matcher=None):
     """Aplica regras de keywords para gerar features binárias."""
     print("Aplicando engenharia de features (Keywords em PT-BR)...")
+    matcher = matcher or KeywordMatcher()
 
-    # Dicionário de mecânicas e suas palavras-chave
-    mechanics = {
-        # --- Controle de Grupo (CC) ---
-        'has_hard_cc': ['atordo', 'stun', 'arremess', 'knockup', 'temor', 'fear', 'suprim', 'provoca', 'taunt', 'enraíz', 'root', 'adormec', 'sleep'],
-        'has_soft_cc': ['lentid', 'slow', 'cegueira', 'blind', 'silêncio', 'silence', 'polimorf'],
-        'has_hook': ['puxa', 'arrasta', 'gancho'], # Ex: Blitz, Thresh, Nautilus
-
-        # --- Sustentação e Defesa ---
-        'has_heal': ['curar', 'restaura vida', 'curam', 'regenera'],
-        'has_shield': ['escudo', 'barreira', 'shield'],
-        'has_immortality': ['imortal', 'não pode morrer', 'revive', 'zumbis'], # Ex: Trynda, Zilean, Sion
-
-        # --- Dano e Ofensiva ---
-        'has_true_damage': ['dano verdadeiro', 'true damage'],
-        'has_execute': ['executa', 'abaixo de', 'vida perdida'], # Ex: Pyke, Garen, Riven
-        'has_percent_hp_dmg': ['vida máxima', 'vida atual', '% da vida'], # Anti-tank
-        
-        # --- Mobilidade ---
-        'has_dash': ['avança', 'investida', 'dash', 'desliza'],
-        'has_blink': ['teleporte', 'transloca', 'piscar', 'blink', 'surgir atrás'], # Ex: Ezreal, Kat, Zed
-        'has_ms_buff': ['velocidade de movimento', 'bônus de velocidade'],
-
-        # --- Mecânicas Específicas ---
-        'has_stealth': ['invisí', 'camufla', 'furtiv'],
-        'has_summon': ['invoca', 'cria', 'torre', 'margarida', 'tibbers', 'voidling'], # Pets
-        'is_stacking': ['acúmulo', 'permanentemente', 'infinito', 'stacks'] # Nasus, Veigar, Aurelion
-    }
-
-    # Aplica a lógica: Se qualquer palavra da lista estiver no texto, valor = 1, senão 0
-    for feature, keywords in mechanics.items():
-        # Regex pattern: procura qualquer palavra da lista
-        # O '|' funciona como OR no regex. Ex: "atordo|stun|arremess"
-        pattern = '|'.join(keywords)
-        df[feature] = df['full_text'].str.contains(pattern, na=False, regex=True).astype(int)
+    # Uma passada por texto: valor = 1 se qualquer palavra da mecânica estiver no texto, senão 0
+    flags = matcher.flags(df['full_text'])
+    for j, feature in enumerate(matcher.features):
+        df[feature] = flags[:, j]
 
     return df
 
@@ -86,7 +250,7 @@ def save_features(df, conn):
     
     # Seleciona apenas as colunas chaves + features criadas
     # Remove colunas de texto cru para economizar espaço
-    cols_to_keep = ['champion_key', 'patch_version'] + [col for col in df.columns if col.startswith('has_') or col.startswith('is_')]
+    cols_to_keep = ['champion_key', 'patch_version'] + [col for col in df.columns if col.startswith(FEATURE_PREFIXES)]
     
     df_final = df[cols_to_keep]
     
@@ -94,19 +258,21 @@ def save_features(df, conn):
     df_final.to_sql('champion_features', conn, if_exists='replace', index=False)
     print("Sucesso!")
 
-def run():
+def run(keywords_path=None):
     conn = sqlite3.connect(DB_PATH)
     try:
         df = load_data(conn)
-        df_features = apply_keywords(df)
+        matcher = KeywordMatcher.from_config(keywords_path) if keywords_path else KeywordMatcher()
+        df_features = apply_keywords(df, matcher)
         
-        # Validar um exemplo antes de salvar
-        print("\n--- Validação: Blitzcrank (Deve ter Hook, CC e Shield) ---")
-        check = df_features[df_features['name'] == 'Blitzcrank'].iloc[0]
-        print(f"Hook: {check['has_hook']}")
-        print(f"Hard CC: {check['has_hard_cc']}")
-        print(f"Shield: {check['has_shield']}")
-        print("----------------------------------------------------------\n")
+        # Validar um exemplo antes de salvar (só as mecânicas que a configuração tem)
+        checks = [(label, col) for label, col in BLITZCRANK_CHECK if col in matcher.features]
+        if checks:
+            print(f"\n--- Validação: Blitzcrank (Deve ter {', '.join(label for label, _ in checks)}) ---")
+            check = df_features[df_features['name'] == 'Blitzcrank'].iloc[0]
+            for label, col in checks:
+                print(f"{label}: {check[col]}")
+            print("----------------------------------------------------------\n")
 
         save_features(df_features, conn)
         
@@ -114,4 +280,7 @@ def run():
         conn.close()
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gera champion_features a partir dos textos das habilidades.")
+    parser.add_argument('--keywords', metavar='FILE', help="JSON com mecânicas/palavras-chave (padrão: MECHANICS)")
+    args = parser.parse_args()
+    run(keywords_path=args.keywords)
\ No newline at end of file
@@ -1,34 +1,79 @@
+import argparse
+import json
+import multiprocessing
 import sqlite3
+import numpy as np
 import pandas as pd
 import os
 import time
 import sys
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # Ajuste de path e imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'features'))
 
 try:
-    from src.process_data.features.mechanics import calculate_mechanics
-    from src.process_data.features.stats import calculate_stats
-    from src.process_data.features.damage_profile import calculate_damage_profile
-    from src.process_data.features.classes import calculate_class_counts
-    from src.process_data.features.lane_matchups import calculate_lane_matchups
-    from src.process_data.features.role_fixer import resolve_team_roles
+    from src.process_data.features.registry import feature_groups, feature_columns, feature_versions, changed_groups
+    from src.process_data.features.role_fixer import resolve_team_roles, resolve_roles_batch, position_codes, participant_signals, RoleTagTable
     from src.process_data.features.live_prediction import calculate_live_features
     from src.process_data.features.winrates import RollingWinrate
+    from src.process_data.features.champion_catalog import ChampionCatalog
+    from src.process_data.feature_store import export_feature_store, remove_feature_store, read_data_version, STATE_TABLE, DATA_VERSION_KEY
+    from src.process_data.profiling import StageProfiler, PROFILE_PATH
 except ImportError:
-    from features.mechanics import calculate_mechanics
-    from features.stats import calculate_stats
-    from features.damage_profile import calculate_damage_profile
-    from features.classes import calculate_class_counts
-    from features.lane_matchups import calculate_lane_matchups
-    from features.role_fixer import resolve_team_roles
+    from features.registry import feature_groups, feature_columns, feature_versions, changed_groups
+    from features.role_fixer import resolve_team_roles, resolve_roles_batch, position_codes, participant_signals, RoleTagTable
     from features.live_prediction import calculate_live_features
     from features.winrates import RollingWinrate
+    from features.champion_catalog import ChampionCatalog
+    from feature_store import export_feature_store, remove_feature_store, read_data_version, STATE_TABLE, DATA_VERSION_KEY
+    from profiling import StageProfiler, PROFILE_PATH
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 DB_PATH = os.path.join(BASE_DIR, 'data', 'lol_database.db')
 
+# Linhas de timeline lidas por vez (as tabelas são percorridas uma única vez, em ordem de match_id)
+TIMELINE_CHUNK_ROWS = 200000
+
+# Extração paralela: cada worker processa um intervalo contíguo de match_ids.
+# Cada chunk também é a unidade de escrita/checkpoint em game_features
+FEATURE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+MATCHES_PER_CHUNK = 2000
+
+# Ordem canónica das posições para garantir consistência nas features
+ROLE_ORDER = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+ROLE_LABELS = ['top', 'jungle', 'mid', 'adc', 'sup']
+
+# rowid mantém, dentro de cada partida, a mesma ordem das antigas consultas por match_id.
+# {where} recebe o filtro de partidas novas no modo incremental (vazio na execução completa)
+QUERY_TIMELINE_STATS = "SELECT * FROM match_timeline_stats ts {where} ORDER BY ts.match_id, ts.rowid"
+QUERY_TIMELINE_PARTICIPANTS = """
+    SELECT tp.*, p.champion_id FROM match_timeline_participants tp
+    JOIN match_participants p ON tp.match_id = p.match_id AND tp.participant_id = p.participant_id
+    {where}
+    ORDER BY tp.match_id, tp.rowid
+"""
+QUERY_MATCHES = """
+    SELECT m.match_id, m.game_version, m.winner_team, 
+           p.team_id, p.champion_id, p.lane, p.role,
+           p.spell1Id, p.spell2Id,
+           p.item0, p.item1, p.item2, p.item3, p.item4, p.item5, p.item6
+    FROM matches m
+    JOIN match_participants p ON m.match_id = p.match_id
+    {where}
+    ORDER BY m.match_id ASC
+"""
+
+# Estado do modo incremental (acumulador de winrates + versões dos grupos + status da execução)
+# fica em STATE_TABLE (feature_store.py), que também guarda a versão de game_features
+
+# match_ids já processados (aproveitados ou descartados). O crawler não grava as partidas
+# em ordem de ID (percorre o histórico de cada jogador para trás), então "novo" é quem
+# não está aqui, e não quem tem ID acima do último processado
+PROCESSED_TABLE = 'feature_processed_matches'
+
 def load_reference_data(conn):
     print("Carregando dados estáticos...")
     # Restaurando todas as colunas necessárias para os cálculos de stats e mecânicas
@@ -51,6 +96,157 @@ def load_reference_data(conn):
     df_features = pd.read_sql(query_features, conn)
     return df_champs, df_features
 
+def init_state_table(conn):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {PROCESSED_TABLE} (match_id TEXT PRIMARY KEY)")
+
+def load_state(conn):
+    """
+    Estado salvo pela última execução: (RollingWinrate, run_status, feature_versions).
+    As partidas já processadas ficam em PROCESSED_TABLE.
+    run_status = 'running' se a execução parou no meio (checkpoint do último chunk salvo).
+    feature_versions = { grupo do registro: versão } com que as linhas foram geradas
+    (None em estados antigos, sem versões -> todos os grupos contam como alterados).
+    Retorna None se não houver estado ou se game_features não existir.
+    """
+    init_state_table(conn)
+    state = dict(conn.execute(f"SELECT key, value FROM {STATE_TABLE}").fetchall())
+    has_table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'game_features'").fetchone()
+    if 'winrate_state' not in state or not has_table:
+        return None
+    if 'watermarks' in state:
+        # Estado antigo (watermark por plataforma): as partidas de game_features contam como
+        # processadas; as descartadas antes são lidas de novo uma vez
+        conn.execute(f"INSERT OR IGNORE INTO {PROCESSED_TABLE} SELECT match_id FROM game_features")
+        conn.execute(f"DELETE FROM {STATE_TABLE} WHERE key = 'watermarks'")
+        conn.commit()
+    return (RollingWinrate.from_state(json.loads(state['winrate_state'])),
+            state.get('run_status', 'finished'),
+            json.loads(state['feature_versions']) if 'feature_versions' in state else None)
+
+def save_state(conn, winrate_model, run_status, run_id, processed_ids=(), stale_groups=()):
+    """
+    Grava o estado na mesma transação das linhas de game_features (o commit fica com quem chama).
+    run_id: versão de game_features desta execução (o feature store exportado guarda a sua).
+    processed_ids: partidas do chunk que entram em PROCESSED_TABLE (inclusive as descartadas).
+    stale_groups: grupos gravados sem versão, para a próxima execução recalculá-los
+    (ex: winrates de uma execução com partidas fora de ordem que parou antes de refazê-los).
+    """
+    init_state_table(conn)
+    versions = feature_versions()
+    for group in stale_groups:
+        versions[group.name] = None
+    conn.executemany(f"INSERT OR IGNORE INTO {PROCESSED_TABLE} VALUES (?)", [(m,) for m in processed_ids])
+    conn.executemany(f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?)", [
+        ('winrate_state', json.dumps(winrate_model.to_state())),
+        ('run_status', run_status),
+        ('feature_versions', json.dumps(versions, sort_keys=True)),
+        (DATA_VERSION_KEY, run_id),
+    ])
+
+def reset_outputs(conn):
+    """Execução completa: apaga game_features e o estado antes de começar (nada de linhas antigas misturadas)."""
+    init_state_table(conn)
+    conn.execute("DROP TABLE IF EXISTS game_features")
+    conn.execute(f"DELETE FROM {STATE_TABLE}")
+    conn.execute(f"DELETE FROM {PROCESSED_TABLE}")
+    conn.commit()
+    # O store exportado de uma tabela que não existe mais só confundiria o treino
+    remove_feature_store()
+
+def new_matches_filter(column, only_new=False, id_range=None):
+    """
+    Cláusula WHERE para as partidas a processar.
+    only_new=True mantém só as que não estão em PROCESSED_TABLE (anti-join pela chave primária).
+    id_range=(primeiro, último) restringe a um intervalo de match_ids (um chunk).
+    """
+    clauses, params = [], []
+    if only_new:
+        clauses.append(f"NOT EXISTS (SELECT 1 FROM {PROCESSED_TABLE} pm WHERE pm.match_id = {column})")
+    if id_range:
+        clauses.append(f"{column} BETWEEN ? AND ?")
+        params.extend(id_range)
+    if not clauses:
+        return "", []
+    return "WHERE " + " AND ".join(clauses), params
+
+def ensure_timeline_indexes(conn):
+    """Índices por match_id nas timelines: cada worker lê só o intervalo do seu chunk."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_timeline_stats_match ON match_timeline_stats (match_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_timeline_participants_match ON match_timeline_participants (match_id)")
+    conn.commit()
+
+def iter_match_frames(conn, query, chunksize=TIMELINE_CHUNK_ROWS, params=None):
+    """
+    Lê uma query ordenada por match_id em blocos e devolve (match_id, DataFrame) por partida.
+    Uma partida que cruza a fronteira entre blocos é emendada com o bloco seguinte.
+    """
+    carry = None
+    for chunk in pd.read_sql(query, conn, params=params, chunksize=chunksize):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        ids = chunk['match_id'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        for begin, end in zip(starts[:-1], starts[1:]):
+            yield ids[begin], chunk.iloc[begin:end]
+        # A última partida do bloco pode continuar no próximo
+        carry = chunk.iloc[starts[-1]:]
+    if carry is not None and not carry.empty:
+        yield carry['match_id'].iat[0], carry
+
+class TimelineIndex:
+    """
+    Acesso por match_id às fatias de match_timeline_stats / match_timeline_participants
+    sem SQL por partida. As duas tabelas são lidas em blocos, em ordem de match_id,
+    e avançam junto com o laço do orquestrador (que também percorre as partidas em
+    ordem crescente). Partidas puladas são só descartadas; sem timeline = DataFrame vazio.
+    only_new/id_range: lê só as partidas novas de um intervalo (ver new_matches_filter).
+    """
+    def __init__(self, conn, chunksize=TIMELINE_CHUNK_ROWS, only_new=False, id_range=None):
+        where_ts, params_ts = new_matches_filter('ts.match_id', only_new, id_range)
+        where_tp, params_tp = new_matches_filter('tp.match_id', only_new, id_range)
+        self.streams = [
+            iter_match_frames(conn, QUERY_TIMELINE_STATS.format(where=where_ts), chunksize, params_ts),
+            iter_match_frames(conn, QUERY_TIMELINE_PARTICIPANTS.format(where=where_tp), chunksize, params_tp),
+        ]
+        self.heads = [next(stream, None) for stream in self.streams]
+
+    def _advance(self, idx, match_id):
+        head = self.heads[idx]
+        while head is not None and head[0] < match_id:
+            head = next(self.streams[idx], None)
+        self.heads[idx] = head
+        if head is not None and head[0] == match_id:
+            return head[1]
+        return pd.DataFrame()
+
+    def get(self, match_id):
+        """(df_timeline_stats, df_timeline_participants) da partida."""
+        return self._advance(0, match_id), self._advance(1, match_id)
+
+def calculate_static_features(blue_ids, red_ids, patches, catalog, groups=None, profiler=None):
+    """
+    Features estáticas (composição) de todas as partidas de uma vez.
+    blue_ids/red_ids: matrizes (n_partidas x 5) na ordem TOP, JUNGLE, MIDDLE, BOTTOM, UTILITY.
+    groups: grupos estáticos do registro a calcular (padrão: todos).
+    profiler: StageProfiler que recebe o tempo de cada kernel (estágio 'static:<grupo>').
+    Retorna { feature: lista de n valores } (tipos Python, prontos para o sqlite).
+    """
+    blue = np.asarray(blue_ids, dtype=np.int64).reshape(-1, 5)
+    red = np.asarray(red_ids, dtype=np.int64).reshape(-1, 5)
+    patches = list(patches)
+
+    profiler = profiler or StageProfiler()
+    features = {}
+    for group in (feature_groups('static') if groups is None else groups):
+        with profiler.stage(f'static:{group.name}'):
+            result = group.kernel(blue, red, patches, catalog)
+        # Saída conferida contra o FEATURE_SPEC do módulo (colunas, ordem e tipo)
+        for key, values in group.validate(result).items():
+            features[key] = values.tolist()
+    return features
+
 def create_dynamic_table(conn, feature_keys):
     cursor = conn.cursor()
     cursor.execute("DROP TABLE IF EXISTS game_features")
@@ -67,122 +263,438 @@ def create_dynamic_table(conn, feature_keys):
     cursor.execute(sql)
     conn.commit()
 
-def run_orchestrator():
-    start_time = time.time()
-    conn = sqlite3.connect(DB_PATH)
-    
+# --- ESTÁGIO PARALELO (independente da ordem das partidas) ---
+
+# Referências de cada processo worker (montadas uma vez no initializer)
+_worker_refs = None
+
+def init_feature_worker(df_champs, df_features):
+    global _worker_refs
+    _worker_refs = (df_champs, ChampionCatalog(df_champs, df_features), RoleTagTable(df_champs))
+
+def resolve_chunk_roles(df_matches, df_champs, role_table):
+    """
+    Posições de todos os times de um chunk de uma vez (resolve_roles_batch), com
+    tags, feitiços e itens dos jogadores como sinais.
+    Retorna (match_ids em ordem, índice da primeira linha de cada partida em df_matches,
+    matriz blue, matriz red), com os IDs na ordem de ROLE_ORDER. Times com menos de
+    5 jogadores ficam com a linha zerada (partida descartada por quem chama).
+    """
+    codes, match_ids = pd.factorize(df_matches['match_id'], sort=True)
+    n = len(match_ids)
+    _, first_rows = np.unique(codes, return_index=True)
+    team = df_matches['team_id'].to_numpy()
+    ids = df_matches['champion_id'].to_numpy(dtype=np.int64)
+    positions = position_codes(df_matches['lane'].to_numpy(dtype=object), df_matches['role'].to_numpy(dtype=object))
+    spells, items = participant_signals(df_matches)
+
+    resolved = []
+    for team_id in (100, 200):
+        # Linhas do time agrupadas por partida, mantendo a ordem de df_matches dentro de cada uma
+        rows = np.flatnonzero(team == team_id)
+        rows = rows[np.argsort(codes[rows], kind='stable')]
+        sizes = np.bincount(codes[rows], minlength=n)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        matrix = np.zeros((n, 5), dtype=np.int64)
+        full = np.flatnonzero(sizes == 5)
+        idx = rows[starts[full][:, None] + np.arange(5)]
+        matrix[full] = resolve_roles_batch(ids[idx], positions[idx], spells[idx], role_table, items[idx])
+        # Times fora do padrão (mais de 5 linhas) vão pelo caminho por time
+        for m in np.flatnonzero(sizes > 5):
+            team_roles = resolve_team_roles(df_matches.iloc[rows[starts[m]:starts[m] + sizes[m]]], df_champs)
+            matrix[m] = [team_roles.get(role, 0) for role in ROLE_ORDER]
+        resolved.append(matrix)
+    return match_ids, first_rows, resolved[0], resolved[1]
+
+def extract_chunk(db_path, id_range, only_new, trace_memory=False):
+    """
+    Roles, features estáticas e de timeline de um intervalo de match_ids.
+    Nada aqui depende de partidas anteriores, então os chunks rodam em qualquer
+    processo e ordem; quem chama junta os resultados na ordem dos intervalos.
+    Retorna só as partidas aproveitadas: { 'matches', 'blue', 'red', 'static', 'dynamic' },
+    mais o perfil dos estágios do chunk em 'profile' (StageProfiler.to_dict).
+    """
+    df_champs, catalog, role_table = _worker_refs
+    profiler = StageProfiler(trace_memory)
+    conn = sqlite3.connect(db_path)
     try:
-        df_champs, df_features_ref = load_reference_data(conn)
-    except Exception as e:
-        print(f"Erro ao carregar referências: {e}")
+        where, params = new_matches_filter('m.match_id', only_new, id_range)
+        with profiler.stage('matches_query'):
+            df_matches = pd.read_sql(QUERY_MATCHES.format(where=where), conn, params=params)
+        with profiler.stage('timeline_query'):
+            timelines = TimelineIndex(conn, only_new=only_new, id_range=id_range)
+
+        # Resolve posições de todos os times do chunk (listas na ROLE_ORDER, para o RollingWinrate por posição)
+        with profiler.stage('roles'):
+            match_ids, first_rows, blue_roles, red_roles = resolve_chunk_roles(df_matches, df_champs, role_table)
+        game_versions = df_matches['game_version'].to_numpy(dtype=object)
+        winner_teams = df_matches['winner_team'].to_numpy()
+
+        matches_kept, blue_matrix, red_matrix, dynamic_features = [], [], [], []
+        for m, match_id in enumerate(match_ids):
+            patch = ".".join(game_versions[first_rows[m]].split(".")[:2])
+            winner = 1 if int(winner_teams[first_rows[m]]) == 100 else 0
+            blue_list, red_list = blue_roles[m].tolist(), red_roles[m].tolist()
+
+            # Ignora partidas com time incompleto ou onde a resolução de roles falhou
+            if 0 in blue_list or 0 in red_list: continue
+            blue_roles_dict = dict(zip(ROLE_ORDER, blue_list))
+            red_roles_dict = dict(zip(ROLE_ORDER, red_list))
+            
+            # 1. Live Prediction (Timeline) - fatias já carregadas, sem consulta por partida
+            with profiler.stage('timeline_query'):
+                df_ts, df_tp = timelines.get(match_id)
+            with profiler.stage('live'):
+                feat_live = calculate_live_features(match_id, blue_roles_dict, red_roles_dict, df_ts, df_tp)
+
+            # 2. Identity IDs
+            feat_ids = {}
+            for i, r_label in enumerate(ROLE_LABELS):
+                feat_ids[f'blue_{r_label}_id'] = blue_list[i]
+                feat_ids[f'red_{r_label}_id'] = red_list[i]
+
+            matches_kept.append((match_id, patch, winner))
+            blue_matrix.append([int(cid) for cid in blue_list])
+            red_matrix.append([int(cid) for cid in red_list])
+            dynamic_features.append({**feat_live, **feat_ids})
+    finally:
+        conn.close()
+
+    # 3. Features Estáticas e Matchups (vetorizadas sobre o chunk inteiro)
+    patches = [patch for _, patch, _ in matches_kept]
+    static_features = (calculate_static_features(blue_matrix, red_matrix, patches, catalog, profiler=profiler)
+                       if matches_kept else {})
+    profiler.stop()
+    return {'matches': matches_kept, 'blue': blue_matrix, 'red': red_matrix,
+            'static': static_features, 'dynamic': dynamic_features, 'profile': profiler.to_dict()}
+
+def _extract_chunk_task(task):
+    return extract_chunk(*task)
+
+def create_feature_pool(workers, df_champs, df_features):
+    # 'spawn' como no crawler; cada worker recebe as referências uma única vez
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_feature_worker, initargs=(df_champs, df_features))
+
+def chunk_ranges(match_ids, size=MATCHES_PER_CHUNK):
+    """Lista ordenada de match_ids -> intervalos (primeiro, último) com até size partidas."""
+    return [(match_ids[i], match_ids[min(i + size, len(match_ids)) - 1]) for i in range(0, len(match_ids), size)]
+
+def extract_all_chunks(db_path, ranges, only_new, df_champs, df_features, workers, trace_memory=False):
+    """
+    Resultados de extract_chunk na ordem dos intervalos (determinístico com qualquer número de workers).
+    No máximo 2 chunks por worker ficam em voo, então a memória não cresce com o total de partidas.
+    """
+    tasks = [(db_path, id_range, only_new, trace_memory) for id_range in ranges]
+    if workers <= 1 or len(tasks) <= 1:
+        init_feature_worker(df_champs, df_features)
+        yield from map(_extract_chunk_task, tasks)
         return
+    workers = min(workers, len(tasks))
+    with create_feature_pool(workers, df_champs, df_features) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_extract_chunk_task, task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
-    print("Buscando partidas ordenadas por tempo...")
-    query_matches = """
-        SELECT m.match_id, m.game_version, m.winner_team, 
-               p.team_id, p.champion_id, p.lane, p.role
-        FROM matches m
-        JOIN match_participants p ON m.match_id = p.match_id
-        ORDER BY m.match_id ASC
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def read_stored_matches(conn):
     """
-    df_matches = pd.read_sql(query_matches, conn)
-    unique_match_ids = df_matches['match_id'].unique()
-    
-    winrate_model = RollingWinrate()
-    rows_to_insert = []
-    feature_columns_order = [] 
-    table_created = False
-    processed_count = 0
-    grouped_matches = df_matches.groupby('match_id')
-
-    # Ordem canónica das posições para garantir consistência nas features
-    ROLE_ORDER = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
-
-    for match_id in unique_match_ids:
-        group = grouped_matches.get_group(match_id)
-        first_row = group.iloc[0]
-        patch = ".".join(first_row['game_version'].split(".")[:2])
-        winner = 1 if int(first_row['winner_team']) == 100 else 0
-        
-        df_blue = group[group['team_id'] == 100]
-        df_red = group[group['team_id'] == 200]
-        
-        if len(df_blue) < 5 or len(df_red) < 5: continue
+    Partidas já gravadas em game_features, em ordem de match_id:
+    (lista de (match_id, patch, winner), matriz blue (n x 5), matriz red (n x 5)).
+    Os IDs vêm das colunas do grupo 'roles' (REAL no sqlite -> int).
+    """
+    id_columns = [f'{side}_{label}_id' for side in ('blue', 'red') for label in ROLE_LABELS]
+    rows = conn.execute(
+        f"SELECT match_id, patch_version, winner_team, {', '.join(id_columns)} "
+        f"FROM game_features ORDER BY match_id").fetchall()
+    matches = [(r[0], r[1], int(r[2])) for r in rows]
+    ids = np.array([r[3:] for r in rows], dtype=np.float64).reshape(len(rows), 10).astype(np.int64)
+    return matches, ids[:, :5], ids[:, 5:]
 
-        # Resolve posições
-        blue_roles_dict = resolve_team_roles(df_blue, df_champs)
-        red_roles_dict = resolve_team_roles(df_red, df_champs)
+def _recompute_group(conn, group, matches, blue, red, patches, catalog, winrate_model, chunk_size):
+    """Recalcula as colunas de UM grupo em todas as partidas gravadas (ver recompute_feature_groups)."""
+    print(f"♻️ Recalculando '{group.name}' ({group.stage}, entradas: {', '.join(group.inputs)}) "
+          f"em {len(matches)} partidas...")
+    set_sql = ", ".join(f"{col} = ?" for col in group.columns)
+    update_sql = f"UPDATE game_features SET {set_sql} WHERE match_id = ?"
 
-        # CRUCIAL: Criar listas baseadas na ROLE_ORDER para o RollingWinrate funcionar por posição
-        blue_list = [blue_roles_dict.get(role, 0) for role in ROLE_ORDER]
-        red_list = [red_roles_dict.get(role, 0) for role in ROLE_ORDER]
-        
-        # Ignora partidas onde a resolução de roles falhou (ex: IDs duplicados ou roles faltando)
-        if 0 in blue_list or 0 in red_list: continue
-            
-        # 1. Features Estáticas e Matchups
-        feat_mech = calculate_mechanics(blue_list, red_list, patch, df_features_ref)
-        feat_stats = calculate_stats(blue_list, red_list, patch, df_champs)
-        feat_dmg = calculate_damage_profile(blue_list, red_list, patch, df_champs)
-        feat_class = calculate_class_counts(blue_list, red_list, patch, df_champs)
-        feat_lane = calculate_lane_matchups(blue_roles_dict, red_roles_dict, patch, df_champs, df_features_ref)
-        
-        # 2. Features de Winrate (Rolling) - Agora inclui diferenciais por posição
-        feat_rolling = winrate_model.get_features(blue_list, red_list)
-        
-        # 3. Live Prediction (Timeline)
-        query_ts = "SELECT * FROM match_timeline_stats WHERE match_id = ?"
-        df_ts = pd.read_sql(query_ts, conn, params=(match_id,))
-        query_tp = """
-            SELECT tp.*, p.champion_id FROM match_timeline_participants tp
-            JOIN match_participants p ON tp.match_id = p.match_id AND tp.participant_id = p.participant_id
-            WHERE tp.match_id = ?
-        """
-        df_tp = pd.read_sql(query_tp, conn, params=(match_id,))
-        feat_live = calculate_live_features(match_id, blue_roles_dict, red_roles_dict, df_ts, df_tp)
-
-        # 4. Identity IDs
-        feat_ids = {}
-        for i, role in enumerate(ROLE_ORDER):
-            r_label = ['top', 'jungle', 'mid', 'adc', 'sup'][i]
-            feat_ids[f'blue_{r_label}_id'] = blue_list[i]
-            feat_ids[f'red_{r_label}_id'] = red_list[i]
-
-        # 5. Merge
-        all_features = {
-            **feat_mech, **feat_stats, **feat_dmg, **feat_class, 
-            **feat_lane, **feat_live, **feat_ids, **feat_rolling 
-        }
-        
-        if not table_created:
-            feature_columns_order = list(all_features.keys())
-            create_dynamic_table(conn, feature_columns_order)
-            table_created = True
-            
+    if group.stage == 'rolling':
+        winrate_model = RollingWinrate()
+        updates = []
+        for j, (match_id, patch, winner) in enumerate(matches):
+            blue_list, red_list = blue[j].tolist(), red[j].tolist()
+            feats = winrate_model.get_features(blue_list, red_list, patch)
+            winrate_model.update(blue_list, red_list, winner, patch)
+            updates.append(tuple(feats.get(col, 0) for col in group.columns) + (match_id,))
+        conn.executemany(update_sql, updates)
+        conn.commit()
+        return winrate_model
+
+    for start in range(0, len(matches), chunk_size):
+        end = min(start + chunk_size, len(matches))
+        if group.stage == 'static':
+            values = calculate_static_features(blue[start:end], red[start:end], patches[start:end],
+                                               catalog, groups=[group])
+            updates = [tuple(values[col][k] for col in group.columns) + (matches[start + k][0],)
+                       for k in range(end - start)]
+        else:
+            timelines = TimelineIndex(conn, id_range=(matches[start][0], matches[end - 1][0]))
+            updates = []
+            for j in range(start, end):
+                match_id = matches[j][0]
+                df_ts, df_tp = timelines.get(match_id)
+                feats = calculate_live_features(match_id, dict(zip(ROLE_ORDER, blue[j].tolist())),
+                                                dict(zip(ROLE_ORDER, red[j].tolist())), df_ts, df_tp)
+                updates.append(tuple(feats.get(col, 0) for col in group.columns) + (match_id,))
+        conn.executemany(update_sql, updates)
+        conn.commit()
+
+    return winrate_model
+
+def recompute_feature_groups(conn, groups, winrate_model, df_champs, df_features, chunk_size=MATCHES_PER_CHUNK,
+                             profiler=None):
+    """
+    Recalcula em game_features só as colunas dos grupos alterados (versão do registro
+    diferente da gravada), a partir dos IDs por posição já salvos:
+      static  -> kernels em lote, por chunk de partidas
+      live    -> timeline de cada chunk (TimelineIndex por intervalo de match_ids)
+      rolling -> RollingWinrate refeito do zero numa passada em ordem de match_id
+                 (o resultado é o de uma geração completa)
+    Colunas que saíram do registro são removidas e as novas, adicionadas.
+    Cada chunk é gravado na sua própria transação; interrompido, o recálculo é refeito
+    na próxima execução (as versões só são gravadas por quem chama, no fim).
+    Retorna o RollingWinrate a usar daqui em diante.
+    """
+    profiler = profiler or StageProfiler()
+    wanted = feature_columns()
+    existing = table_columns(conn, 'game_features')[3:]
+    for col in existing:
+        if col not in wanted:
+            conn.execute(f"ALTER TABLE game_features DROP COLUMN {col}")
+    for col in wanted:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE game_features ADD COLUMN {col} REAL")
+    conn.commit()
+
+    matches, blue, red = read_stored_matches(conn)
+    patches = [patch for _, patch, _ in matches]
+    catalog = ChampionCatalog(df_champs, df_features)
+
+    for group in groups:
+        with profiler.stage(f'recompute:{group.name}'):
+            winrate_model = _recompute_group(conn, group, matches, blue, red, patches, catalog,
+                                             winrate_model, chunk_size)
+    return winrate_model
+
+def build_rows(matches, static_features, dynamic_features, feature_columns_order):
+    """Tuplas de game_features de um chunk (match_id, patch, winner, features na ordem da tabela)."""
+    dynamic_columns = feature_columns_order[len(static_features):]
+    rows = []
+    for i, (match_id, patch, winner) in enumerate(matches):
         row_values = [match_id, patch, winner]
-        for key in feature_columns_order:
-            row_values.append(all_features.get(key, 0))
-            
-        rows_to_insert.append(tuple(row_values))
-        
-        # 6. Atualização do Aprendizado (Update DEPOIS de extrair as features)
-        winrate_model.update(blue_list, red_list, winner)
-
-        processed_count += 1
-        if processed_count % 500 == 0:
-            print(f"Processadas: {processed_count}")
-
-    if rows_to_insert:
-        print(f"\nSalvando {len(rows_to_insert)} partidas em game_features...")
-        cursor = conn.cursor()
-        total_cols = 3 + len(feature_columns_order)
-        placeholders = ",".join(["?"] * total_cols)
-        sql = f"INSERT OR REPLACE INTO game_features VALUES ({placeholders})"
-        cursor.executemany(sql, rows_to_insert)
+        row_values.extend(values[i] for values in static_features.values())
+        dynamic = dynamic_features[i]
+        for key in dynamic_columns:
+            row_values.append(dynamic.get(key, 0))
+        rows.append(tuple(row_values))
+    return rows
+
+def run_orchestrator(incremental=False, workers=FEATURE_WORKERS, chunk_size=MATCHES_PER_CHUNK, rebuild=False,
+                     export_store=False, profile_path=None, trace_memory=False):
+    """
+    Gera game_features.
+    incremental=False: recria a tabela do zero, reprocessando todas as partidas.
+    incremental=True: continua do estado salvo (winrates acumulados) e só anexa as
+    partidas que ainda não foram processadas (PROCESSED_TABLE), em ordem de match_id.
+    Se alguma delas for anterior à última já processada, os winrates acumulados das
+    linhas gravadas não a viram: no fim, o grupo rolling é refeito em ordem de
+    match_id sobre todas as linhas (sem isso, as partidas antigas veriam o futuro).
+    Sem estado salvo, cai para a execução completa.
+
+    Estágios: (1) roles, features estáticas e de timeline em paralelo, por chunks de
+    match_ids; (2) RollingWinrate numa passada sequencial, em ordem de match_id,
+    sobre os resultados já juntados.
+
+    Cada chunk é gravado na sua própria transação, junto com o checkpoint (estado dos
+    winrates + partidas processadas até o fim do chunk). Uma execução interrompida é retomada do
+    último chunk salvo na próxima chamada, a menos que rebuild=True.
+
+    Colunas e versões vêm do registro de features (features/registry.py). No modo
+    incremental, grupos cujo módulo mudou desde a última execução são recalculados
+    nas linhas já gravadas antes de seguir com as partidas novas (ver
+    recompute_feature_groups); se a resolução de posições mudou, a geração é completa.
+
+    export_store=True exporta game_features para o feature store colunar no fim
+    (só as partições dos patches tocados, no modo incremental). Sem ele, o store
+    fica com a versão anterior da tabela e o treino volta a ler do SQLite; a
+    execução completa apaga o store junto com a tabela.
+
+    Cada estágio (roles, consultas de timeline, live, cada kernel estático, winrates,
+    escrita no banco) tem tempo acumulado e chamadas medidos por um StageProfiler;
+    o resumo sai no fim e, com profile_path, vira um JSON. trace_memory=True mede
+    também o pico de memória de cada estágio (tracemalloc, bem mais lento).
+    """
+    start_time = time.time()
+    run_id = uuid.uuid4().hex
+    profiler = StageProfiler(trace_memory)
+    conn = sqlite3.connect(DB_PATH)
+    # Fechar sem commit descarta o chunk pela metade (ex: Ctrl+C); os anteriores já estão salvos
+    try:
+
+        state = None if rebuild else load_state(conn)
+        # Versão de game_features antes desta execução: o export parcial só vale se o store é dela
+        base_version = read_data_version(conn)
+        if state and state[1] == 'running':
+            print("⏯️ Execução anterior interrompida. Retomando do último chunk salvo...")
+            incremental = True
+        elif incremental and state is None:
+            print("⚠️ Sem estado salvo de uma execução anterior. Rodando a geração completa...")
+            incremental = False
+
+        # Grupos do registro cujo código/declaração mudou desde que as linhas foram geradas
+        stale_groups = changed_groups(state[2]) if incremental else []
+        if any(group.stage == 'core' for group in stale_groups):
+            print("⚠️ A resolução de posições mudou (grupo 'roles'). Rodando a geração completa...")
+            incremental, stale_groups = False, []
+
+        if incremental:
+            winrate_model, run_status, _ = state
+        else:
+            winrate_model = RollingWinrate()
+            reset_outputs(conn)
+
+        try:
+            df_champs, df_features_ref = load_reference_data(conn)
+        except Exception as e:
+            print(f"Erro ao carregar referências: {e}")
+            return
+
+        if stale_groups:
+            winrate_model = recompute_feature_groups(conn, stale_groups, winrate_model, df_champs,
+                                                     df_features_ref, chunk_size, profiler)
+            save_state(conn, winrate_model, run_status, run_id)
+            conn.commit()
+
+        print("Buscando partidas ordenadas por tempo...")
+        where, params = new_matches_filter('m.match_id', only_new=incremental)
+        match_ids = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT m.match_id FROM matches m JOIN match_participants p ON m.match_id = p.match_id "
+            f"{where} ORDER BY m.match_id ASC", params)]
+        # Partidas novas anteriores à última processada: o grupo rolling é refeito no fim
+        late_groups = []
+        if incremental:
+            print(f"🔁 Modo incremental: {len(match_ids)} partidas novas")
+            last_processed = conn.execute(f"SELECT MAX(match_id) FROM {PROCESSED_TABLE}").fetchone()[0]
+            late = [m for m in match_ids if last_processed is not None and m < last_processed]
+            if late:
+                print(f"⚠️ {len(late)} partidas novas são anteriores à última já processada ({last_processed}), "
+                      f"ex: {late[0]}. Anexadas sem mais nada, os winrates acumulados vazariam partidas "
+                      f"futuras; o grupo rolling será refeito em ordem de match_id no fim.")
+                late_groups = feature_groups('rolling')
+        ensure_timeline_indexes(conn)
+
+        table_ready = incremental
+        feature_columns_order = feature_columns()
+        columns_checked = not incremental
+        saved_count = 0
+        patches_touched = set()
+
+        # 1. Estágio paralelo: roles + estáticas + timeline por chunk
+        ranges = chunk_ranges(match_ids, chunk_size)
+        print(f"Extraindo features de {len(match_ids)} partidas em {len(ranges)} chunks ({workers} workers)...")
+        chunks = extract_all_chunks(DB_PATH, ranges, incremental, df_champs, df_features_ref, workers, trace_memory)
+        loop_start = time.time()
+        for i, chunk in enumerate(chunks):
+            matches_kept, dynamic_features = chunk['matches'], chunk['dynamic']
+            profiler.merge(chunk['profile'])
+
+            # 2. Estágio sequencial: Winrate (Rolling) em ordem de match_id
+            with profiler.stage('winrates'):
+                for j, (match_id, patch, winner) in enumerate(matches_kept):
+                    # Features de Winrate - Agora inclui diferenciais por posição
+                    dynamic_features[j].update(winrate_model.get_features(chunk['blue'][j], chunk['red'][j], patch))
+                    # Atualização do Aprendizado (Update DEPOIS de extrair as features)
+                    winrate_model.update(chunk['blue'][j], chunk['red'][j], winner, patch)
+
+            if matches_kept:
+                # 3. Merge (ordem de colunas do registro: estáticas, live, ids, rolling)
+                if not table_ready:
+                    create_dynamic_table(conn, feature_columns_order)
+                    table_ready = True
+                elif not columns_checked:
+                    # Colunas recalculadas entram no fim da tabela: confere o conjunto, não a ordem
+                    if set(table_columns(conn, 'game_features')[3:]) != set(feature_columns_order):
+                        print("❌ As colunas de game_features mudaram desde a última execução. Rode com --rebuild.")
+                        return
+                    columns_checked = True
+
+                with profiler.stage('db_write'):
+                    rows_to_insert = build_rows(matches_kept, chunk['static'], dynamic_features,
+                                                feature_columns_order)
+                    columns_sql = ", ".join(['match_id', 'patch_version', 'winner_team'] + feature_columns_order)
+                    placeholders = ",".join(["?"] * (3 + len(feature_columns_order)))
+                    conn.executemany(f"INSERT OR REPLACE INTO game_features ({columns_sql}) VALUES ({placeholders})",
+                                     rows_to_insert)
+                saved_count += len(rows_to_insert)
+                patches_touched.update(patch for _, patch, _ in matches_kept)
+
+            # 4. Checkpoint: linhas do chunk + estado + partidas processadas (inclusive as
+            # descartadas) no mesmo commit
+            with profiler.stage('db_write'):
+                save_state(conn, winrate_model, 'running', run_id, match_ids[i * chunk_size:(i + 1) * chunk_size],
+                           late_groups)
+                conn.commit()
+            elapsed = time.time() - loop_start
+            rate = saved_count / elapsed if elapsed > 0 else 0.0
+            print(f"Chunks: {i + 1}/{len(ranges)} | Partidas salvas: {saved_count} | {rate:.1f} partidas/s")
+
+        if late_groups and table_ready:
+            winrate_model = recompute_feature_groups(conn, late_groups, winrate_model, df_champs,
+                                                     df_features_ref, chunk_size, profiler)
+        save_state(conn, winrate_model, 'finished', run_id)
         conn.commit()
-    
-    conn.close()
-    print(f"Concluído em {time.time() - start_time:.2f}s")
+        print(f"\n{saved_count} partidas salvas em game_features.")
+
+        if export_store and table_ready:
+            # Grupos recalculados tocam todas as partições
+            partial = incremental and not stale_groups and not late_groups
+            with profiler.stage('feature_store_export'):
+                export_feature_store(conn, patches=sorted(patches_touched) if partial else None,
+                                     base_version=base_version)
+
+        total_seconds = time.time() - start_time
+        report = profiler.report(total_seconds, saved_count, workers)
+        profiler.print_summary(report)
+        if profile_path:
+            profiler.export(report, profile_path)
+        print(f"Concluído em {total_seconds:.2f}s")
+    finally:
+        profiler.stop()
+        conn.close()
 
 if __name__ == "__main__":
-    run_orchestrator()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gera a tabela game_features")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Processa só as partidas novas, continuando do estado salvo da última execução")
+    parser.add_argument("--workers", type=int, default=FEATURE_WORKERS, help="Processos de extração (1 = sem pool)")
+    parser.add_argument("--chunk-size", type=int, default=MATCHES_PER_CHUNK,
+                        help="Partidas por chunk (cada chunk é gravado e vira checkpoint numa transação)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recria game_features do zero, mesmo com uma execução interrompida para retomar")
+    parser.add_argument("--export-store", action="store_true",
+                        help="Exporta game_features para o feature store colunar (Parquet ou .npy por patch)")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_PATH, default=None, metavar="ARQUIVO",
+                        help=f"Salva o perfil por estágio em JSON (padrão: {PROFILE_PATH})")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Mede o pico de memória de cada estágio com tracemalloc (mais lento)")
+    args = parser.parse_args()
+    run_orchestrator(incremental=args.incremental, workers=args.workers,
+                     chunk_size=args.chunk_size, rebuild=args.rebuild, export_store=args.export_store,
+                     profile_path=args.profile, trace_memory=args.trace_memory)
\ No newline at end of file
@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# pyarrow é opcional: sem ele o store cai para .npy (memmap) + manifesto JSON
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FEATURE_STORE_DIR = os.path.join(BASE_DIR, 'data', 'feature_store')
+
+MANIFEST_FILE = 'manifest.json'
+META_COLUMNS = ['match_id', 'patch_version', 'winner_team']
+FEATURE_DTYPE = 'float32'
+
+# Versão de game_features gravada pelo orquestrador na sua tabela de estado a cada
+# execução. O manifesto guarda a versão exportada: se não bate, o store está velho
+STATE_TABLE = 'feature_state'
+DATA_VERSION_KEY = 'data_version'
+
+# Layout do store (uma partição por patch):
+#
+#     feature_store/
+#         manifest.json              formato, colunas de features e partições
+#         patch=15.1/
+#             features.parquet       (pyarrow) metadados + features
+#         patch=15.2/
+#             features.npy           (sem pyarrow) matriz float32 em ordem Fortran
+#             match_id.npy           metadados da partição
+#             winner_team.npy
+#
+# Em ordem Fortran cada coluna é um bloco contíguo no arquivo, então o loader
+# abre a matriz com mmap e só as páginas das colunas pedidas são lidas do disco.
+
+def default_format():
+    return 'parquet' if pa is not None else 'npy'
+
+def store_exists(store_dir=FEATURE_STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, MANIFEST_FILE))
+
+def remove_feature_store(store_dir=FEATURE_STORE_DIR):
+    shutil.rmtree(store_dir, ignore_errors=True)
+
+def read_data_version(conn):
+    """Versão atual de game_features (None se o orquestrador nunca gravou uma)."""
+    try:
+        row = conn.execute(f"SELECT value FROM {STATE_TABLE} WHERE key = ?", (DATA_VERSION_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+def store_matches_db(db_path, store_dir=FEATURE_STORE_DIR):
+    """
+    True se o store foi exportado da versão de game_features que está no banco.
+    Uma execução sem --export-store muda a tabela e deixa o store velho. Sem o
+    banco, o store é a única fonte e conta como atual.
+    """
+    if not store_exists(store_dir):
+        return False
+    if not os.path.exists(db_path):
+        return True
+    conn = sqlite3.connect(db_path)
+    try:
+        version = read_data_version(conn)
+    finally:
+        conn.close()
+    return version is not None and read_manifest(store_dir).get(DATA_VERSION_KEY) == version
+
+def read_manifest(store_dir=FEATURE_STORE_DIR):
+    with open(os.path.join(store_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+def _write_manifest(store_dir, manifest):
+    tmp_path = os.path.join(store_dir, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST_FILE))
+
+def _partition_dir(patch):
+    return f"patch={patch}"
+
+# --- ESCRITA ---
+
+def _write_partition(path, fmt, match_ids, patch, winners, features, columns):
+    os.makedirs(path)
+    if fmt == 'parquet':
+        arrays = {
+            'match_id': pa.array(match_ids, type=pa.string()),
+            'patch_version': pa.array([patch] * len(match_ids), type=pa.string()),
+            'winner_team': pa.array(winners, type=pa.int8()),
+        }
+        for i, col in enumerate(columns):
+            arrays[col] = pa.array(features[:, i])
+        pq.write_table(pa.table(arrays), os.path.join(path, 'features.parquet'))
+    else:
+        np.save(os.path.join(path, 'features.npy'), np.asfortranarray(features))
+        np.save(os.path.join(path, 'match_id.npy'), np.asarray(match_ids, dtype=str))
+        np.save(os.path.join(path, 'winner_team.npy'), np.asarray(winners, dtype=np.int8))
+
+def export_feature_store(conn, store_dir=FEATURE_STORE_DIR, patches=None, fmt=None, base_version=None):
+    """
+    Exporta game_features para o store colunar, uma partição por patch.
+    patches=None reescreve o store inteiro; uma lista reescreve só essas partições
+    (ex: patches tocados por uma execução incremental), desde que o store tenha sido
+    exportado de base_version (a versão de game_features antes dessa execução). Se as
+    colunas ou a versão não batem, o store inteiro é reescrito. Cada partição é montada numa pasta temporária e
+    trocada no fim, então um leitor nunca vê uma partição pela metade.
+    """
+    fmt = fmt or default_format()
+    if fmt == 'parquet' and pa is None:
+        raise RuntimeError("Formato 'parquet' exige o pacote 'pyarrow'.")
+
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(game_features)")][len(META_COLUMNS):]
+    manifest = read_manifest(store_dir) if store_exists(store_dir) else None
+    if (manifest is None or manifest['columns'] != columns or manifest['format'] != fmt
+            or manifest.get(DATA_VERSION_KEY) != base_version):
+        patches = None
+    if patches is None:
+        remove_feature_store(store_dir)
+        manifest = None
+        patches = [row[0] for row in conn.execute("SELECT DISTINCT patch_version FROM game_features")]
+    os.makedirs(store_dir, exist_ok=True)
+
+    if manifest is None:
+        manifest = {'format': fmt, 'columns': columns, 'dtype': FEATURE_DTYPE, 'partitions': {}}
+
+    for patch in sorted(set(patches)):
+        rows = conn.execute(
+            "SELECT * FROM game_features WHERE patch_version = ? ORDER BY match_id", (patch,)).fetchall()
+        final_path = os.path.join(store_dir, _partition_dir(patch))
+        tmp_path = final_path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if rows:
+            match_ids = [r[0] for r in rows]
+            winners = [r[2] for r in rows]
+            # NULL (ex: feature ausente numa partida antiga) vira NaN
+            features = np.array([[np.nan if v is None else v for v in r[3:]] for r in rows],
+                                dtype=FEATURE_DTYPE).reshape(len(rows), len(columns))
+            _write_partition(tmp_path, fmt, match_ids, patch, winners, features, columns)
+        shutil.rmtree(final_path, ignore_errors=True)
+        if rows:
+            os.rename(tmp_path, final_path)
+            manifest['partitions'][patch] = {'path': _partition_dir(patch), 'rows': len(rows)}
+        else:
+            manifest['partitions'].pop(patch, None)
+
+    manifest[DATA_VERSION_KEY] = read_data_version(conn)
+    _write_manifest(store_dir, manifest)
+    total = sum(p['rows'] for p in manifest['partitions'].values())
+    print(f"📦 Feature store ({fmt}) atualizado em {store_dir}: {total} partidas, {len(manifest['partitions'])} patches")
+    return manifest
+
+# --- LEITURA ---
+
+def select_columns(manifest, columns=None, exclude_prefixes=()):
+    """Colunas de features pedidas (na ordem do store), sem as que começam com exclude_prefixes."""
+    wanted = manifest['columns'] if columns is None else [c for c in manifest['columns'] if c in set(columns)]
+    return [c for c in wanted if not c.startswith(tuple(exclude_prefixes))]
+
+def load_feature_store(store_dir=FEATURE_STORE_DIR, columns=None, exclude_prefixes=(), patches=None):
+    """
+    DataFrame com match_id, patch_version, winner_team + as colunas de features pedidas.
+    Só as colunas selecionadas são lidas (colunas do Parquet / páginas do memmap .npy),
+    sem passar cada célula por objetos Python como no pd.read_sql.
+    Linhas em ordem de match_id, como o SELECT * de game_features.
+    """
+    manifest = read_manifest(store_dir)
+    selected = select_columns(manifest, columns, exclude_prefixes)
+    col_index = [manifest['columns'].index(c) for c in selected]
+
+    parts = []
+    for patch, part in sorted(manifest['partitions'].items()):
+        if patches is not None and patch not in patches:
+            continue
+        path = os.path.join(store_dir, part['path'])
+        if manifest['format'] == 'parquet':
+            table = pq.read_table(os.path.join(path, 'features.parquet'), columns=META_COLUMNS + selected)
+            parts.append(table.to_pandas())
+        else:
+            matrix = np.load(os.path.join(path, 'features.npy'), mmap_mode='r')
+            data = {
+                'match_id': np.load(os.path.join(path, 'match_id.npy')).astype(object),
+                'patch_version': np.full(part['rows'], patch, dtype=object),
+                'winner_team': np.load(os.path.join(path, 'winner_team.npy')),
+            }
+            # Em ordem Fortran, matrix[:, i] é uma fatia contígua do arquivo
+            for col, i in zip(selected, col_index):
+                data[col] = matrix[:, i]
+            parts.append(pd.DataFrame(data))
+
+    if not parts:
+        return pd.DataFrame(columns=META_COLUMNS + selected)
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    return df.sort_values('match_id', kind='stable').reset_index(drop=True)
@@ -0,0 +1,28 @@
+import numpy as np
+
+# Helpers dos kernels em lote (*_batch): uma linha por partida, uma coluna por jogador.
+
+def team_matrix(team_ids):
+    """Lista de IDs (uma partida) ou matriz (n_partidas x jogadores) -> matriz int64 2D."""
+    return np.atleast_2d(np.asarray(team_ids, dtype=np.int64))
+
+def first_occurrence(keys):
+    """Máscara (n x k) que marca só a primeira ocorrência de cada chave na linha (semântica do .isin)."""
+    order = np.argsort(keys, axis=1, kind='stable')
+    sorted_keys = np.take_along_axis(keys, order, axis=1)
+    first_sorted = np.ones(keys.shape, dtype=bool)
+    first_sorted[:, 1:] = sorted_keys[:, 1:] != sorted_keys[:, :-1]
+    mask = np.empty(keys.shape, dtype=bool)
+    np.put_along_axis(mask, order, first_sorted, axis=1)
+    return mask
+
+def patch_groups(patches):
+    """Agrupa as linhas por patch: [(patch, índices)]. Cada kernel resolve o fallback uma vez por grupo."""
+    patches = np.asarray(patches, dtype=object)
+    unique, inverse = np.unique(patches, return_inverse=True)
+    groups = np.split(np.argsort(inverse, kind='stable'), np.cumsum(np.bincount(inverse))[:-1])
+    return list(zip(unique, groups))
+
+def scalar_row(results, row=0):
+    """Resultado de um kernel em lote -> dict de escalares Python de uma partida (int ou float)."""
+    return {k: v[row].item() for k, v in results.items()}
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from src.process_data.features.batching import first_occurrence
+    from src.process_data.features.damage_profile import champion_damage_score
+except ImportError:
+    from features.batching import first_occurrence
+    from features.damage_profile import champion_damage_score
+
+# Colunas numéricas de 'champions' usadas pelas features
+STAT_COLUMNS = [
+    'hp', 'hp_per_level', 'mp', 'mp_per_level',
+    'armor', 'armor_per_level', 'spellblock', 'spellblock_per_level',
+    'attackrange', 'hpregen', 'hpregen_per_level',
+    'attackdamage', 'attackdamage_per_level', 'attackspeed', 'attackspeed_per_level',
+    'movespeed'
+]
+
+# Bits da máscara de classes (busca por substring nas tags em minúsculo, como em classes.py)
+CLASS_TAGS = ['tank', 'fighter', 'mage', 'marksman', 'assassin', 'support']
+
+def _first_rows(df):
+    """Índices (posicionais) da primeira linha de cada champion_key, na ordem do DataFrame."""
+    keys = df['champion_key'].to_numpy(dtype=np.int64)
+    _, first = np.unique(keys, return_index=True)
+    return np.sort(first), keys
+
+class ChampionTables:
+    """Arrays densos de 'champions' de UM patch, indexados pela champion_key."""
+    def __init__(self, df_patch, size):
+        rows, keys = _first_rows(df_patch)
+        keys = keys[rows]
+
+        self.present = np.zeros(size, dtype=bool)
+        self.present[keys] = True
+        # Posição da linha no patch: médias somam na mesma ordem do DataFrame original
+        self.rank = np.full(size, len(df_patch), dtype=np.int64)
+        self.rank[keys] = np.arange(len(keys))
+
+        self.stats = {}
+        for col in STAT_COLUMNS:
+            arr = np.zeros(size, dtype=np.float64)
+            if col in df_patch.columns:
+                arr[keys] = df_patch[col].to_numpy(dtype=np.float64)[rows]
+            self.stats[col] = arr
+
+        names = df_patch['name'].to_numpy(dtype=object)[rows] if 'name' in df_patch.columns else [None] * len(keys)
+        tags = df_patch['tags'].to_numpy(dtype=object)[rows] if 'tags' in df_patch.columns else [None] * len(keys)
+
+        self.class_mask = np.zeros(size, dtype=np.int64)
+        self.damage_score = np.zeros(size, dtype=np.int64)
+        for key, name, tags_str in zip(keys, names, tags):
+            t = str(tags_str).lower()
+            self.class_mask[key] = sum(1 << bit for bit, tag in enumerate(CLASS_TAGS) if tag in t)
+            self.damage_score[key] = champion_damage_score(name, tags_str)
+
+    def team_mask(self, keys):
+        """Matriz de chaves -> máscara dos campeões que entram na soma (presentes no patch, sem repetição)."""
+        return self.present[keys] & first_occurrence(keys)
+
+    def team_rows(self, keys):
+        """Chaves presentes no patch, na ordem das linhas do DataFrame (a ordem de um .isin())."""
+        keys = np.unique(keys[self.present[keys]])
+        return keys[np.argsort(self.rank[keys], kind='stable')]
+
+class FeatureTables:
+    """Flags de 'champion_features' (has_*, is_*) de UM patch, indexadas pela champion_key."""
+    def __init__(self, df_patch, size):
+        rows, keys = _first_rows(df_patch)
+        keys = keys[rows]
+
+        self.present = np.zeros(size, dtype=bool)
+        self.present[keys] = True
+        self.flags = {}
+        for col in df_patch.columns:
+            if col.startswith('has_') or col.startswith('is_'):
+                arr = np.zeros(size, dtype=np.int64)
+                arr[keys] = df_patch[col].to_numpy(dtype=np.int64)[rows]
+                self.flags[col] = arr
+        self.zeros = np.zeros(size, dtype=np.int64)
+
+    def flag(self, name):
+        """Array da flag (zeros se a coluna não existir)."""
+        return self.flags.get(name, self.zeros)
+
+class ChampionCatalog:
+    """
+    Tabelas de campeões pré-computadas uma vez por execução.
+
+    Para cada patch guarda arrays densos indexados pela champion_key (stats, máscara
+    de classes, score de dano e flags de mecânicas), então os módulos de features
+    fazem lookups O(1) em vez de filtrar os DataFrames a cada partida.
+    O fallback de patch é o mesmo dos módulos: patch exato, senão o maior
+    patch_version (comparação de string), resolvido uma vez e guardado em cache.
+    """
+    def __init__(self, df_champs, df_features=None):
+        if df_features is None:
+            df_features = pd.DataFrame(columns=['champion_key', 'patch_version'])
+
+        max_key = 0
+        for df in (df_champs, df_features):
+            if not df.empty:
+                max_key = max(max_key, int(df['champion_key'].max()))
+        self.size = max_key + 1
+
+        self.champion_tables = {
+            patch: ChampionTables(group, self.size)
+            for patch, group in df_champs.groupby('patch_version', sort=False)
+        }
+        self.feature_tables = {
+            patch: FeatureTables(group, self.size)
+            for patch, group in df_features.groupby('patch_version', sort=False)
+        }
+        self.latest_champions_patch = df_champs['patch_version'].max() if not df_champs.empty else None
+        self.latest_features_patch = df_features['patch_version'].max() if not df_features.empty else None
+        self._resolved = {}
+
+    def _resolve(self, kind, patch):
+        cache_key = (kind, patch)
+        if cache_key not in self._resolved:
+            tables, latest = ((self.champion_tables, self.latest_champions_patch) if kind == 'champions'
+                              else (self.feature_tables, self.latest_features_patch))
+            self._resolved[cache_key] = patch if patch in tables else latest
+        return self._resolved[cache_key]
+
+    def champions(self, patch):
+        """ChampionTables do patch (ou do mais recente). None se não houver campeões."""
+        return self.champion_tables.get(self._resolve('champions', patch))
+
+    def mechanics(self, patch):
+        """FeatureTables do patch (ou do mais recente em champion_features)."""
+        return self.feature_tables.get(self._resolve('features', patch))
+
+    def lane_mechanics(self, patch):
+        """
+        Flags para lane_matchups: seguem o patch resolvido em 'champions'
+        (pode ser None se champion_features não tiver esse patch).
+        """
+        return self.feature_tables.get(self._resolve('champions', patch))
+
+    def keys(self, champion_ids):
+        """IDs -> índices válidos nos arrays (IDs desconhecidos viram 0, que nunca é campeão)."""
+        keys = np.asarray(champion_ids, dtype=np.int64)
+        return np.where((keys > 0) & (keys < self.size), keys, 0)
@@ -1,6 +1,19 @@
-import pandas as pd
+import numpy as np
 
-def calculate_class_counts(blue_ids, red_ids, patch, df_champs):
+try:
+    from src.process_data.features.batching import team_matrix, patch_groups, scalar_row
+    from src.process_data.features.champion_catalog import CLASS_TAGS
+except ImportError:
+    from features.batching import team_matrix, patch_groups, scalar_row
+    from features.champion_catalog import CLASS_TAGS
+
+# Declaração para o registro de features (features/registry.py): colunas, tipos e entradas
+FEATURE_SPEC = {
+    'columns': {f'{side}_count_{tag}': 'int' for tag in CLASS_TAGS for side in ('blue', 'red')},
+    'inputs': ['champions'],
+}
+
+def calculate_class_counts(blue_ids, red_ids, patch, catalog):
     """
     Conta a quantidade de campeões de cada classe principal (Tank, Fighter, Mage, Marksman, Assassin, Support).
     
@@ -8,69 +21,33 @@ def calculate_class_counts(blue_ids, red_ids, patch, df_champs):
         blue_ids (list): IDs do time Azul.
         red_ids (list): IDs do time Vermelho.
         patch (str): Versão do patch.
-        df_champs (pd.DataFrame): Tabela de campeões.
+        catalog (ChampionCatalog): Máscara de classes por patch (uma tag = um bit).
         
     Returns:
         dict: Contagem de cada classe para ambos os times.
     """
-    
-    # 1. Filtro de Patch
-    df_patch = df_champs[df_champs['patch_version'] == patch]
-    
-    if df_patch.empty:
-        if not df_champs.empty:
-            latest = df_champs['patch_version'].max()
-            df_patch = df_champs[df_champs['patch_version'] == latest]
-        else:
-            return _empty_result()
+    return scalar_row(calculate_class_counts_batch(blue_ids, red_ids, [patch], catalog))
 
-    # 2. Função de Contagem
-    def get_team_counts(team_ids):
-        team_df = df_patch[df_patch['champion_key'].isin(team_ids)]
-        
-        counts = {
-            'tank': 0,
-            'fighter': 0,
-            'mage': 0,
-            'marksman': 0,
-            'assassin': 0,
-            'support': 0
-        }
-        
-        for tags_str in team_df['tags']:
-            # Normaliza para string e minúsculo para busca segura
-            t = str(tags_str).lower()
-            
-            # Um campeão pode ter duas tags (Ex: Mage, Support). 
-            # Aqui contaremos ambas, pois ele exerce as duas funções.
-            if 'tank' in t: counts['tank'] += 1
-            if 'fighter' in t: counts['fighter'] += 1
-            if 'mage' in t: counts['mage'] += 1
-            if 'marksman' in t: counts['marksman'] += 1
-            if 'assassin' in t: counts['assassin'] += 1
-            if 'support' in t: counts['support'] += 1
-            
-        return counts
+def calculate_class_counts_batch(blue_ids, red_ids, patches, catalog):
+    """
+    Versão em lote: blue_ids/red_ids são matrizes (n_partidas x 5) e patches tem n itens.
+    Retorna { feature: array(n) } na mesma ordem de colunas de calculate_class_counts.
+    """
+    blue, red = team_matrix(blue_ids), team_matrix(red_ids)
+    result = {name: np.zeros(len(blue), dtype=np.int64) for name in FEATURE_SPEC['columns']}
 
-    # 3. Execução
-    b_counts = get_team_counts(blue_ids)
-    r_counts = get_team_counts(red_ids)
-    
-    # Achatando o resultado para o retorno
-    return {
-        'blue_count_tank': b_counts['tank'], 'red_count_tank': r_counts['tank'],
-        'blue_count_fighter': b_counts['fighter'], 'red_count_fighter': r_counts['fighter'],
-        'blue_count_mage': b_counts['mage'], 'red_count_mage': r_counts['mage'],
-        'blue_count_marksman': b_counts['marksman'], 'red_count_marksman': r_counts['marksman'],
-        'blue_count_assassin': b_counts['assassin'], 'red_count_assassin': r_counts['assassin'],
-        'blue_count_support': b_counts['support'], 'red_count_support': r_counts['support']
-    }
+    for patch, rows in patch_groups(patches):
+        # 1. Patch (exato ou o mais recente, resolvido pelo catálogo)
+        tables = catalog.champions(patch)
+        if tables is None:
+            continue
+
+        # 2. Contagem: um campeão pode ter duas tags (Ex: Mage, Support). 
+        # Aqui contaremos ambas, pois ele exerce as duas funções.
+        for side, team in (('blue', blue), ('red', red)):
+            keys = catalog.keys(team[rows])
+            masks = tables.class_mask[keys] * tables.team_mask(keys)
+            for bit, tag in enumerate(CLASS_TAGS):
+                result[f'{side}_count_{tag}'][rows] = ((masks >> bit) & 1).sum(axis=1)
 
-def _empty_result():
-    # Retorna 0 para tudo em caso de erro
-    keys = ['tank', 'fighter', 'mage', 'marksman', 'assassin', 'support']
-    result = {}
-    for k in keys:
-        result[f'blue_count_{k}'] = 0
-        result[f'red_count_{k}'] = 0
-    return result
\ No newline at end of file
+    return result
@@ -1,5 +1,11 @@
+import numpy as np
 import pandas as pd
 
+try:
+    from src.process_data.features.batching import team_matrix, patch_groups, scalar_row
+except ImportError:
+    from features.batching import team_matrix, patch_groups, scalar_row
+
 # Exceções manuais para campeões cuja Tag não reflete o tipo de dano principal.
 # 1 = Predominantemente Mágico (AP)
 # 0 = Híbrido / Dano Misto
@@ -40,73 +46,71 @@ SPECIAL_CASES = {
     'Shaco': 0         # Caixinhas (AP) ou Crítico (AD) -> Híbrido
 }
 
-def calculate_damage_profile(blue_ids, red_ids, patch, df_champs):
+# Declaração para o registro de features (features/registry.py): colunas, tipos e entradas
+FEATURE_SPEC = {
+    'columns': {'blue_damage_score': 'int', 'red_damage_score': 'int'},
+    'inputs': ['champions'],
+}
+
+def champion_damage_score(name, tags_str):
     """
-    Calcula o perfil de dano do time baseado em TAGS e EXCEÇÕES (Dados Estáticos).
-    
-    Lógica:
+    Score de dano de UM campeão:
         1. Verifica lista de exceções (Hardcoded).
         2. Se não for exceção, usa Tags:
            - Mage = +1 (AP)
            - Marksman/Fighter/Assassin = -1 (AD)
            - Outros = 0
+    """
+    # --- VERIFICAÇÃO DE EXCEÇÃO (Hardcoded) ---
+    if name in SPECIAL_CASES:
+        return SPECIAL_CASES[name]
+    
+    # --- LÓGICA PADRÃO DE TAGS ---
+    t = str(tags_str) if pd.notna(tags_str) else ""
+    
+    # Se tem Mage na tag, quase sempre causa dano mágico predominante
+    # (Ex: Ahri é Mage/Assassin -> AP | Sylas é Mage/Fighter -> AP)
+    if 'Mage' in t:
+        return 1
+        
+    # Se não é Mage, mas é de classe física
+    elif 'Marksman' in t or 'Fighter' in t or 'Assassin' in t:
+        return -1
+    
+    # Tanks e Supports puros ficam como 0 (Neutros)
+    return 0
+
+def calculate_damage_profile(blue_ids, red_ids, patch, catalog):
+    """
+    Calcula o perfil de dano do time baseado em TAGS e EXCEÇÕES (Dados Estáticos).
+    O score de cada campeão (champion_damage_score) já vem pré-computado no catálogo.
+    Uma partida = lote de tamanho 1 em calculate_damage_profile_batch.
     
     Retorno:
         Valor negativo: Tendência AD.
         Valor zero: Misto/Neutro.
         Valor positivo: Tendência AP.
     """
-    
-    # 1. Filtro de Patch
-    df_patch = df_champs[df_champs['patch_version'] == patch]
-    
-    if df_patch.empty:
-        if not df_champs.empty:
-            latest = df_champs['patch_version'].max()
-            df_patch = df_champs[df_champs['patch_version'] == latest]
-        else:
-            return {'blue_damage_score': 0, 'red_damage_score': 0}
+    return scalar_row(calculate_damage_profile_batch(blue_ids, red_ids, [patch], catalog))
 
-    # 2. Função de Cálculo de Score
-    def get_team_damage_score(team_ids):
-        # Filtra os dados dos 5 campeões
-        team_df = df_patch[df_patch['champion_key'].isin(team_ids)]
-        
-        score = 0
-        
-        if team_df.empty:
-            return 0
+def calculate_damage_profile_batch(blue_ids, red_ids, patches, catalog):
+    """
+    Versão em lote: blue_ids/red_ids são matrizes (n_partidas x 5) e patches tem n itens.
+    Retorna { 'blue_damage_score': array(n), 'red_damage_score': array(n) }.
+    """
+    blue, red = team_matrix(blue_ids), team_matrix(red_ids)
+    result = {'blue_damage_score': np.zeros(len(blue), dtype=np.int64),
+              'red_damage_score': np.zeros(len(red), dtype=np.int64)}
 
-        for _, champ_row in team_df.iterrows():
-            name = champ_row['name']
-            tags_str = champ_row['tags']
-            
-            # --- VERIFICAÇÃO DE EXCEÇÃO (Hardcoded) ---
-            if name in SPECIAL_CASES:
-                score += SPECIAL_CASES[name]
-                continue # Pula a lógica de tags se já achou exceção
-            
-            # --- LÓGICA PADRÃO DE TAGS ---
-            t = str(tags_str) if pd.notna(tags_str) else ""
-            
-            # Se tem Mage na tag, quase sempre causa dano mágico predominante
-            # (Ex: Ahri é Mage/Assassin -> AP | Sylas é Mage/Fighter -> AP)
-            if 'Mage' in t:
-                score += 1
-                
-            # Se não é Mage, mas é de classe física
-            elif 'Marksman' in t or 'Fighter' in t or 'Assassin' in t:
-                score -= 1
-            
-            # Tanks e Supports puros ficam como 0 (Neutros)
-            
-        return score
+    for patch, rows in patch_groups(patches):
+        # 1. Patch (exato ou o mais recente, resolvido pelo catálogo)
+        tables = catalog.champions(patch)
+        if tables is None:
+            continue
 
-    # 3. Execução
-    b_score = get_team_damage_score(blue_ids)
-    r_score = get_team_damage_score(red_ids)
-    
-    return {
-        'blue_damage_score': b_score,
-        'red_damage_score': r_score
-    }
\ No newline at end of file
+        # 2. Soma dos scores dos campeões do time presentes no patch
+        for side, team in (('blue', blue), ('red', red)):
+            keys = catalog.keys(team[rows])
+            result[f'{side}_damage_score'][rows] = (tables.damage_score[keys] * tables.team_mask(keys)).sum(axis=1)
+
+    return result
@@ -121,3 +121,9 @@ def _empty_result():
     for m in SNAPSHOTS:
         _fill_zero_snapshot(res, m)
     return res
+
+# Declaração para o registro de features (features/registry.py): colunas, tipos e entradas
+FEATURE_SPEC = {
+    'columns': {k: type(v).__name__ for k, v in _empty_result().items()},
+    'inputs': ['match_timeline_stats', 'match_timeline_participants'],
+}
@@ -1,68 +1,68 @@
-import pandas as pd
+import numpy as np
 
-def calculate_mechanics(blue_ids, red_ids, patch, df_features):
+try:
+    from src.process_data.features.batching import team_matrix, first_occurrence, patch_groups, scalar_row
+except ImportError:
+    from features.batching import team_matrix, first_occurrence, patch_groups, scalar_row
+
+# Feature -> coluna de champion_features
+MECHANIC_COLUMNS = {
+    # Controle
+    'hard_cc': 'has_hard_cc',
+    'soft_cc': 'has_soft_cc',         # Slows, Silences
+    'hook': 'has_hook',               # Blitz, Thresh, Pyke
+
+    # Sobrevivência
+    'heal': 'has_heal',
+    'shield': 'has_shield',
+    'immortality': 'has_immortality', # Zilean, Kayle
+
+    # Mobilidade
+    'dash': 'has_dash',
+    'blink': 'has_blink',
+
+    # Ofensiva Especializada
+    'true_dmg': 'has_true_damage',    # Counter de Tank
+    'execute': 'has_execute',         # Pyke, Urgot
+    'stealth': 'has_stealth'          # Evelyn, Twitch
+}
+
+# Declaração para o registro de features (features/registry.py): colunas, tipos e entradas
+FEATURE_SPEC = {
+    'columns': {f'diff_{k}': 'int' for k in MECHANIC_COLUMNS},
+    'inputs': ['champion_features'],
+}
+
+def calculate_mechanics(blue_ids, red_ids, patch, catalog):
     """
     Calcula o diferencial granular das mecânicas (Blue - Red).
     Quebra as categorias em 11 features distintas.
+    catalog: ChampionCatalog (flags por patch já indexadas pela champion_key).
+    Uma partida = lote de tamanho 1 em calculate_mechanics_batch.
     """
-    
-    # 1. Filtragem de Patch
-    df_patch = df_features[df_features['patch_version'] == patch]
-    
-    if df_patch.empty:
-        if not df_features.empty:
-            latest_patch = df_features['patch_version'].max()
-            df_patch = df_features[df_features['patch_version'] == latest_patch]
-        else:
-            return _empty_result()
+    return scalar_row(calculate_mechanics_batch(blue_ids, red_ids, [patch], catalog))
 
-    # 2. Função interna de soma granular
-    def get_team_sum(team_ids):
-        team_stats = df_patch[df_patch['champion_key'].isin(team_ids)]
-        
-        # Se team_stats estiver vazio (ex: ids errados), .sum() retorna 0, o que é seguro.
-        return {
-            # Controle
-            'hard_cc': team_stats['has_hard_cc'].sum(),
-            'soft_cc': team_stats['has_soft_cc'].sum(), # Slows, Silences
-            'hook': team_stats['has_hook'].sum(),       # Blitz, Thresh, Pyke
-            
-            # Sobrevivência
-            'heal': team_stats['has_heal'].sum(),
-            'shield': team_stats['has_shield'].sum(),
-            'immortality': team_stats['has_immortality'].sum(), # Zilean, Kayle
-            
-            # Mobilidade
-            'dash': team_stats['has_dash'].sum(),
-            'blink': team_stats['has_blink'].sum(),
-            
-            # Ofensiva Especializada
-            'true_dmg': team_stats['has_true_damage'].sum(), # Counter de Tank
-            'execute': team_stats['has_execute'].sum(),      # Pyke, Urgot
-            'stealth': team_stats['has_stealth'].sum()       # Evelyn, Twitch
-        }
+def calculate_mechanics_batch(blue_ids, red_ids, patches, catalog):
+    """
+    Versão em lote: blue_ids/red_ids são matrizes (n_partidas x 5) e patches tem n itens.
+    Retorna { feature: array(n) }.
+    """
+    blue, red = team_matrix(blue_ids), team_matrix(red_ids)
+    result = {f'diff_{k}': np.zeros(len(blue), dtype=np.int64) for k in MECHANIC_COLUMNS}
 
-    # 3. Executa para os dois lados
-    blue = get_team_sum(blue_ids)
-    red = get_team_sum(red_ids)
-    
-    # 4. Cálculo dos Diferenciais (Loop dinâmico para evitar repetição de código)
-    result = {}
-    keys_to_process = [
-        'hard_cc', 'soft_cc', 'hook', 
-        'heal', 'shield', 'immortality', 
-        'dash', 'blink', 
-        'true_dmg', 'execute', 'stealth'
-    ]
-    
-    for k in keys_to_process:
-        result[f'diff_{k}'] = int(blue[k] - red[k])
-        
-    return result
+    for patch, rows in patch_groups(patches):
+        # 1. Patch (exato ou o mais recente, resolvido pelo catálogo)
+        tables = catalog.mechanics(patch)
+        if tables is None:
+            continue
 
-def _empty_result():
-    keys = [
-        'hard_cc', 'soft_cc', 'hook', 'heal', 'shield', 'immortality', 
-        'dash', 'blink', 'true_dmg', 'execute', 'stealth'
-    ]
-    return {f'diff_{k}': 0 for k in keys}
\ No newline at end of file
+        # 2. Soma granular: cada campeão conta uma vez (como o antigo .isin)
+        b_keys, r_keys = catalog.keys(blue[rows]), catalog.keys(red[rows])
+        b_mask, r_mask = first_occurrence(b_keys), first_occurrence(r_keys)
+
+        # 3. Diferenciais
+        for k, col in MECHANIC_COLUMNS.items():
+            flag = tables.flag(col)
+            result[f'diff_{k}'][rows] = (flag[b_keys] * b_mask).sum(axis=1) - (flag[r_keys] * r_mask).sum(axis=1)
+
+    return result
@@ -0,0 +1,83 @@
+import hashlib
+import json
+
+try:
+    from src.process_data.features import batching, champion_catalog
+    from src.process_data.features import mechanics, stats, damage_profile, classes, lane_matchups
+    from src.process_data.features import live_prediction, role_fixer, winrates
+except ImportError:
+    from features import batching, champion_catalog
+    from features import mechanics, stats, damage_profile, classes, lane_matchups
+    from features import live_prediction, role_fixer, winrates
+
+# Estágios de um grupo, na ordem das colunas em game_features:
+#   static  -> composição (kernels *_batch); recalculável a partir dos IDs já gravados
+#   live    -> timeline da partida; recalculável a partir dos IDs + tabelas de timeline
+#   core    -> posições (role_fixer); definem quais partidas entram -> mudou, rebuild completo
+#   rolling -> depende da ordem das partidas; recalculado numa passada sequencial
+STAGES = ['static', 'live', 'core', 'rolling']
+
+# Código compartilhado pelos kernels estáticos (mudou -> todos os grupos estáticos mudam)
+STATIC_SHARED = [batching, champion_catalog]
+
+def _source_hash(modules, spec):
+    digest = hashlib.sha1()
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    digest.update(json.dumps(spec, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+class FeatureGroup:
+    """
+    Grupo de colunas de game_features gerado por um módulo de features/.
+    Colunas, tipos ('int'/'float') e entradas vêm do FEATURE_SPEC do módulo; a
+    versão é o hash do código do módulo (+ código compartilhado) e da declaração.
+    """
+    def __init__(self, name, module, stage, kernel=None, shared=()):
+        spec = module.FEATURE_SPEC
+        self.name = name
+        self.stage = stage
+        self.kernel = kernel
+        self.columns = list(spec['columns'])
+        self.dtypes = dict(spec['columns'])
+        self.inputs = list(spec['inputs'])
+        self.version = _source_hash([module, *shared], spec)
+
+    def validate(self, result):
+        """Confere a saída de um kernel em lote contra a declaração (nomes, ordem e tipo)."""
+        if list(result) != self.columns:
+            raise ValueError(f"Grupo '{self.name}': colunas geradas diferem do FEATURE_SPEC "
+                             f"({list(result)} != {self.columns})")
+        for col, values in result.items():
+            kind = 'int' if values.dtype.kind in 'iub' else 'float'
+            if kind != self.dtypes[col]:
+                raise ValueError(f"Grupo '{self.name}': coluna {col} é {kind}, declarada como {self.dtypes[col]}")
+        return result
+
+FEATURE_GROUPS = [
+    FeatureGroup('mechanics', mechanics, 'static', mechanics.calculate_mechanics_batch, STATIC_SHARED),
+    FeatureGroup('stats', stats, 'static', stats.calculate_stats_batch, STATIC_SHARED),
+    FeatureGroup('damage_profile', damage_profile, 'static', damage_profile.calculate_damage_profile_batch, STATIC_SHARED),
+    FeatureGroup('classes', classes, 'static', classes.calculate_class_counts_batch, STATIC_SHARED),
+    FeatureGroup('lane_matchups', lane_matchups, 'static', lane_matchups.calculate_lane_matchups_batch, STATIC_SHARED),
+    FeatureGroup('live', live_prediction, 'live'),
+    FeatureGroup('roles', role_fixer, 'core'),
+    FeatureGroup('winrates', winrates, 'rolling'),
+]
+
+def feature_groups(stage=None):
+    ordered = sorted(FEATURE_GROUPS, key=lambda g: STAGES.index(g.stage))
+    return [g for g in ordered if stage is None or g.stage == stage]
+
+def feature_columns():
+    """Colunas de features de game_features, na ordem da tabela (sem match_id/patch/winner)."""
+    return [col for group in feature_groups() for col in group.columns]
+
+def feature_versions():
+    return {group.name: group.version for group in FEATURE_GROUPS}
+
+def changed_groups(saved_versions):
+    """Grupos cuja versão difere da gravada no estado (ou que não existiam na última execução)."""
+    saved_versions = saved_versions or {}
+    return [group for group in feature_groups() if saved_versions.get(group.name) != group.version]
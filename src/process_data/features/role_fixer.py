@@ -1,3 +1,6 @@
+import itertools
+
+import numpy as np
 import pandas as pd
 
 # --- CONFIGURAÇÃO DE PESOS ---
@@ -27,114 +30,212 @@ ROLE_WEIGHTS = {
     'UTILITY': {'Support': 4, 'Mage': 1.5, 'Tank': 1, 'Marksman': 0.1}
 }
 
+# Itens que denunciam a posição (inventário final do jogador)
+# 3865-3877: item de suporte e suas evoluções
+# 1101-1103: pets do caçador (vêm junto com o Smite)
+ITEM_SIGNALS = {
+    'support_item': range(3865, 3878),
+    'jungle_pet': range(1101, 1104),
+}
+
+ITEM_WEIGHTS = {
+    'TOP':     {},
+    'JUNGLE':  {'jungle_pet': 10},
+    'MIDDLE':  {},
+    'BOTTOM':  {},
+    'UTILITY': {'support_item': 10}
+}
+
 REQUIRED_ROLES = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
 
+# Colunas de match_participants lidas como sinais de posição
+SPELL_COLUMNS = ['spell1Id', 'spell2Id']
+ITEM_COLUMNS = [f'item{i}' for i in range(7)]
+
+# Declaração para o registro de features (features/registry.py): colunas, tipos e entradas.
+# As posições definem quais partidas entram e a ordem de todas as features por rota
+FEATURE_SPEC = {
+    'columns': {f'{side}_{label}_id': 'int'
+                for label in ['top', 'jungle', 'mid', 'adc', 'sup'] for side in ('blue', 'red')},
+    'inputs': ['match_participants', 'champions'],
+}
+
+# Tags do Data Dragon -> bits da máscara de tags de cada campeão
+ROLE_TAGS = ['Tank', 'Fighter', 'Mage', 'Assassin', 'Marksman', 'Support']
+
+# Bônus de quem está sozinho numa posição válida: nenhuma troca de score de tag/feitiço
+# compensa tirá-lo de lá (o máximo somado dos 5 jogadores fica bem abaixo disso)
+LOCK_BONUS = 1000.0
+
+# Os pesos viram inteiros (x10) para a soma dos scores ser exata: empates entre
+# atribuições não dependem da ordem em que os pesos foram somados
+SCORE_SCALE = 10
+
+# Todas as atribuições 5x5: ROLE_PERMUTATIONS[k, r] = jogador que ocupa REQUIRED_ROLES[r]
+ROLE_PERMUTATIONS = np.array(list(itertools.permutations(range(5))), dtype=np.int64)
+
+def _weight_matrix(weights, signals):
+    """Pesos por posição -> matriz (sinais x REQUIRED_ROLES) em inteiros (SCORE_SCALE)."""
+    return np.array([[round(weights[role].get(signal, 0) * SCORE_SCALE) for role in REQUIRED_ROLES]
+                     for signal in signals], dtype=np.int64)
+
+# Vocabulário do one-hot de cada jogador: [bits de tag | feitiços com peso | sinais de item]
+SPELL_IDS = np.array(sorted({spell for weights in SPELL_WEIGHTS.values() for spell in weights}), dtype=np.int64)
+ITEM_SIGNAL_NAMES = list(ITEM_SIGNALS)
+
+SIGNAL_WEIGHTS = np.vstack([
+    _weight_matrix(ROLE_WEIGHTS, ROLE_TAGS),
+    _weight_matrix(SPELL_WEIGHTS, SPELL_IDS.tolist()),
+    _weight_matrix(ITEM_WEIGHTS, ITEM_SIGNAL_NAMES),
+])
+
+# item id -> 1 + índice em ITEM_SIGNAL_NAMES (0 = item sem sinal)
+ITEM_SIGNAL_CODES = np.zeros(max(max(ids) for ids in ITEM_SIGNALS.values()) + 1, dtype=np.int64)
+for code, name in enumerate(ITEM_SIGNAL_NAMES, start=1):
+    ITEM_SIGNAL_CODES[list(ITEM_SIGNALS[name])] = code
+
+def tag_mask(tags_str):
+    """'Fighter, Tank' -> máscara de bits de ROLE_TAGS (espaços em volta de cada tag ignorados)."""
+    tags = {t.strip() for t in str(tags_str).split(',')}
+    return sum(1 << bit for bit, tag in enumerate(ROLE_TAGS) if tag in tags)
+
+class RoleTagTable:
+    """
+    champion_key -> máscara de tags, montada uma vez a partir de df_champs.
+    Usa a primeira linha de cada campeão no DataFrame (qualquer patch), como o
+    antigo get_champ_tags; campeões desconhecidos ficam sem tags.
+    """
+    def __init__(self, df_champs):
+        keys = df_champs['champion_key'].to_numpy(dtype=np.int64)
+        unique_keys, first = np.unique(keys, return_index=True)
+        self.masks = np.zeros(int(unique_keys.max()) + 1 if len(unique_keys) else 1, dtype=np.int64)
+        tags = df_champs['tags'].to_numpy(dtype=object)[first]
+        self.masks[unique_keys] = [tag_mask(t) for t in tags]
+        self.source = df_champs
+
+    def lookup(self, champion_ids):
+        ids = np.asarray(champion_ids, dtype=np.int64)
+        known = (ids >= 0) & (ids < len(self.masks))
+        return np.where(known, self.masks[np.where(known, ids, 0)], 0)
+
+# Última tabela montada (as chamadas por time recebem sempre o mesmo df_champs)
+_table_cache = None
+
+def _role_table(df_champs):
+    global _table_cache
+    if _table_cache is None or _table_cache.source is not df_champs:
+        _table_cache = RoleTagTable(df_champs)
+    return _table_cache
+
+def position_codes(lanes, roles):
+    """
+    lane/role da Riot -> índice em REQUIRED_ROLES (-1 = posição inválida, ex: NONE).
+    BOTTOM com role SUPPORT vira UTILITY.
+    """
+    lanes = np.asarray(lanes, dtype=object)
+    roles = np.asarray(roles, dtype=object)
+    codes = np.full(lanes.shape, -1, dtype=np.int64)
+    for r, role in enumerate(REQUIRED_ROLES):
+        codes[lanes == role] = r
+    support = np.array(['SUPPORT' in str(role) for role in roles.ravel()], dtype=bool).reshape(roles.shape)
+    codes[(lanes == 'BOTTOM') & support] = REQUIRED_ROLES.index('UTILITY')
+    return codes
+
+def participant_signals(df):
+    """
+    Feitiços (n x 2) e itens (n x 7) de um DataFrame de participantes, como int32.
+    Colunas ausentes (SQL antigo) ou NULL viram 0, que não pesa em nenhuma posição.
+    """
+    def columns(names):
+        return np.stack([
+            df[col].fillna(0).to_numpy(dtype=np.int32) if col in df.columns else np.zeros(len(df), dtype=np.int32)
+            for col in names
+        ], axis=-1)
+    return columns(SPELL_COLUMNS), columns(ITEM_COLUMNS)
+
+def role_signals(masks, spells, items=None):
+    """
+    One-hot de sinais de cada jogador (..., k, len(SIGNAL_WEIGHTS)): bits de tag,
+    contagem de cada feitiço de SPELL_IDS e presença de cada sinal de item.
+    masks: (..., k); spells: (..., k, 2); items: (..., k, slots) ou None.
+    """
+    masks = np.asarray(masks, dtype=np.int64)
+    tags = (masks[..., None] >> np.arange(len(ROLE_TAGS))) & 1
+    spells = np.asarray(spells, dtype=np.int64)
+    spell_counts = (spells[..., None] == SPELL_IDS).sum(axis=-2)
+    if items is None:
+        item_flags = np.zeros(masks.shape + (len(ITEM_SIGNAL_NAMES),), dtype=np.int64)
+    else:
+        items = np.asarray(items, dtype=np.int64)
+        known = (items >= 0) & (items < len(ITEM_SIGNAL_CODES))
+        codes = np.where(known, ITEM_SIGNAL_CODES[np.where(known, items, 0)], 0)
+        item_flags = (codes[..., None] == np.arange(1, len(ITEM_SIGNAL_NAMES) + 1)).any(axis=-2)
+    return np.concatenate([tags, spell_counts, item_flags.astype(np.int64)], axis=-1)
+
+def assignment_scores(masks, positions, spells, items=None):
+    """
+    Matriz de score (..., jogadores, posições), em unidades de SCORE_SCALE: sinais @
+    SIGNAL_WEIGHTS (tags + feitiços + itens) + LOCK_BONUS para quem está sozinho numa
+    posição válida (esses não saem do lugar, como no fixer original).
+    masks/positions: (..., k); spells: (..., k, 2); items: (..., k, slots) ou None.
+    """
+    scores = role_signals(masks, spells, items) @ SIGNAL_WEIGHTS
+
+    valid = positions >= 0
+    counts = (positions[..., :, None] == positions[..., None, :]).sum(axis=-1)
+    locked = valid & (counts == 1)
+    lock = np.zeros(scores.shape, dtype=bool)
+    np.put_along_axis(lock, np.where(valid, positions, 0)[..., None], locked[..., None], axis=-1)
+    return scores + lock * round(LOCK_BONUS * SCORE_SCALE)
+
+def resolve_roles_batch(champion_ids, positions, spells, table, items=None):
+    """
+    Versão em lote: champion_ids/positions (n_times x 5), spells (n_times x 5 x 2),
+    items (n_times x 5 x slots) opcional. O score de todos os jogadores de todos os
+    times sai de uma única multiplicação de matrizes (role_signals @ SIGNAL_WEIGHTS).
+    Resolve cada time exatamente, testando as 120 atribuições jogador -> posição e
+    ficando com a de maior score total (empate: a primeira em ordem lexicográfica).
+    Retorna (n_times x 5) com os IDs na ordem de REQUIRED_ROLES.
+    """
+    ids = np.asarray(champion_ids, dtype=np.int64).reshape(-1, 5)
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1, 5)
+    spells = np.asarray(spells, dtype=np.int64).reshape(-1, 5, 2)
+    if items is not None:
+        items = np.asarray(items, dtype=np.int64).reshape(len(ids), 5, -1)
+
+    scores = assignment_scores(table.lookup(ids), positions, spells, items)
+    # totals[t, k] = soma de scores[t, ROLE_PERMUTATIONS[k, r], r]
+    totals = scores[:, ROLE_PERMUTATIONS, np.arange(5)].sum(axis=2)
+    best = ROLE_PERMUTATIONS[totals.argmax(axis=1)]
+    return np.take_along_axis(ids, best, axis=1)
+
 def resolve_team_roles(team_df, df_champs):
     """
-    Resolve conflitos de role usando Tags de Campeão E Feitiços de Invocador.
+    Resolve conflitos de role usando Tags de Campeão, Feitiços de Invocador e itens.
+    Retorna { posição: champion_id }. Com 5 jogadores todas as posições são preenchidas;
+    com menos, só as que couberem.
     """
-    
-    # 1. Mapeamento Inicial
-    assignments = {r: [] for r in REQUIRED_ROLES}
-    
-    def get_champ_tags(cid):
-        row = df_champs[df_champs['champion_key'] == cid]
-        if row.empty: return []
-        return str(row.iloc[0]['tags']).split(',')
-
-    players = []
-    for _, row in team_df.iterrows():
-        pos = row['lane']
-        if pos == 'BOTTOM' and 'SUPPORT' in row['role']:
-            pos = 'UTILITY'
-            
-        cid = row['champion_id']
-        
-        # Pega os feitiços da linha (precisamos garantir que o SQL traga isso)
-        spells = [row.get('spell1Id', 0), row.get('spell2Id', 0)]
-        
-        player_obj = {
-            'id': cid, 
-            'tags': get_champ_tags(cid), 
-            'spells': spells,
-            'original_pos': pos
-        }
-        players.append(player_obj)
-        
-        if pos in assignments:
-            assignments[pos].append(player_obj)
-
-    # 2. Identificar Problemas
-    filled_roles = [r for r in assignments if len(assignments[r]) == 1]
-    empty_roles = [r for r in assignments if len(assignments[r]) == 0]
-    overflow_roles = [r for r in assignments if len(assignments[r]) > 1]
-    
-    # Se tudo estiver correto, retorna rápido
-    if not empty_roles and not overflow_roles:
-        return {r: assignments[r][0]['id'] for r in REQUIRED_ROLES}
-
-    # 3. Separar Jogadores Problemáticos
-    # Consideramos problemáticos: quem está em lane duplicada OU quem está em lane 'NONE'
-    # Quem está sozinho numa lane válida (ex: único TOP) deixamos quieto para não bagunçar o que está certo.
-    problem_players = []
-    
-    # Adiciona todos das lanes duplicadas
-    for r in overflow_roles:
-        problem_players.extend(assignments[r])
-        assignments[r] = [] 
-        empty_roles.append(r) 
-
-    # Adiciona quem não foi assignado a lugar nenhum ou estava em NONE
-    # (Verifica se o player já está numa role 'filled', se não, é problema)
-    safe_ids = [assignments[r][0]['id'] for r in filled_roles]
-    for p in players:
-        if p['id'] not in safe_ids and p not in problem_players:
-            problem_players.append(p)
-
-    final_dict = {r: assignments[r][0]['id'] for r in filled_roles}
-    
-    # 4. Cálculo de Score Híbrido (Tags + Spells)
-    possibilities = []
-    
-    for p in problem_players:
-        for role in empty_roles:
-            score = 0
-            
-            # A. Score de Tag (Base)
-            for tag in p['tags']:
-                score += ROLE_WEIGHTS.get(role, {}).get(tag, 0)
-            
-            # B. Score de Feitiço (O "Tie Breaker" Poderoso)
-            for spell_id in p['spells']:
-                # Se tiver Smite (11) e a role for Jungle, ganha +50 pontos.
-                # Se tiver Heal (7) e for ADC, ganha +5 pontos.
-                score += SPELL_WEIGHTS.get(role, {}).get(spell_id, 0)
-            
-            possibilities.append({'player': p, 'role': role, 'score': score})
-    
-    # Ordena: Maior score primeiro
-    possibilities.sort(key=lambda x: x['score'], reverse=True)
-    
-    used_players = set()
-    filled_empty_roles = set()
-    
-    # 5. Atribuição Gulosa
-    for match in possibilities:
-        p_id = match['player']['id']
-        role = match['role']
-        
-        if p_id not in used_players and role not in filled_empty_roles:
-            final_dict[role] = p_id
-            used_players.add(p_id)
-            filled_empty_roles.add(role)
-            
-    # Fallback para sobras (preencher buracos com quem sobrou)
-    if len(used_players) < len(problem_players):
-        remaining_p = [p for p in problem_players if p['id'] not in used_players]
-        remaining_r = [r for r in empty_roles if r not in filled_empty_roles]
-        
-        for i, p in enumerate(remaining_p):
-            if i < len(remaining_r):
-                final_dict[remaining_r[i]] = p['id']
-
-    return final_dict
\ No newline at end of file
+    table = _role_table(df_champs)
+    ids = team_df['champion_id'].to_numpy(dtype=np.int64)
+    positions = position_codes(team_df['lane'].to_numpy(dtype=object), team_df['role'].to_numpy(dtype=object))
+    # Feitiços e itens só entram se o SQL trouxer as colunas
+    spells, items = participant_signals(team_df)
+
+    if len(ids) == 5:
+        resolved = resolve_roles_batch(ids[None], positions[None], spells[None], table, items[None])[0]
+        return dict(zip(REQUIRED_ROLES, resolved.tolist()))
+
+    # Times fora do padrão (ex: jogador duplicado no banco): busca exata sobre os jogadores presentes
+    scores = assignment_scores(table.lookup(ids), positions, spells, items)
+    best_score, best = None, {}
+    if len(ids) > 5:
+        for players in itertools.permutations(range(len(ids)), 5):
+            total = scores[list(players), range(5)].sum()
+            if best_score is None or total > best_score:
+                best_score, best = total, {role: int(ids[p]) for role, p in zip(REQUIRED_ROLES, players)}
+    else:
+        for roles in itertools.permutations(range(5), len(ids)):
+            total = scores[range(len(ids)), list(roles)].sum()
+            if best_score is None or total > best_score:
+                best_score, best = total, {REQUIRED_ROLES[r]: int(ids[p]) for p, r in enumerate(roles)}
+    return best
@@ -1,41 +1,83 @@
-import pandas as pd
 import numpy as np
 
-def calculate_stats(blue_ids, red_ids, patch, df_champs):
+try:
+    from src.process_data.features.batching import team_matrix, patch_groups, scalar_row
+except ImportError:
+    from features.batching import team_matrix, patch_groups, scalar_row
+
+# Métrica -> coluna de 'champions'
+METRIC_COLUMNS = {
+    'hp': 'hp', 'hp_pl': 'hp_per_level',
+    'ad': 'attackdamage', 'ad_pl': 'attackdamage_per_level',
+    'as': 'attackspeed', 'as_pl': 'attackspeed_per_level',
+    'armor': 'armor', 'armor_pl': 'armor_per_level',
+    'mr': 'spellblock', 'mr_pl': 'spellblock_per_level',
+    'range': 'attackrange',
+    'movespeed': 'movespeed',
+    'hpregen': 'hpregen'
+}
+
+# Declaração para o registro de features (features/registry.py): colunas, tipos e entradas
+FEATURE_SPEC = {
+    'columns': {k: 'float' for k in [
+        'diff_power_early', 'diff_power_mid', 'diff_power_late',
+        'diff_avg_range', 'diff_avg_movespeed', 'mismatch_ad_armor', 'mismatch_kiting'
+    ]},
+    'inputs': ['champions'],
+}
+
+def calculate_stats(blue_ids, red_ids, patch, catalog):
     """
     Calcula diffs, mismatches e Curvas de Poder (Early/Mid/Late).
+    catalog: ChampionCatalog (stats por patch já indexados pela champion_key).
+    Uma partida = lote de tamanho 1 em calculate_stats_batch.
     """
-    
-    # 1. Filtro de Patch
-    df_patch = df_champs[df_champs['patch_version'] == patch]
-    
-    if df_patch.empty:
-        if not df_champs.empty:
-            latest = df_champs['patch_version'].max()
-            df_patch = df_champs[df_champs['patch_version'] == latest]
-        else:
-            return _empty_result()
+    return scalar_row(calculate_stats_batch(blue_ids, red_ids, [patch], catalog))
 
-    # 2. Helper para extrair métricas
-    def get_team_metrics(team_ids):
-        stats = df_patch[df_patch['champion_key'].isin(team_ids)]
-        if stats.empty: return _get_zeroed_metrics()
-        
-        # Retorna todas as colunas necessárias para o cálculo
-        return {
-            'hp': stats['hp'].mean(), 'hp_pl': stats['hp_per_level'].mean(),
-            'ad': stats['attackdamage'].mean(), 'ad_pl': stats['attackdamage_per_level'].mean(),
-            'as': stats['attackspeed'].mean(), 'as_pl': stats['attackspeed_per_level'].mean(),
-            'armor': stats['armor'].mean(), 'armor_pl': stats['armor_per_level'].mean(),
-            'mr': stats['spellblock'].mean(), 'mr_pl': stats['spellblock_per_level'].mean(),
-            'range': stats['attackrange'].mean(),
-            'movespeed': stats['movespeed'].mean(),
-            'hpregen': stats['hpregen'].mean()
-        }
+def calculate_stats_batch(blue_ids, red_ids, patches, catalog):
+    """
+    Versão em lote: blue_ids/red_ids são matrizes (n_partidas x 5) e patches tem n itens.
+    Retorna { feature: array(n) float64 }.
+    """
+    blue, red = team_matrix(blue_ids), team_matrix(red_ids)
+    n = len(blue)
+    b = {k: np.zeros(n) for k in METRIC_COLUMNS}
+    r = {k: np.zeros(n) for k in METRIC_COLUMNS}
+
+    for patch, rows in patch_groups(patches):
+        # 1. Patch (exato ou o mais recente, resolvido pelo catálogo)
+        tables = catalog.champions(patch)
+        if tables is None:
+            continue  # Métricas zeradas -> todas as features ficam 0.0
+        _fill_team_metrics(b, rows, tables, catalog.keys(blue[rows]))
+        _fill_team_metrics(r, rows, tables, catalog.keys(red[rows]))
+
+    return _stats_features(b, r)
+
+def _fill_team_metrics(metrics, rows, tables, keys):
+    """
+    Média de cada métrica dos campeões do time presentes no patch.
+    A soma é feita coluna a coluna na ordem das linhas do DataFrame (a mesma da
+    média do pandas), então o resultado é bit a bit igual ao cálculo por partida.
+    """
+    valid = tables.team_mask(keys)
+    order = np.argsort(np.where(valid, tables.rank[keys], np.iinfo(np.int64).max), axis=1, kind='stable')
+    keys = np.take_along_axis(keys, order, axis=1)
+    valid = np.take_along_axis(valid, order, axis=1)
+    count = valid.sum(axis=1)
+    has_champs = count > 0
+
+    for k, col in METRIC_COLUMNS.items():
+        values = np.where(valid, tables.stats[col][keys], 0.0)
+        total = values[:, 0]
+        for j in range(1, values.shape[1]):
+            total = total + values[:, j]
+        # Time sem campeões no patch: métricas zeradas
+        metrics[k][rows] = np.where(has_champs, total / np.maximum(count, 1), 0.0)
+
+def _stats_features(b, r):
+    """Curvas de poder e mismatches a partir das métricas médias (escalares ou arrays) de cada time."""
 
-    b = get_team_metrics(blue_ids)
-    r = get_team_metrics(red_ids)
-    
     # --- CÁLCULO DE CURVAS DE PODER (Novidade) ---
     
     def calculate_power_at_level(metrics, level):
@@ -97,25 +139,13 @@ def calculate_stats(blue_ids, red_ids, patch, df_champs):
 
     return {
         # Curvas de Poder (O que você pediu)
-        'diff_power_early': float(diff_power_early),
-        'diff_power_mid': float(diff_power_mid),
-        'diff_power_late': float(diff_power_late),
+        'diff_power_early': diff_power_early,
+        'diff_power_mid': diff_power_mid,
+        'diff_power_late': diff_power_late,
         
         # Stats Táticos
-        'diff_avg_range': float(b['range'] - r['range']),
-        'diff_avg_movespeed': float(b['movespeed'] - r['movespeed']),
-        'mismatch_ad_armor': float(mismatch_ad_armor),
-        'mismatch_kiting': float(mismatch_kiting)
+        'diff_avg_range': b['range'] - r['range'],
+        'diff_avg_movespeed': b['movespeed'] - r['movespeed'],
+        'mismatch_ad_armor': mismatch_ad_armor,
+        'mismatch_kiting': mismatch_kiting
     }
-
-def _get_zeroed_metrics():
-    # Helper para inicializar dict com zeros
-    keys = ['hp', 'hp_pl', 'ad', 'ad_pl', 'as', 'as_pl', 
-            'armor', 'armor_pl', 'mr', 'mr_pl', 'range', 'movespeed', 'hpregen']
-    return {k: 0.0 for k in keys}
-
-def _empty_result():
-    keys = ['diff_power_early', 'diff_power_mid', 'diff_power_late', 
-            'diff_avg_range', 'diff_avg_movespeed', 
-            'mismatch_ad_armor', 'mismatch_kiting']
-    return {k: 0.0 for k in keys}
\ No newline at end of file
@@ -1,14 +1,273 @@
+from array import array
+
+import numpy as np
+
+# Posições na ordem das listas recebidas (ROLE_ORDER do orquestrador)
+POSITIONS = ['top', 'jungle', 'mid', 'adc', 'support']
+
+# Duplas do mesmo time com winrate próprio (sinergia)
+SYNERGY_PAIRS = [('jungle', 'mid'), ('adc', 'support')]
+
+# Declaração para o registro de features (features/registry.py): colunas, tipos e entradas.
+# Depende da ordem das partidas (histórico acumulado)
+FEATURE_SPEC = {
+    'columns': {k: 'float' for k in
+                ['blue_avg_winrate', 'red_avg_winrate', 'winrate_diff_total'] +
+                [f'diff_winrate_{pos}' for pos in POSITIONS] +
+                [f'diff_role_winrate_{pos}' for pos in POSITIONS] + ['role_winrate_diff_total'] +
+                [f'matchup_winrate_{pos}' for pos in POSITIONS] + ['matchup_winrate_avg'] +
+                [f'diff_synergy_{a}_{b}' for a, b in SYNERGY_PAIRS]},
+    'inputs': ['matches'],
+}
+
+# Configuração do histórico (entra no hash da versão do grupo 'winrates': mudou aqui,
+# o modo incremental recalcula os winrates do zero). Os padrões reproduzem o acumulado simples.
+HALF_LIFE = None    # meia-vida em partidas do decaimento exponencial (None = sem decaimento)
+WINDOW = None       # só os últimos N jogos de cada campeão (None = histórico inteiro)
+PATCH_CARRY = 1.0   # peso mantido quando aparece um patch novo (0 = zera a cada patch)
+
+# Acima disso a escala do decaimento é reaplicada nos arrays (evita overflow)
+_MAX_SCALE = 1e100
+
+def _patch_key(patch):
+    """'15.10' -> (15, 10), para comparar patches numericamente."""
+    try:
+        return tuple(int(part) for part in str(patch).split('.'))
+    except ValueError:
+        return None
+
+class ContextWinrate:
+    """
+    Winrates por contexto, com o mesmo histórico do RollingWinrate que o contém:
+      role    (K x 5)      campeão na posição
+      matchup (5 x K x K)  campeão da posição contra o campeão inimigo da mesma posição
+      synergy (D x K x K)  dupla do mesmo time (SYNERGY_PAIRS)
+    K = campeões vistos, num índice denso (o índice 0 fica vazio e é o de quem nunca
+    jogou). As três tabelas são fatias de um único buffer de vitórias e outro de jogos,
+    que dobram de capacidade quando precisam: cada partida vira 20 + 2 * D células
+    (cells), lidas e somadas de uma vez, com Suavização de Laplace na leitura.
+    Pesos na escala do dono (decaimento); patch_carry e reescala chegam por scale_by.
+    A janela de N jogos vale só para o winrate por campeão: aqui o histórico é por par.
+    """
+    TABLES = ['role', 'matchup', 'synergy']
+
+    def __init__(self, capacity=256):
+        self.champions = [0]                      # índice denso -> champion_id
+        self.index = np.zeros(1, dtype=np.int64)  # champion_id -> índice denso (0 = nunca visto)
+        n, d = len(POSITIONS), len(SYNERGY_PAIRS)
+        # Células de uma partida, sobre os 10 campeões [blue..., red...]:
+        #   célula = início da fatia + campeão[first] * coef_first + campeão[second] * coef_second
+        # role blue/red, matchup blue x red / red x blue, duplas blue/red
+        team = np.arange(2 * n)
+        enemy = (team + n) % (2 * n)
+        duo_first = np.array([POSITIONS.index(a) for a, _ in SYNERGY_PAIRS] * 2) + np.repeat([0, n], d)
+        duo_second = np.array([POSITIONS.index(b) for _, b in SYNERGY_PAIRS] * 2) + np.repeat([0, n], d)
+        self.cell_first = np.concatenate([team, team, duo_first])
+        self.cell_second = np.concatenate([team, enemy, duo_second])
+        self.cell_table = ['role'] * (2 * n) + ['matchup'] * (2 * n) + ['synergy'] * (2 * d)
+        self.cell_slot = np.concatenate([team % n, team % n, np.tile(np.arange(d), 2)])
+        self.blue_cells = np.concatenate([team < n, team < n, np.repeat([True, False], d)])
+        self._last_cells = (None, None)
+        self.capacity = 0
+        self._allocate(capacity)
+
+    def _shapes(self, capacity):
+        return {'role': (capacity, len(POSITIONS)),
+                'matchup': (len(POSITIONS), capacity, capacity),
+                'synergy': (len(SYNERGY_PAIRS), capacity, capacity)}
+
+    def _allocate(self, capacity):
+        old = {name: (self.table(name, self.wins), self.table(name, self.games))
+               for name in self.TABLES} if self.capacity else {}
+        shapes = self._shapes(capacity)
+        sizes = [int(np.prod(shape)) for shape in shapes.values()]
+        self.offsets = dict(zip(self.TABLES, np.concatenate([[0], np.cumsum(sizes)[:-1]]).tolist()))
+        self._last_cells = (None, None)
+        self.wins = np.zeros(sum(sizes))
+        self.games = np.zeros(sum(sizes))
+        self.capacity = capacity
+
+        # Coeficientes das células (dependem da capacidade). role: (campeão, posição);
+        # matchup/synergy: (posição ou dupla, campeão, outro campeão)
+        is_role = np.array([name == 'role' for name in self.cell_table])
+        offsets = np.array([self.offsets[name] for name in self.cell_table], dtype=np.int64)
+        self.cell_base = offsets + np.where(is_role, self.cell_slot, self.cell_slot * capacity * capacity)
+        self.coef_first = np.where(is_role, len(POSITIONS), capacity)
+        self.coef_second = np.where(is_role, 0, 1)
+        for name, (wins, games) in old.items():
+            region = tuple(slice(0, n) for n in wins.shape)
+            self.table(name, self.wins)[region] = wins
+            self.table(name, self.games)[region] = games
+
+    def table(self, name, buffer):
+        """View de uma tabela (role/matchup/synergy) dentro do buffer de vitórias ou de jogos."""
+        shape = self._shapes(self.capacity)[name]
+        start = self.offsets[name]
+        return buffer[start:start + int(np.prod(shape))].reshape(shape)
+
+    def _dense(self, champion_ids, add=False):
+        top = max(champion_ids)
+        ids = np.array(champion_ids, dtype=np.int64)
+        if add:
+            if top >= len(self.index):
+                self.index = np.concatenate([self.index, np.zeros(top + 1 - len(self.index), dtype=np.int64)])
+            for cid in ids[self.index[ids] == 0].tolist():
+                if self.index[cid] == 0:
+                    self.index[cid] = len(self.champions)
+                    self.champions.append(cid)
+            if len(self.champions) > self.capacity:
+                self._allocate(max(self.capacity * 2, len(self.champions)))
+        elif top >= len(self.index):
+            # Campeão que nunca jogou e com ID acima de todos os vistos
+            return np.where(ids < len(self.index), self.index[np.minimum(ids, len(self.index) - 1)], 0)
+        return self.index[ids]
+
+    def cells(self, blue_team_ids, red_team_ids, add=False):
+        """Posições no buffer das células da partida, na ordem de blue_cells."""
+        champion_ids = list(blue_team_ids) + list(red_team_ids)
+        # update logo depois do get_features da mesma partida reaproveita as células,
+        # a menos que algum campeão ainda não tivesse índice
+        cached_ids, cached = self._last_cells
+        if champion_ids == cached_ids:
+            return cached
+        champs = self._dense(champion_ids, add)
+        cells = self.cell_base + champs[self.cell_first] * self.coef_first + champs[self.cell_second] * self.coef_second
+        self._last_cells = (champion_ids, cells) if champs.all() else (None, None)
+        return cells
+
+    def get_features(self, blue_team_ids, red_team_ids, scale=1.0):
+        cells = self.cells(blue_team_ids, red_team_ids)
+        rates = ((self.wins[cells] / scale + 1) / (self.games[cells] / scale + 2)).tolist()
+
+        n, d = len(POSITIONS), len(SYNERGY_PAIRS)
+        blue_role, red_role, matchup = rates[:n], rates[n:2 * n], rates[2 * n:3 * n]
+        blue_duos, red_duos = rates[4 * n:4 * n + d], rates[4 * n + d:]
+        features = {f'diff_role_winrate_{p}': b - r for p, b, r in zip(POSITIONS, blue_role, red_role)}
+        features['role_winrate_diff_total'] = sum(blue_role) / n - sum(red_role) / n
+        features.update({f'matchup_winrate_{p}': m for p, m in zip(POSITIONS, matchup)})
+        features['matchup_winrate_avg'] = sum(matchup) / n
+        for (a, b), blue_duo, red_duo in zip(SYNERGY_PAIRS, blue_duos, red_duos):
+            features[f'diff_synergy_{a}_{b}'] = blue_duo - red_duo
+        return features
+
+    def update(self, blue_team_ids, red_team_ids, blue_won, weight):
+        cells = self.cells(blue_team_ids, red_team_ids, add=True)
+        # add.at: num espelho (mesmo campeão dos dois lados) células se repetem
+        np.add.at(self.games, cells, weight)
+        np.add.at(self.wins, cells[self.blue_cells == blue_won], weight)
+
+    def scale_by(self, factor):
+        self.wins *= factor
+        self.games *= factor
+
+    def to_state(self):
+        """
+        { 'champions': [champion_id por índice denso], 'role': [[c, p, wins, games]],
+          'matchup': [[p, c, c_inimigo, wins, games]], 'synergy': [[d, c1, c2, wins, games]] }
+        Só as células com jogos (as tabelas densas são quase todas zero).
+        """
+        state = {'champions': self.champions[1:]}
+        for name in self.TABLES:
+            wins, games = self.table(name, self.wins), self.table(name, self.games)
+            cells = np.nonzero(games)
+            state[name] = [[*map(int, cell), _json_number(w), _json_number(g)]
+                           for cell, w, g in zip(zip(*cells), wins[cells].tolist(), games[cells].tolist())]
+        return state
+
+    def load_state(self, state):
+        if state.get('champions'):
+            self._dense(state['champions'], add=True)
+        for name in self.TABLES:
+            entries = state.get(name, [])
+            if not entries:
+                continue
+            cells = tuple(np.array([entry[:-2] for entry in entries], dtype=np.int64).T)
+            self.table(name, self.wins)[cells] = [entry[-2] for entry in entries]
+            self.table(name, self.games)[cells] = [entry[-1] for entry in entries]
+
 class RollingWinrate:
     """
     Gerencia o cálculo incremental de Winrates (Rolling Window).
     Evita Data Leakage garantindo que as estatísticas de um campeão
     sejam baseadas apenas em partidas passadas.
+
+    Vitórias e jogos ficam em arrays (array.array de doubles) indexados pelo
+    champion_id, que só crescem quando aparece um ID maior: get/update custam O(10)
+    por partida, sem criar dicts. (Com 10 posições por partida, laços simples saem
+    mais baratos que operações numpy.)
+
+    - half_life: cada partida processada multiplica o peso do histórico por
+      0.5 ** (1 / half_life). Em vez de percorrer os arrays, o peso novo é que
+      cresce (self.scale) e a leitura divide por ele.
+    - window: só os últimos N jogos de cada campeão contam (buffer circular por campeão).
+    - patch_carry: quando chega um patch mais novo que todos os vistos, o histórico
+      é multiplicado por esse peso (0 = recomeça do zero a cada patch).
+
+    Além do winrate por campeão, winrates por posição, confronto de rota e dupla
+    (ContextWinrate), com o mesmo decaimento e patch_carry. Listas com 5 campeões
+    na ordem de POSITIONS; com outro tamanho só o winrate por campeão é calculado.
     """
-    def __init__(self):
-        # Estrutura: { champion_id: {'wins': 0, 'games': 0} }
-        self.stats = {}
+    def __init__(self, half_life=HALF_LIFE, window=WINDOW, patch_carry=PATCH_CARRY, size=1024):
+        if half_life is not None and half_life <= 0:
+            raise ValueError("half_life deve ser positivo")
+        if window is not None and window < 1:
+            raise ValueError("window deve ser >= 1")
+        if not 0 <= patch_carry <= 1:
+            raise ValueError("patch_carry deve estar entre 0 e 1")
+        self.half_life = half_life
+        self.window = window
+        self.patch_carry = patch_carry
+        self.growth = 2 ** (1 / half_life) if half_life else 1.0
+
+        # wins/games em unidades da escala atual (valor real = array / scale)
+        self.size = 0
+        self.wins = array('d')
+        self.games = array('d')
+        self.scale = 1.0
+        self.last_patch = None
+        self._seen_patch = None
+        if window:
+            # Peso de cada jogo da janela (negativo = derrota), campeão c nas posições
+            # [c * window, (c + 1) * window); head = próxima posição a sobrescrever
+            self.history = array('d')
+            self.history_head = array('l')
+            self.history_count = array('l')
+        self._grow(size - 1)
+        self.context = ContextWinrate()
         # Nomes das posições para as chaves do dicionário de retorno
-        self.positions = ['top', 'jungle', 'mid', 'adc', 'support']
+        self.positions = list(POSITIONS)
+
+    def _grow(self, max_id):
+        if max_id < self.size:
+            return
+        extra = max(max_id + 1, self.size * 2) - self.size
+        self.wins.extend([0.0] * extra)
+        self.games.extend([0.0] * extra)
+        if self.window:
+            self.history.extend([0.0] * (extra * self.window))
+            self.history_head.extend([0] * extra)
+            self.history_count.extend([0] * extra)
+        self.size += extra
+
+    def _enter_patch(self, patch):
+        """Aplica o patch_carry quando a partida é de um patch mais novo que todos os anteriores."""
+        # Partidas seguidas do mesmo patch (o caso comum) não repetem o parse
+        if patch is None or patch == self._seen_patch:
+            return
+        self._seen_patch = patch
+        key = _patch_key(patch)
+        if key is None or (self.last_patch is not None and key <= self.last_patch):
+            return
+        if self.last_patch is not None and self.patch_carry < 1:
+            carry = self.patch_carry
+            self.wins = array('d', [v * carry for v in self.wins])
+            self.games = array('d', [v * carry for v in self.games])
+            if self.window:
+                self.history = array('d', [v * carry for v in self.history])
+                if carry == 0:
+                    self.history_count = array('l', [0]) * self.size
+            self.context.scale_by(carry)
+        self.last_patch = key
 
     def _get_single_winrate(self, champion_id):
         """
@@ -16,17 +275,23 @@ class RollingWinrate:
         Fórmula: (Vitórias + 1) / (Jogos + 2)
         Isso empurra campeões com poucos jogos para 50% de WR.
         """
-        data = self.stats.get(champion_id, {'wins': 0, 'games': 0})
-        return (data['wins'] + 1) / (data['games'] + 2)
+        if not 0 <= champion_id < self.size:
+            return 0.5
+        if self.scale == 1.0:
+            return (self.wins[champion_id] + 1) / (self.games[champion_id] + 2)
+        return (self.wins[champion_id] / self.scale + 1) / (self.games[champion_id] / self.scale + 2)
 
-    def get_features(self, blue_team_ids, red_team_ids):
+    def get_features(self, blue_team_ids, red_team_ids, patch=None):
         """
         Gera features baseadas no histórico acumulado, incluindo diferenças por posição.
         Assume que as listas blue_team_ids e red_team_ids estão na mesma ordem de posições.
+        patch: patch da partida (ex: '15.3'), para o patch_carry.
         """
+        self._enter_patch(patch)
         # Calcula winrates individuais para cada campeão
-        blue_wrs = [self._get_single_winrate(cid) for cid in blue_team_ids]
-        red_wrs = [self._get_single_winrate(cid) for cid in red_team_ids]
+        wrs = self._get_single_winrate
+        blue_wrs = [wrs(cid) for cid in blue_team_ids]
+        red_wrs = [wrs(cid) for cid in red_team_ids]
 
         # Médias globais dos times
         blue_avg = sum(blue_wrs) / len(blue_wrs) if blue_wrs else 0.5
@@ -45,31 +310,128 @@ class RollingWinrate:
             pos_name = self.positions[i] if i < len(self.positions) else f'pos_{i}'
             features[f'diff_winrate_{pos_name}'] = blue_wrs[i] - red_wrs[i]
 
+        # Winrates por posição, confronto e dupla (histórico só de partidas anteriores)
+        if len(blue_wrs) == len(red_wrs) == len(POSITIONS):
+            features.update(self.context.get_features(blue_team_ids, red_team_ids, self.scale))
+
         return features
 
-    def update(self, blue_team_ids, red_team_ids, winner_team):
+    def _add_game(self, cid, won, weight):
+        """Um jogo do campeão com a janela ligada: entra na janela e empurra o mais antigo para fora."""
+        slot = cid * self.window + self.history_head[cid]
+        if self.history_count[cid] == self.window:
+            old = self.history[slot]
+            self.games[cid] -= abs(old)
+            if old > 0:
+                self.wins[cid] -= old
+        else:
+            self.history_count[cid] += 1
+        self.history[slot] = weight if won else -weight
+        self.history_head[cid] = (self.history_head[cid] + 1) % self.window
+        self.games[cid] += weight
+        if won:
+            self.wins[cid] += weight
+
+    def update(self, blue_team_ids, red_team_ids, winner_team, patch=None):
         """
         Atualiza o histórico de vitórias e jogos após o término da partida.
         winner_team: 100 ou 1 para Blue, 200 ou 0 para Red.
         """
+        self._enter_patch(patch)
         # Normaliza vencedor para booleano (True se Blue ganhou)
         blue_won = (winner_team == 1 or winner_team == 100)
+        self._grow(max(max(blue_team_ids, default=0), max(red_team_ids, default=0)))
+
+        # Atualiza estatísticas dos dois times
+        weight = self.scale
+        if self.window:
+            for cid in blue_team_ids:
+                self._add_game(cid, blue_won, weight)
+            for cid in red_team_ids:
+                self._add_game(cid, not blue_won, weight)
+        else:
+            wins, games = self.wins, self.games
+            for cid in blue_team_ids:
+                games[cid] += weight
+                if blue_won:
+                    wins[cid] += weight
+            for cid in red_team_ids:
+                games[cid] += weight
+                if not blue_won:
+                    wins[cid] += weight
+        if len(blue_team_ids) == len(red_team_ids) == len(POSITIONS):
+            self.context.update(blue_team_ids, red_team_ids, blue_won, weight)
+
+        if self.growth != 1.0:
+            self.scale *= self.growth
+            if self.scale > _MAX_SCALE:
+                self._rescale()
+
+    def _rescale(self):
+        scale = self.scale
+        self.wins = array('d', [v / scale for v in self.wins])
+        self.games = array('d', [v / scale for v in self.games])
+        if self.window:
+            self.history = array('d', [v / scale for v in self.history])
+        self.context.scale_by(1 / scale)
+        self.scale = 1.0
+
+    def to_state(self):
+        """
+        Estado acumulado serializável em JSON (usado pelo modo incremental do orquestrador).
+        Formato: { 'config': {...}, 'last_patch': [15, 3] | None, 'scale': escala do decaimento,
+                   'stats': { 'champion_id': [wins, games] },
+                   'history': { 'champion_id': [peso, ...] } (só com window; do jogo mais antigo
+                               ao mais novo, peso negativo = derrota),
+                   'context': ContextWinrate.to_state() }
+        Pesos na escala atual (valor real = peso / scale), como nos arrays: a execução
+        seguinte continua exatamente de onde esta parou.
+        """
+        state = {
+            'config': {'half_life': self.half_life, 'window': self.window, 'patch_carry': self.patch_carry},
+            'last_patch': list(self.last_patch) if self.last_patch is not None else None,
+            'scale': self.scale,
+            'stats': {str(cid): [_json_number(self.wins[cid]), _json_number(self.games[cid])]
+                      for cid in range(self.size) if self.games[cid] > 0},
+        }
+        if self.window:
+            history = {}
+            for cid in range(self.size):
+                count, head = self.history_count[cid], self.history_head[cid]
+                if count:
+                    history[str(cid)] = [_json_number(self.history[cid * self.window + (head - count + k) % self.window])
+                                         for k in range(count)]
+            state['history'] = history
+        state['context'] = self.context.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Recria o acumulador a partir de to_state(), continuando de onde a última execução parou.
+        Estados antigos (só 'stats', sem 'config') viram o acumulado simples.
+        """
+        model = cls(**state.get('config', {'half_life': None, 'window': None, 'patch_carry': 1.0}))
+        stats = {int(cid): values for cid, values in state.get('stats', {}).items()}
+        model._grow(max(stats, default=0))
+        for cid, (wins, games) in stats.items():
+            model.wins[cid] = wins
+            model.games[cid] = games
+        for cid, weights in state.get('history', {}).items():
+            cid = int(cid)
+            for k, weight in enumerate(weights):
+                model.history[cid * model.window + k] = weight
+            model.history_count[cid] = len(weights)
+            model.history_head[cid] = len(weights) % model.window
+        if state.get('last_patch') is not None:
+            model.last_patch = tuple(state['last_patch'])
+        model.context.load_state(state.get('context', {}))
+        model.scale = state.get('scale', 1.0)
+        return model
 
-        # Atualiza estatísticas do time azul
-        for cid in blue_team_ids:
-            if cid not in self.stats: 
-                self.stats[cid] = {'wins': 0, 'games': 0}
-            self.stats[cid]['games'] += 1
-            if blue_won:
-                self.stats[cid]['wins'] += 1
-
-        # Atualiza estatísticas do time vermelho
-        for cid in red_team_ids:
-            if cid not in self.stats: 
-                self.stats[cid] = {'wins': 0, 'games': 0}
-            self.stats[cid]['games'] += 1
-            if not blue_won:
-                self.stats[cid]['wins'] += 1
+def _json_number(value):
+    """Contagens inteiras continuam inteiras no JSON (mesmo formato do estado antigo)."""
+    return int(value) if value.is_integer() else value
 
 # Exemplo de uso:
 # rw = RollingWinrate()
@@ -1,27 +1,74 @@
 import requests
 import sqlite3
+import gzip
+import json
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # Configurações
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 DB_PATH = os.path.join(DATA_DIR, 'lol_database.db')
 MAX_PATCHES = 50 
+LOCALE = "pt_BR"
 
-def get_versions():
+DDRAGON_BASE = os.environ.get("DDRAGON_BASE", "https://ddragon.leagueoflegends.com")
+
+# Downloads simultâneos (uma sessão com pool de conexões reaproveitadas)
+DOWNLOAD_WORKERS = 8
+# Cache em disco do championFull.json por versão: o mesmo payload nunca é baixado duas vezes
+CACHE_DIR = os.path.join(DATA_DIR, 'ddragon_cache')
+
+def create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=DOWNLOAD_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_versions(session=None):
     try:
-        url = "https://ddragon.leagueoflegends.com/api/versions.json"
-        return requests.get(url).json()[:MAX_PATCHES]
+        url = f"{DDRAGON_BASE}/api/versions.json"
+        return (session or requests).get(url, timeout=30).json()[:MAX_PATCHES]
     except Exception as e:
         print(f"Erro ao buscar versões: {e}")
         return []
 
-def init_db():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-
-    conn = sqlite3.connect(DB_PATH)
+def cache_path(version):
+    return os.path.join(CACHE_DIR, f"{version}_{LOCALE}_championFull.json.gz")
+
+def fetch_champion_data(session, version):
+    """
+    'data' do championFull.json da versão. Lê do cache em disco se existir;
+    senão baixa da CDN e grava no cache (só depois de validar o JSON).
+    Retorna (data, veio_do_cache) ou (None, False) se o download falhar.
+    """
+    path = cache_path(version)
+    if os.path.exists(path):
+        with gzip.open(path, 'rb') as f:
+            return json.loads(f.read())['data'], True
+
+    url = f"{DDRAGON_BASE}/cdn/{version}/data/{LOCALE}/championFull.json"
+    resp = session.get(url, timeout=60)
+    if resp.status_code != 200:
+        print(f"Falha no download da v{version}: {resp.status_code}")
+        return None, False
+
+    data = json.loads(resp.content)['data']
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+        f.write(resp.content)
+    os.replace(tmp_path, path)
+    return data, False
+
+def init_db(db_path=None):
+    # db_path permite montar o schema em outro banco (ex: synthetic_db.py)
+    db_path = db_path or DB_PATH
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # CORREÇÃO: Total de 27 colunas agora
@@ -132,64 +179,63 @@ def process_data(data, version, bulk_lists):
         except ValueError:
             pass # Ignora erros de conversão de ID
 
-def run():
-    # Remove o banco antigo se existir para evitar conflito de esquema
-    if os.path.exists(DB_PATH):
-        try:
-            # Tenta verificar se o schema está correto, senão apaga
-            # Para simplificar para você: apague manualmente se der erro de novo, 
-            # mas este código deve rodar liso se o arquivo não existir.
-            pass
-        except:
-            pass
+def save_version(conn, version, data):
+    bulk = {'champions': [], 'abilities': []}
+    process_data(data, version, bulk)
+
+    cursor = conn.cursor()
+    # CORREÇÃO: String com exatamente 27 '?'
+    cursor.executemany('''
+        INSERT INTO champions VALUES 
+        (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+    ''', bulk['champions'])
+    
+    cursor.executemany('''
+        INSERT INTO abilities VALUES 
+        (?,?,?,?,?,?,?,?)
+    ''', bulk['abilities'])
+    
+    conn.commit()
+    return len(bulk['champions'])
 
+def run():
     conn = init_db()
     cursor = conn.cursor()
-    versions = get_versions()
+    session = create_session()
+    versions = get_versions(session)
     
     print(f"Iniciando coleta para {len(versions)} versões...")
 
+    missing = []
     for v in versions:
         if patch_exists(cursor, v):
             print(f"Versão {v} já processada.")
-            continue
-
-        print(f"Baixando versão {v}...")
-        url = f"http://ddragon.leagueoflegends.com/cdn/{v}/data/pt_BR/championFull.json"
-        
-        try:
-            resp = requests.get(url)
-            if resp.status_code == 200:
-                data = resp.json()['data']
-                bulk = {'champions': [], 'abilities': []}
-                
-                process_data(data, v, bulk)
-                
-                # CORREÇÃO: String com exatamente 27 '?'
-                cursor.executemany('''
-                    INSERT INTO champions VALUES 
-                    (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-                ''', bulk['champions'])
-                
-                cursor.executemany('''
-                    INSERT INTO abilities VALUES 
-                    (?,?,?,?,?,?,?,?)
-                ''', bulk['abilities'])
-                
-                conn.commit()
-                print(f" -> {len(bulk['champions'])} campeões salvos.")
-            else:
-                print(f"Falha no download: {resp.status_code}")
-                
-        except Exception as e:
-            print(f"Erro crítico na v{v}: {e}")
-            # Se der erro, para o script para você ler o log
-            break 
-        
-        time.sleep(0.1)
-
+        else:
+            missing.append(v)
+
+    # Nada novo: nenhuma chamada de rede além da lista de versões
+    if missing:
+        print(f"Baixando {len(missing)} versões ({DOWNLOAD_WORKERS} em paralelo)...")
+        # Downloads em threads; a gravação fica na thread principal, na ordem das versões
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            futures = [(v, executor.submit(fetch_champion_data, session, v)) for v in missing]
+            for v, future in futures:
+                try:
+                    data, cached = future.result()
+                    if data is None:
+                        continue
+                    saved = save_version(conn, v, data)
+                    print(f" -> v{v}: {saved} campeões salvos{' (cache)' if cached else ''}.")
+                except Exception as e:
+                    print(f"Erro crítico na v{v}: {e}")
+                    # Se der erro, para o script para você ler o log
+                    for _, pending in futures:
+                        pending.cancel()
+                    break
+
+    session.close()
     conn.close()
     print("Sucesso! Banco de dados atualizado.")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
@@ -1,29 +1,79 @@
-import requests
+import asyncio
+import collections
+import json
+import multiprocessing
+import signal
 import sqlite3
-import time
 import os
+import re
 import sys 
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # --- CONFIGURAÇÕES ---
-# ⚠️ COLOQUE SUA CHAVE ABAIXO
-API_KEY = "RGAPI-8d34b713-b106-4956-9759-b47a7075d081" 
-
-REGION_API = "br1"       
-MATCH_API = "americas"   
+# ⚠️ COLOQUE SUA CHAVE ABAIXO (ou exporte RIOT_API_KEY)
+API_KEY = os.environ.get("RIOT_API_KEY", "RGAPI-8d34b713-b106-4956-9759-b47a7075d081")
+
+# Hosts da API. Sobrescreva para apontar para o mock local (crawler/mock_riot_server.py)
+RIOT_API_BASE = os.environ.get("RIOT_API_BASE", "https://{route}.api.riotgames.com")
+DDRAGON_BASE = os.environ.get("DDRAGON_BASE", "https://ddragon.leagueoflegends.com")
+
+# Plataformas coletadas em paralelo: cada uma tem sua fila, seus workers e seu rate limit.
+# Ex: ["br1", "na1", "kr"]. Tudo vai para o mesmo banco (coluna matches.region).
+PLATFORMS = ["br1"]
+
+# Host regional da match-v5 de cada plataforma (plataformas do mesmo host dividem o limite dele)
+REGIONAL_ROUTES = {
+    'br1': 'americas', 'na1': 'americas', 'la1': 'americas', 'la2': 'americas',
+    'kr': 'asia', 'jp1': 'asia',
+    'euw1': 'europe', 'eun1': 'europe', 'tr1': 'europe', 'ru': 'europe', 'me1': 'europe',
+    'oc1': 'sea', 'sg2': 'sea', 'tw2': 'sea', 'vn2': 'sea',
+}
+
+# Teto opcional da chave somando todas as plataformas (ex: "500:10"). None = só os limites por host.
+GLOBAL_RATE_LIMIT = None
 MATCHES_PER_PLAYER = 100  # Aumentado para garantir cobertura total do patch
+MATCH_IDS_PAGE = 100      # Máximo de IDs por chamada aceito pela Riot
+# Na listagem incremental, partidas em andamento na listagem anterior começaram antes dela
+LIST_OVERLAP_SECONDS = 3600
 QUEUE_TYPE = "RANKED_SOLO_5x5"
 
-# ⚠️ CONFIGURAÇÃO DE CONTINUAÇÃO
-START_INDEX = 0
+# Jogadores processados em paralelo POR PLATAFORMA. Sem sleeps fixos: o ritmo real é ditado
+# pelo rate limiter (headers X-App-Rate-Limit / X-Method-Rate-Limit da chave).
+# CONCURRENCY = 1 reproduz a coleta sequencial antiga.
+CONCURRENCY = 20
+
+# Pipeline: fetchers -> fila limitada -> pool de processos (parse) -> writer único.
+# Cada estágio é dimensionado separadamente.
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+PARSE_QUEUE_SIZE = 200  # Payloads crus aguardando parse (backpressure para os fetchers)
+
+# Minutos da timeline gravados em match_timeline_*.
+# Pode ser denso (ex: list(range(1, 41))): a agregação de eventos é feita em uma única passada.
+TIMELINE_SNAPSHOTS = [10, 20, 30]
+
+# Escrita em lote: grava a cada N partidas ou a cada T segundos (o que vier primeiro)
+WRITE_BATCH_SIZE = 50
+WRITE_FLUSH_SECONDS = 10
+
+# Guarda os JSONs crus (details + timeline) para permitir 'replay' sem rede
+ARCHIVE_RAW = True
 
 # Caminhos
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # Ajustado para rodar no diretorio atual
 if not os.path.exists(os.path.join(BASE_DIR, 'data')):
     os.makedirs(os.path.join(BASE_DIR, 'data'))
 DB_PATH = os.path.join(BASE_DIR, 'data', 'lol_database.db')
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'data', 'raw_archive')
 
-# Headers Padrão
-HEADERS = {"X-Riot-Token": API_KEY}
+try:
+    from src.process_data.crawler.riot_client import AsyncRiotClient
+    from src.process_data.crawler import work_queue as wq
+    from src.process_data.crawler.raw_archive import RawArchive, encode_record, decompress_frame
+except ImportError:
+    from crawler.riot_client import AsyncRiotClient
+    from crawler import work_queue as wq
+    from crawler.raw_archive import RawArchive, encode_record, decompress_frame
 
 def init_match_db(conn):
     """
@@ -34,6 +84,10 @@ def init_match_db(conn):
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='matches'")
     if cursor.fetchone():
         print("⚠️ Tabela 'matches' já existe. Mantendo dados atuais.")
+        # Bancos anteriores à coleta multi-região: a plataforma é o prefixo do match_id (BR1_...)
+        if wq.ensure_column(conn, 'matches', 'region', 'TEXT'):
+            cursor.execute("UPDATE matches SET region = lower(substr(match_id, 1, instr(match_id, '_') - 1))")
+            conn.commit()
         return
 
     print("🔄 Criando estrutura do banco de dados (Schema Completo)...")
@@ -44,7 +98,8 @@ def init_match_db(conn):
             match_id TEXT PRIMARY KEY,
             game_version TEXT,
             game_duration INTEGER,
-            winner_team INTEGER
+            winner_team INTEGER,
+            region TEXT
         )
     ''')
 
@@ -130,76 +185,48 @@ def init_match_db(conn):
 
 # --- UI HELPER (BARRA DE PROGRESSO) ---
 
-def print_progress(player_idx, total_players, player_name, current_match, total_matches, total_saved, status):
+def print_progress(players_done, total_players, total_saved, in_flight, status):
     """Exibe uma barra de progresso limpa que se sobrescreve."""
     
-    # Barra de progresso dos jogos do jogador atual
+    # Barra de progresso global (jogadores concluídos)
     bar_len = 15
-    if total_matches > 0:
-        filled_len = int(bar_len * current_match // total_matches)
-        pct = (current_match / total_matches) * 100
+    if total_players > 0:
+        filled_len = int(bar_len * players_done // total_players)
+        pct = (players_done / total_players) * 100
     else:
         filled_len = 0
         pct = 0
         
     bar = "█" * filled_len + "-" * (bar_len - filled_len)
     
-    # Formata a string (limitando o tamanho do nome para não quebrar linha)
-    p_name = (player_name[:10] + '..') if len(player_name) > 10 else player_name
-    
     # \r volta pro inicio, \033[K limpa o resto da linha
-    msg = f"\r[{player_idx}/{total_players}] {p_name:<12} |{bar}| {pct:.0f}% | DB: {total_saved} | {status}"
+    msg = f"\r[{players_done}/{total_players}] |{bar}| {pct:.0f}% | DB: {total_saved} | Em voo: {in_flight} | {status}"
     
     # Garante que a linha apague o texto anterior se for mais curto
     sys.stdout.write(msg + "\033[K") 
     sys.stdout.flush()
 
 # --- FUNÇÕES DE API ---
+# Cada endpoint informa sua rota (host) e uma chave de método,
+# usadas pelo rate limiter para aplicar os limites de App e de Método.
 
-def request_riot(url):
-    """Wrapper com rate limit silencioso."""
-    retries = 0
-    while retries < 5:
-        try:
-            resp = requests.get(url, headers=HEADERS)
-            
-            if resp.status_code == 200:
-                return resp.json()
-            
-            elif resp.status_code == 429:
-                retry_after = int(resp.headers.get('Retry-After', 5))
-                if retry_after > 5:
-                    print(f"\n⏳ Rate Limit! Pausa de {retry_after}s...")
-                time.sleep(retry_after)
-                retries += 1
-                continue
-                
-            elif resp.status_code == 403:
-                print(f"\n❌ ERRO 403: API Key inválida ou expirada.")
-                sys.exit(1) # Para o script se a chave for ruim
-                
-            elif resp.status_code == 404:
-                return None 
-                
-            else:
-                # Erros de servidor (500, 503)
-                time.sleep(2)
-                retries += 1
-                
-        except Exception as e:
-            time.sleep(2)
-            retries += 1
-            
-    return None
+def platform_url(platform, path):
+    return RIOT_API_BASE.format(route=platform) + path
 
-def get_current_patch_prefix():
-    data = request_riot("https://ddragon.leagueoflegends.com/api/versions.json")
+def regional_route(platform):
+    return REGIONAL_ROUTES[platform]
+
+def regional_url(platform, path):
+    return RIOT_API_BASE.format(route=regional_route(platform)) + path
+
+async def get_current_patch_prefix(client):
+    data = await client.get_json(f"{DDRAGON_BASE}/api/versions.json")
     if data:
         # Ex: "14.3.1" -> "14.3"
         return ".".join(data[0].split(".")[:2])
     return None
 
-def get_high_elo_players():
+async def get_high_elo_players(client, platform):
     """
     Busca TODOS os jogadores de Challenger, Grandmaster e Master.
     """
@@ -212,9 +239,9 @@ def get_high_elo_players():
     all_players = []
     
     for tier_name, endpoint in tiers:
-        print(f"🔍 Baixando lista de {tier_name}...")
-        url = f"https://{REGION_API}.api.riotgames.com/lol/league/v4/{endpoint}/by-queue/{QUEUE_TYPE}"
-        data = request_riot(url)
+        print(f"🔍 [{platform}] Baixando lista de {tier_name}...")
+        url = platform_url(platform, f"/lol/league/v4/{endpoint}/by-queue/{QUEUE_TYPE}")
+        data = await client.get_json(url, platform, f"league-v4.{endpoint}")
         
         if data and 'entries' in data:
             players = data['entries']
@@ -222,51 +249,87 @@ def get_high_elo_players():
             players.sort(key=lambda x: x['leaguePoints'], reverse=True)
             all_players.extend(players)
             print(f"   -> {len(players)} jogadores adicionados.")
-        
-        time.sleep(1) # Pequena pausa entre requests de liga
             
-    print(f"✅ Total de jogadores High Elo encontrados: {len(all_players)}")
+    print(f"✅ [{platform}] Total de jogadores High Elo encontrados: {len(all_players)}")
     return all_players
 
-def get_puuid(summoner_id):
-    url = f"https://{REGION_API}.api.riotgames.com/lol/summoner/v4/summoners/{summoner_id}"
-    data = request_riot(url)
+async def get_puuid(client, platform, summoner_id):
+    url = platform_url(platform, f"/lol/summoner/v4/summoners/{summoner_id}")
+    data = await client.get_json(url, platform, "summoner-v4.getBySummonerId")
     return data['puuid'] if data else None
 
-def get_match_ids(puuid, count):
-    # queue=420 é Ranked Solo/Duo
-    url = f"https://{MATCH_API}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={count}&queue=420"
-    return request_riot(url) or []
+async def get_match_ids(client, platform, puuid, count, start_time=None, stop_at=None):
+    """
+    Lista até 'count' partidas (mais nova -> mais velha), paginando com start/count.
+    start_time (epoch em segundos) pede só partidas iniciadas depois dele e stop_at
+    corta a lista na partida mais nova já conhecida, que não é incluída.
+    """
+    match_ids = []
+    start = 0
+    while len(match_ids) < count:
+        page_size = min(MATCH_IDS_PAGE, count - len(match_ids))
+        # queue=420 é Ranked Solo/Duo
+        query = f"start={start}&count={page_size}&queue=420"
+        if start_time:
+            query += f"&startTime={int(start_time)}"
+        url = regional_url(platform, f"/lol/match/v5/matches/by-puuid/{puuid}/ids?{query}")
+        page = await client.get_json(url, regional_route(platform), "match-v5.getMatchIdsByPUUID") or []
+
+        if stop_at in page:
+            match_ids.extend(page[:page.index(stop_at)])
+            break
+        match_ids.extend(page)
+        if len(page) < page_size:
+            break
+        start += page_size
+    return match_ids
+
+async def get_match_details(client, platform, match_id):
+    # JSON cru (bytes): o parse pesado acontece no pool de processos
+    url = regional_url(platform, f"/lol/match/v5/matches/{match_id}")
+    return await client.get_bytes(url, regional_route(platform), "match-v5.getMatch")
+
+async def get_match_timeline(client, platform, match_id):
+    url = regional_url(platform, f"/lol/match/v5/matches/{match_id}/timeline")
+    return await client.get_bytes(url, regional_route(platform), "match-v5.getTimeline")
 
-def get_match_details(match_id):
-    return request_riot(f"https://{MATCH_API}.api.riotgames.com/lol/match/v5/matches/{match_id}")
+# --- LÓGICA DE PERSISTÊNCIA ---
 
-def get_match_timeline(match_id):
-    return request_riot(f"https://{MATCH_API}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline")
+# Ordem de inserção das tabelas (a tabela 'matches' primeiro, por causa das FKs)
+MATCH_TABLES = [
+    'matches', 'match_teams', 'match_bans', 'match_participants',
+    'match_timeline_participants', 'match_timeline_stats'
+]
 
-def match_exists_in_db(conn, match_id):
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM matches WHERE match_id = ?", (match_id,))
-    return cursor.fetchone() is not None
+# Só a versão da partida, lida direto dos bytes: o event loop decide se a partida é do
+# patch atual sem decodificar o JSON inteiro (o parse completo fica com o pool)
+GAME_VERSION_RE = re.compile(rb'"gameVersion"\s*:\s*"([^"]*)"')
 
-# --- LÓGICA DE PERSISTÊNCIA ---
+def read_game_version(details_raw):
+    match = GAME_VERSION_RE.search(details_raw)
+    if match:
+        return match.group(1).decode()
+    return json.loads(details_raw)['info']['gameVersion']
 
-def save_match_full(details, timeline, conn):
-    cursor = conn.cursor()
+def get_patch_prefix(game_version):
+    # Ex: "14.3.571.1234" -> "14.3"
+    return ".".join(game_version.split(".")[:2])
+
+def parse_match_rows(details, timeline):
+    """
+    Converte os JSONs da Riot nas linhas de cada tabela match_*.
+    Retorna { tabela: [tuplas] }. Não toca no banco.
+    """
     info = details['info']
     match_id = details['metadata']['matchId']
-    
-    # Dupla verificação para segurança
-    if match_exists_in_db(conn, match_id): return False
+    rows = {table: [] for table in MATCH_TABLES}
 
     winner_team = 0
     for team in info['teams']:
         if team['win']: winner_team = team['teamId']
         objs = team.get('objectives', {})
         
-        cursor.execute('''
-            INSERT INTO match_teams VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        rows['match_teams'].append((
             match_id, team['teamId'], team['win'],
             objs.get('baron', {}).get('kills', 0),
             objs.get('dragon', {}).get('kills', 0),
@@ -281,11 +344,11 @@ def save_match_full(details, timeline, conn):
         ))
 
         for ban in team.get('bans', []):
-            cursor.execute('''INSERT INTO match_bans VALUES (?, ?, ?, ?)''', 
-                           (match_id, team['teamId'], ban['championId'], ban['pickTurn']))
+            rows['match_bans'].append((match_id, team['teamId'], ban['championId'], ban['pickTurn']))
 
-    cursor.execute('''INSERT INTO matches VALUES (?, ?, ?, ?)''', 
-                   (match_id, info['gameVersion'], info['gameDuration'], winner_team))
+    # Plataforma de origem (ex: 'br1'); o prefixo do match_id é o fallback
+    region = (info.get('platformId') or match_id.split('_')[0]).lower()
+    rows['matches'].append((match_id, info['gameVersion'], info['gameDuration'], winner_team, region))
 
     for p in info['participants']:
         perk_primary, perk_sub = 0, 0
@@ -294,7 +357,7 @@ def save_match_full(details, timeline, conn):
             perk_sub = p['perks']['styles'][1]['style']
         except: pass
 
-        values = (
+        rows['match_participants'].append((
             match_id, p['puuid'], p['championId'], p['teamId'], p['participantId'], p['win'],
             p['kills'], p['deaths'], p['assists'], 
             p['goldEarned'], p['goldSpent'],
@@ -309,31 +372,52 @@ def save_match_full(details, timeline, conn):
             p['totalDamageTaken'], p['damageDealtToTurrets'], p['damageSelfMitigated'],
             p['timeCCingOthers'], p['totalHeal'], p['totalUnitsHealed'],
             p.get('lane', 'NONE'), p.get('role', 'NONE')
-        )
-        
-        placeholders = ",".join(["?"] * len(values))
-        cursor.execute(f'INSERT INTO match_participants VALUES ({placeholders})', values)
+        ))
 
     if timeline:
-        _process_timeline_snapshots(match_id, timeline, conn)
+        _process_timeline_snapshots(match_id, timeline, rows)
 
-    conn.commit()
-    return True
+    return rows
 
-def _process_timeline_snapshots(match_id, timeline_data, conn):
-    cursor = conn.cursor()
+def _process_timeline_snapshots(match_id, timeline_data, rows, snapshots=None):
+    """
+    Gera as linhas de timeline em UMA passada pelos frames.
+    Os contadores de eventos (abates, torres, dragões) são acumulados enquanto
+    avançamos e um snapshot é emitido ao alcançar cada minuto alvo, então o custo
+    é linear no número de frames mesmo com snapshots densos (ex: todo minuto).
+    """
     frames = timeline_data['info']['frames']
-    snapshots = [10, 20, 30] 
-    
-    for minute in snapshots:
-        if len(frames) <= minute: continue
-        current_frame = frames[minute]
-        
-        team_stats = {100: {'gold':0, 'xp':0, 'minions':0, 'kills':0, 'towers':0, 'dragons':0},
-                      200: {'gold':0, 'xp':0, 'minions':0, 'kills':0, 'towers':0, 'dragons':0}}
+    targets = sorted(m for m in set(snapshots or TIMELINE_SNAPSHOTS) if 0 <= m < len(frames))
+    if not targets: return
+
+    # Contadores acumulados desde o minuto 0
+    events_acc = {100: {'kills':0, 'towers':0, 'dragons':0},
+                  200: {'kills':0, 'towers':0, 'dragons':0}}
+    next_target = 0
+
+    for minute, frame in enumerate(frames[:targets[-1] + 1]):
+        # Events Aggregation (incremental)
+        for event in frame['events']:
+            ev_type = event['type']
+            if ev_type == 'CHAMPION_KILL':
+                killer = event.get('killerId', 0)
+                if 1 <= killer <= 5: events_acc[100]['kills'] += 1
+                elif 6 <= killer <= 10: events_acc[200]['kills'] += 1
+            elif ev_type == 'BUILDING_KILL' and event.get('buildingType') == 'TOWER_BUILDING':
+                loser = event.get('teamId')
+                winner = 100 if loser == 200 else 200
+                events_acc[winner]['towers'] += 1
+            elif ev_type == 'ELITE_MONSTER_KILL' and event.get('monsterType') == 'DRAGON':
+                killer = event.get('killerTeamId')
+                if killer in [100, 200]: events_acc[killer]['dragons'] += 1
+
+        if minute != targets[next_target]: continue
+        next_target += 1
+
+        team_stats = {100: {'gold':0, 'xp':0, 'minions':0},
+                      200: {'gold':0, 'xp':0, 'minions':0}}
         
-        p_frames = current_frame['participantFrames']
-        for p_id_str, p_data in p_frames.items():
+        for p_id_str, p_data in frame['participantFrames'].items():
             p_id = int(p_id_str)
             # Safe check for team ID logic (participants 1-5 = 100, 6-10 = 200)
             team = 100 if p_id <= 5 else 200
@@ -342,7 +426,7 @@ def _process_timeline_snapshots(match_id, timeline_data, conn):
             p_xp = p_data['xp']
             p_minions = p_data['minionsKilled'] + p_data['jungleMinionsKilled']
             
-            cursor.execute('''INSERT INTO match_timeline_participants VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
+            rows['match_timeline_participants'].append(
                 (match_id, minute, p_id, p_gold, p_data['currentGold'], p_xp, p_data['level'],
                  p_data['minionsKilled'], p_data['jungleMinionsKilled'],
                  p_data.get('position', {}).get('x', 0), p_data.get('position', {}).get('y', 0)))
@@ -350,144 +434,463 @@ def _process_timeline_snapshots(match_id, timeline_data, conn):
             team_stats[team]['gold'] += p_gold
             team_stats[team]['xp'] += p_xp
             team_stats[team]['minions'] += p_minions
-            
-        # Events Aggregation
-        for i in range(minute + 1):
-            for event in frames[i]['events']:
-                ev_type = event['type']
-                if ev_type == 'CHAMPION_KILL':
-                    killer = event.get('killerId', 0)
-                    if 1 <= killer <= 5: team_stats[100]['kills'] += 1
-                    elif 6 <= killer <= 10: team_stats[200]['kills'] += 1
-                elif ev_type == 'BUILDING_KILL' and event.get('buildingType') == 'TOWER_BUILDING':
-                    loser = event.get('teamId')
-                    winner = 100 if loser == 200 else 200
-                    team_stats[winner]['towers'] += 1
-                elif ev_type == 'ELITE_MONSTER_KILL' and event.get('monsterType') == 'DRAGON':
-                    killer = event.get('killerTeamId')
-                    if killer in [100, 200]: team_stats[killer]['dragons'] += 1
 
         for team in [100, 200]:
             enemy = 200 if team == 100 else 100
-            cursor.execute('''INSERT INTO match_timeline_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
+            rows['match_timeline_stats'].append(
                 (match_id, minute, team, team_stats[team]['gold'], team_stats[team]['xp'], team_stats[team]['minions'],
-                 team_stats[team]['kills'], team_stats[team]['towers'], team_stats[team]['dragons'],
+                 events_acc[team]['kills'], events_acc[team]['towers'], events_acc[team]['dragons'],
                  team_stats[team]['gold'] - team_stats[enemy]['gold']))
 
-# --- LOOP PRINCIPAL ---
+# --- ESTÁGIO DE PARSE (roda nos processos do pool) ---
 
-def run():
-    patch_prefix = get_current_patch_prefix()
-    if not patch_prefix: 
-        print("❌ Erro ao detectar patch atual.")
-        return
-        
-    print(f"\n🎯 Crawler Iniciado | Foco: Patch {patch_prefix}.x Completo\n")
-    
-    conn = sqlite3.connect(DB_PATH)
-    init_match_db(conn)
-    
-    all_high_elo = get_high_elo_players()
-    if not all_high_elo: return
-    
-    # Estatísticas iniciais
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM matches")
-    total_saved = cursor.fetchone()[0]
-    
-    # Conjunto para cache rápido de memória (evita bater no DB toda hora para check)
-    # Carregando IDs já existentes para memória para performance extrema
-    print("⏳ Carregando cache de partidas existentes...")
-    cursor.execute("SELECT match_id FROM matches")
-    processed_matches = set(row[0] for row in cursor.fetchall())
-    print(f"📦 Cache carregado: {len(processed_matches)} partidas ignoradas se aparecerem novamente.")
-
-    total_players = len(all_high_elo)
-    
-    print(f"\n🚀 Iniciando coleta a partir do índice {START_INDEX}...\n")
-    
-    for i, player in enumerate(all_high_elo):
-        if i < START_INDEX:
-            continue
-            
-        p_name = player.get('summonerName', 'Anon')
-        p_idx = i + 1
-        
-        # UI Inicial do Jogador
-        print_progress(p_idx, total_players, p_name, 0, MATCHES_PER_PLAYER, total_saved, "Buscando PUUID...")
-        
+def parse_payload(details_raw, timeline_raw, archive=False):
+    """
+    Recebe os JSONs crus da Riot e devolve (match_id, patch, linhas, frame_do_arquivo).
+    Decodificar, extrair as linhas e comprimir o registro cru é todo o trabalho de CPU
+    de uma partida, e tudo acontece aqui, fora do event loop.
+    """
+    details = json.loads(details_raw)
+    timeline = json.loads(timeline_raw) if timeline_raw else None
+    match_id = details['metadata']['matchId']
+    patch = get_patch_prefix(details['info']['gameVersion'])
+    rows = parse_match_rows(details, timeline)
+    frame = encode_record(match_id, patch, details_raw, timeline_raw) if archive else None
+    return match_id, patch, rows, frame
+
+def parse_archived_frame(shard, frame):
+    """Versão do replay: descomprime um frame do arquivo cru e extrai as linhas."""
+    record = json.loads(decompress_frame(shard, frame))
+    return record['match_id'], parse_match_rows(record['details'], record['timeline'])
+
+def create_parse_pool(workers=PARSE_WORKERS):
+    # 'spawn' evita fork de um processo com threads (resolver do aiohttp, sqlite)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+def bounded_map(pool, fn, iterable, max_pending):
+    """pool.map preguiçoso: no máximo max_pending tarefas em voo, resultados na ordem de entrada."""
+    pending = collections.deque()
+    for args in iterable:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+class MatchWriter:
+    """
+    Escritor em lote das tabelas match_*.
+    Acumula as linhas já parseadas de várias partidas e grava tudo com
+    executemany em UMA transação (um único fsync por lote, não por partida).
+    O lote é gravado ao atingir batch_size partidas ou flush_seconds de idade.
+
+    on_flush(conn, match_ids) roda dentro da mesma transação, o que permite
+    marcar as partidas como concluídas na fila de forma atômica com os dados.
+    Com um RawArchive, o JSON cru de cada partida também é arquivado e o
+    arquivo vai ao disco antes do commit do lote.
+    """
+    def __init__(self, conn, batch_size=WRITE_BATCH_SIZE, flush_seconds=WRITE_FLUSH_SECONDS, on_flush=None, archive=None):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.on_flush = on_flush
+        self.archive = archive
+        self._reset()
+
+    def _reset(self):
+        self.buffer = {table: [] for table in MATCH_TABLES}
+        self.match_ids = []
+        self.first_added_at = None
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    def add_rows(self, match_id, rows, patch=None, frame=None):
+        """
+        Enfileira as linhas de uma partida; grava o lote se ele encheu.
+        frame é o registro cru já comprimido (parse_payload) para o arquivo.
+        """
+        if self.archive and frame is not None:
+            self.archive.append_frame(match_id, patch, frame)
+        if self.first_added_at is None:
+            self.first_added_at = time.monotonic()
+        self.match_ids.append(match_id)
+        for table in MATCH_TABLES:
+            self.buffer[table].append(rows[table])
+        if len(self.match_ids) >= self.batch_size:
+            return self.flush()
+        return 0
+
+    def add(self, details, timeline):
+        match_id = details['metadata']['matchId']
+        if self.archive:
+            self.archive.append(match_id, get_patch_prefix(details['info']['gameVersion']), details, timeline)
+        return self.add_rows(match_id, parse_match_rows(details, timeline))
+
+    def flush_if_due(self):
+        if self.first_added_at is not None and time.monotonic() - self.first_added_at >= self.flush_seconds:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """Grava o lote atual. Retorna quantas partidas NOVAS foram salvas."""
+        if not self.match_ids:
+            return 0
+
+        cursor = self.conn.cursor()
+        # Dupla verificação para segurança: partidas que já existem são descartadas do lote
+        existing = set()
+        for i in range(0, len(self.match_ids), 500):
+            chunk = self.match_ids[i:i + 500]
+            cursor.execute(f"SELECT match_id FROM matches WHERE match_id IN ({','.join('?' * len(chunk))})", chunk)
+            existing.update(r[0] for r in cursor.fetchall())
+
+        saved = 0
+        seen = set()
+        table_rows = {table: [] for table in MATCH_TABLES}
+        for idx, match_id in enumerate(self.match_ids):
+            if match_id in existing or match_id in seen:
+                continue
+            seen.add(match_id)
+            saved += 1
+            for table in MATCH_TABLES:
+                table_rows[table].extend(self.buffer[table][idx])
+
+        try:
+            if self.archive:
+                self.archive.flush()
+            for table in MATCH_TABLES:
+                if table_rows[table]:
+                    placeholders = ",".join(["?"] * len(table_rows[table][0]))
+                    cursor.executemany(f"INSERT INTO {table} VALUES ({placeholders})", table_rows[table])
+            if self.on_flush:
+                self.on_flush(self.conn, self.match_ids)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self._reset()
+        return saved
+
+# --- LOOP PRINCIPAL (ASSÍNCRONO) ---
+
+class CrawlState:
+    """Contadores compartilhados entre os workers do event loop (o estado durável fica na CrawlQueue)."""
+    def __init__(self, total_saved, total_players):
+        self.in_flight = 0
+        self.total_saved = total_saved
+        self.total_players = total_players
+        self.players_done = 0
+
+    def report(self, status):
+        print_progress(self.players_done, self.total_players, self.total_saved, self.in_flight, status)
+
+async def crawl_match(client, payloads, queue, player_key, m_id, list_pos, patch_prefix, state):
+    """
+    Baixa uma partida e entrega os JSONs crus ao estágio de parse.
+    Retorna False quando a partida é de um patch antigo (o jogador pode parar).
+    """
+    # Já salva ou sendo baixada por OUTRO jogador neste momento.
+    # Não paramos o loop: as próximas partidas dele ainda podem ser novas.
+    if not queue.claim_match(m_id):
+        return True
+
+    state.in_flight += 1
+    try:
+        details_raw = await get_match_details(client, queue.platform, m_id)
+        if not details_raw:
+            queue.mark_match(m_id, wq.MATCH_FAILED, "download")
+            state.report(f"Erro Download ({m_id})")
+            return True
+
+        game_version = read_game_version(details_raw)
+
+        # VERIFICAÇÃO CRÍTICA DO PATCH
+        if not game_version.startswith(patch_prefix):
+            # Como a lista é ordenada, TODAS as próximas também serão antigas.
+            queue.mark_old_patch(player_key, m_id, list_pos)
+            state.report(f"Patch Antigo ({game_version})")
+            return False
+
+        # É do patch atual -> Baixa Timeline e Salva
+        timeline_raw = await get_match_timeline(client, queue.platform, m_id)
+
+        # Fila limitada: se o parse/escrita atrasar, os fetchers esperam aqui.
+        # A partida segue 'em voo' até o writer gravar o lote e marcá-la como 'done'.
+        await payloads.put((m_id, details_raw, timeline_raw))
+        state.report("Baixada!")
+
+    except Exception as e:
+        queue.mark_match(m_id, wq.MATCH_FAILED, str(e)[:200])
+        state.report(f"Erro: {str(e)[:10]}")
+    finally:
+        state.in_flight -= 1
+    return True
+
+async def crawl_player(client, payloads, queue, player, patch_prefix, state):
+    player_key = player['player_key']
+
+    if player['state'] == wq.PLAYER_PENDING:
         # 1. PUUID
-        puuid = None
-        if 'puuid' in player: puuid = player['puuid']
-        elif 'summonerId' in player:
-            time.sleep(0.1) # Pequeno delay
-            puuid = get_puuid(player['summonerId'])
-            
+        puuid = player.get('puuid')
+        if not puuid and player.get('summonerId'):
+            puuid = await get_puuid(client, queue.platform, player['summonerId'])
+            if puuid:
+                queue.set_player_puuid(player_key, puuid, player['summonerId'])
+
         if not puuid:
-            print_progress(p_idx, total_players, p_name, 0, MATCHES_PER_PLAYER, total_saved, "Erro PUUID")
-            continue
-        
-        # 2. Lista de Partidas
-        print_progress(p_idx, total_players, p_name, 0, MATCHES_PER_PLAYER, total_saved, "Listando Partidas...")
-        time.sleep(0.5) 
-        match_ids = get_match_ids(puuid, count=MATCHES_PER_PLAYER)
+            queue.set_player_state(player_key, wq.PLAYER_FAILED)
+            state.report("Erro PUUID")
+            return
+
+        # 2. Lista de Partidas (persistida: um reinício não pede a lista de novo).
+        # Jogador já listado antes: só as páginas mais novas que a última listagem.
+        cached = queue.get_list_cache(puuid)
+        if cached:
+            newest_match_id, listed_at = cached
+            match_ids = await get_match_ids(client, queue.platform, puuid, count=MATCHES_PER_PLAYER,
+                                            start_time=listed_at - LIST_OVERLAP_SECONDS, stop_at=newest_match_id)
+        else:
+            match_ids = await get_match_ids(client, queue.platform, puuid, count=MATCHES_PER_PLAYER)
+        queue.enqueue_matches(player_key, match_ids, puuid=puuid, games=player.get('games'), prepend=cached is not None)
+
+    # 3. Processamento das Partidas
+    # Dentro do jogador a ordem é sequencial (mais nova -> mais velha) para
+    # podermos parar no primeiro patch antigo; o paralelismo vem dos vários jogadores.
+    for m_id, list_pos in queue.pending_matches(player_key):
+        if not await crawl_match(client, payloads, queue, player_key, m_id, list_pos, patch_prefix, state):
+            break
+
+    # As partidas ainda podem estar nas filas de parse/escrita: se o processo cair
+    # antes do writer gravá-las, o recover() devolve o jogador para 'listed'
+    queue.set_player_state(player_key, wq.PLAYER_DONE)
+
+async def crawl_worker(client, payloads, queue, players, patch_prefix, state):
+    while True:
+        player = await players.get()
+        try:
+            await crawl_player(client, payloads, queue, player, patch_prefix, state)
+        except Exception as e:
+            # O jogador continua 'pending'/'listed' e será retomado na próxima execução
+            state.report(f"Erro jogador: {str(e)[:10]}")
+        finally:
+            state.players_done += 1
+            state.report(f"{(player.get('summonerName') or 'Anon')[:12]} concluído")
+            players.task_done()
+
+async def parse_worker(pool, payloads, parsed, queue, state, archive):
+    """Leva um payload por vez ao pool de processos (um por processo mantém todos ocupados)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        m_id, details_raw, timeline_raw = await payloads.get()
+        try:
+            result = await loop.run_in_executor(pool, parse_payload, details_raw, timeline_raw, archive)
+            await parsed.put(result)
+        except Exception as e:
+            queue.mark_match(m_id, wq.MATCH_FAILED, str(e)[:200])
+            state.report(f"Erro Parse: {str(e)[:10]}")
+        finally:
+            payloads.task_done()
+
+async def write_worker(writer, parsed, state):
+    """Único dono das escritas em match_*: junta as linhas parseadas em lotes."""
+    while True:
+        match_id, patch, rows, frame = await parsed.get()
+        try:
+            state.total_saved += writer.add_rows(match_id, rows, patch, frame)
+        except Exception as e:
+            # O lote fica 'em voo' na fila e volta como 'pending' no próximo recover()
+            state.report(f"Erro Salvar: {str(e)[:10]}")
+        finally:
+            parsed.task_done()
+
+async def periodic_flush(writer, state):
+    """Garante que um lote parado não espere mais que WRITE_FLUSH_SECONDS para ir ao disco."""
+    while True:
+        await asyncio.sleep(1)
+        state.total_saved += writer.flush_if_due()
+
+async def start_platform(client, queue, patch_prefix):
+    """Abre (ou retoma) a varredura de uma plataforma. Retorna os jogadores que ainda têm trabalho."""
+    recovered = queue.recover()
+    if recovered:
+        print(f"♻️ [{queue.platform}] {recovered} partidas interrompidas voltaram para a fila.")
+
+    # Retomada: se a varredura deste patch não terminou, a lista de jogadores já está no banco
+    if queue.needs_new_sweep(patch_prefix):
+        all_high_elo = await get_high_elo_players(client, queue.platform)
+        if not all_high_elo:
+            return None
+        queue.start_sweep(patch_prefix, all_high_elo)
+        unchanged = queue.count_unchanged_players()
+        if unchanged:
+            print(f"💤 [{queue.platform}] {unchanged} jogadores sem partidas novas desde a última listagem.")
+    else:
+        print(f"⏯️ [{queue.platform}] Retomando varredura anterior (sem chamadas de listagem).")
+
+    to_process = queue.players_to_process()
+    print(f"🚀 [{queue.platform}] {len(to_process)} jogadores restantes | Fila: {queue.stats()}")
+    return to_process
+
+async def crawl(pool, platforms=None):
+    platforms = platforms or PLATFORMS
+    unknown = [p for p in platforms if p not in REGIONAL_ROUTES]
+    if unknown:
+        print(f"❌ Plataformas desconhecidas: {', '.join(unknown)}")
+        return
+
+    async with AsyncRiotClient(API_KEY, max_connections=CONCURRENCY * 2 * len(platforms),
+                               global_limits=GLOBAL_RATE_LIMIT) as client:
+        patch_prefix = await get_current_patch_prefix(client)
+        if not patch_prefix: 
+            print("❌ Erro ao detectar patch atual.")
+            return
+            
+        print(f"\n🎯 Crawler Iniciado | Foco: Patch {patch_prefix}.x Completo | Plataformas: {', '.join(platforms)} | "
+              f"Fetch: {CONCURRENCY}/plataforma | Parse: {PARSE_WORKERS}\n")
         
-        if not match_ids: continue
+        conn = sqlite3.connect(DB_PATH)
+        # WAL: commits sem fsync completo e leitores (ex: orquestrador) não bloqueiam o crawler
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        init_match_db(conn)
+        queues = [wq.CrawlQueue(conn, platform) for platform in platforms]
+        archive = RawArchive(ARCHIVE_DIR) if ARCHIVE_RAW else None
+        # mark_done_many é por match_id: qualquer fila serve, todas dividem a conexão
+        writer = MatchWriter(conn, on_flush=lambda c, ids: queues[0].mark_done_many(ids), archive=archive)
+
+        # Listagens das plataformas em paralelo (cada uma no seu host / rate limit)
+        listings = await asyncio.gather(*(start_platform(client, q, patch_prefix) for q in queues))
+        active = [(q, to_process) for q, to_process in zip(queues, listings) if to_process is not None]
+        if not active:
+            conn.close()
+            return
         
-        # 3. Processamento das Partidas
-        for m_idx, m_id in enumerate(match_ids):
-            current_status = ""
-            stop_player = False
-            
-            # Passo A: Verifica Cache (Memória + DB)
-            if m_id in processed_matches:
-                current_status = "Já existe"
-                # Não paramos o loop aqui, pois o jogador pode ter jogado uma partida NOVA
-                # que já foi baixada por OUTRO jogador, mas ainda precisamos checar se
-                # as próximas partidas dele são antigas ou novas.
-                # Como a lista vem ordenada cronologicamente (mais nova -> mais velha),
-                # se já existe, provavelmente é do patch atual. Continuamos verificando.
-            else:
-                # Passo B: Download Real
-                time.sleep(1.2) # Respeitando Rate Limit (100 reqs/2 min = ~0.83 reqs/seg)
-                details = get_match_details(m_id)
-                
-                if details:
-                    try:
-                        game_version = details['info']['gameVersion']
-                        
-                        # VERIFICAÇÃO CRÍTICA DO PATCH
-                        if game_version.startswith(patch_prefix):
-                            # É do patch atual -> Baixa Timeline e Salva
-                            time.sleep(1.2)
-                            timeline = get_match_timeline(m_id)
-                            
-                            if save_match_full(details, timeline, conn):
-                                total_saved += 1
-                                processed_matches.add(m_id) # Adiciona ao cache
-                                current_status = "Salvo!"
-                            else:
-                                current_status = "Erro Salvar"
-                                
-                        else:
-                            # Encontrou partida de patch antigo
-                            # Como a lista é ordenada, TODAS as próximas também serão antigas.
-                            current_status = f"Patch Antigo ({game_version})"
-                            stop_player = True # Pula para o próximo jogador
-                            
-                    except Exception as e:
-                        current_status = f"Erro: {str(e)[:10]}"
-                else:
-                    current_status = "Erro Download"
-                
-            # Atualiza Barra
-            print_progress(p_idx, total_players, p_name, m_idx + 1, len(match_ids), total_saved, current_status)
-            
-            if stop_player:
-                break
+        # Estatísticas iniciais
+        total_saved = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        total_players = sum(q.count_players() for q, _ in active)
+        state = CrawlState(total_saved, total_players)
+        state.players_done = total_players - sum(len(to_process) for _, to_process in active)
+        print()
+
+        # SIGTERM cancela a coleta como o Ctrl+C; o finally abaixo grava o lote pendente
+        loop = asyncio.get_running_loop()
+        main_task = asyncio.current_task()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, main_task.cancel)
+        except (NotImplementedError, AttributeError):
+            pass # Windows
+
+        payloads = asyncio.Queue(maxsize=PARSE_QUEUE_SIZE)
+        parsed = asyncio.Queue(maxsize=PARSE_QUEUE_SIZE)
+
+        # Um conjunto de workers por plataforma; parse e escrita são compartilhados
+        player_queues = []
+        workers = []
+        for queue, to_process in active:
+            players = asyncio.Queue()
+            for player in to_process:
+                players.put_nowait(player)
+            player_queues.append(players)
+            workers += [
+                asyncio.create_task(crawl_worker(client, payloads, queue, players, patch_prefix, state))
+                for _ in range(CONCURRENCY)
+            ]
+        workers += [
+            asyncio.create_task(parse_worker(pool, payloads, parsed, queues[0], state, archive is not None))
+            for _ in range(PARSE_WORKERS)
+        ]
+        workers.append(asyncio.create_task(write_worker(writer, parsed, state)))
+        workers.append(asyncio.create_task(periodic_flush(writer, state)))
+        try:
+            # Drena os estágios em ordem: downloads -> parse -> escrita
+            await asyncio.gather(*(players.join() for players in player_queues))
+            await payloads.join()
+            await parsed.join()
+            state.total_saved += writer.flush()
+            for queue, _ in active:
+                queue.finish_sweep()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if len(writer):
+                print(f"\n💾 Gravando lote pendente ({len(writer)} partidas)...")
+                state.total_saved += writer.flush()
+            if archive:
+                archive.close()
+            conn.close()
+
+        print(f"\n\n🏁 Coleta finalizada. Total no banco: {state.total_saved}")
+        return client.stats
+
+def run(platforms=None):
+    # O pool nasce antes do event loop e é compartilhado por toda a coleta
+    with create_parse_pool() as pool:
+        asyncio.run(crawl(pool, platforms))
+
+# --- REPLAY (OFFLINE) ---
+
+MATCH_DATA_TABLES = [
+    'match_timeline_participants', 'match_timeline_stats',
+    'match_participants', 'match_bans', 'match_teams', 'matches'
+]
+
+def replay(patches=None, rebuild=False, batch_size=1000, workers=PARSE_WORKERS):
+    """
+    Reconstrói as tabelas match_* a partir do arquivo cru, sem nenhuma chamada de rede.
+    rebuild=True apaga as tabelas antes (necessário após mudar o schema/colunas).
+    O processo principal só lê os frames em sequência e grava os lotes;
+    descompressão e parse rodam em 'workers' processos.
+    """
+    start_time = time.time()
+    archive = RawArchive(ARCHIVE_DIR)
+    total = archive.count(patches)
+    print(f"📼 Replay de {total} partidas do arquivo ({', '.join(patches) if patches else 'todos os patches'})...")
 
-    conn.close()
-    print(f"\n\n🏁 Coleta finalizada. Total no banco: {total_saved}")
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if rebuild:
+        print("🧹 Apagando tabelas match_*...")
+        for table in MATCH_DATA_TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.commit()
+    init_match_db(conn)
+
+    writer = MatchWriter(conn, batch_size=batch_size, flush_seconds=float('inf'))
+    saved = 0
+    try:
+        with create_parse_pool(workers) as pool:
+            frames = ((shard, frame) for _, shard, frame in archive.iter_frames(patches))
+            results = bounded_map(pool, parse_archived_frame, frames, max_pending=workers * 16)
+            for i, (match_id, rows) in enumerate(results, 1):
+                saved += writer.add_rows(match_id, rows)
+                if i % 1000 == 0:
+                    sys.stdout.write(f"\r   {i}/{total} lidas | {saved} novas gravadas\033[K")
+                    sys.stdout.flush()
+        saved += writer.flush()
+    finally:
+        archive.close()
+        conn.close()
+
+    print(f"\n✅ Replay concluído: {saved} partidas gravadas em {time.time() - start_time:.2f}s")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawler de partidas High Elo")
+    sub = parser.add_subparsers(dest="command")
+    p_crawl = sub.add_parser("crawl", help="Coleta partidas na Riot API (padrão)")
+    p_crawl.add_argument("--platform", action="append", help=f"Plataforma a coletar (padrão: {','.join(PLATFORMS)}). Pode repetir.")
+    p_replay = sub.add_parser("replay", help="Reconstrói as tabelas match_* a partir do arquivo cru")
+    p_replay.add_argument("--patch", action="append", help="Patch a reprocessar (ex: 14.3). Pode repetir.")
+    p_replay.add_argument("--rebuild", action="store_true", help="Apaga as tabelas match_* antes do replay")
+    p_replay.add_argument("--workers", type=int, default=PARSE_WORKERS, help="Processos de parse")
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        replay(patches=args.patch, rebuild=args.rebuild, workers=args.workers)
+    else:
+        run(platforms=getattr(args, 'platform', None))
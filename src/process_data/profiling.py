@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# resource só existe em Unix: sem ele o pico de RSS do processo não é reportado
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROFILE_PATH = os.path.join(BASE_DIR, 'data', 'feature_profile.json')
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (MB), ou None se não disponível."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class StageProfiler:
+    """
+    Tempo acumulado, número de chamadas e pico de memória por estágio.
+
+        profiler = StageProfiler()
+        with profiler.stage('roles'):
+            ...
+
+    trace_memory=True liga o tracemalloc e mede o pico de memória alocada dentro de
+    cada estágio (estágios aninhados contam no pico do estágio de fora). Deixa o
+    código bem mais lento, então é opcional; sem ele só o pico de RSS do processo
+    é registrado.
+
+    Cada processo worker tem o seu profiler; os resultados voltam como dict
+    (to_dict) e são somados no processo principal com merge.
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.peak_rss_mb = None
+        self._stack = []
+        self._owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        """Desliga o tracemalloc, se foi este profiler que o ligou."""
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def _entry(self, name):
+        if name not in self.stages:
+            self.stages[name] = {'seconds': 0.0, 'calls': 0, 'peak_mb': 0.0}
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._stack.append([current, 0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = self._entry(name)
+            entry['seconds'] += elapsed
+            entry['calls'] += 1
+            if self.trace_memory:
+                base, nested_peak = self._stack.pop()
+                peak = max(nested_peak, tracemalloc.get_traced_memory()[1])
+                entry['peak_mb'] = max(entry['peak_mb'], (peak - base) / (1024 * 1024))
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+
+    def to_dict(self):
+        return {'stages': self.stages, 'peak_rss_mb': peak_rss_mb()}
+
+    def merge(self, profile):
+        """Soma o resultado de outro profiler (ex: de um worker) neste."""
+        for name, stats in profile['stages'].items():
+            entry = self._entry(name)
+            entry['seconds'] += stats['seconds']
+            entry['calls'] += stats['calls']
+            entry['peak_mb'] = max(entry['peak_mb'], stats['peak_mb'])
+        if profile.get('peak_rss_mb') is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, profile['peak_rss_mb'])
+
+    def report(self, total_seconds, matches, workers=1):
+        """Resumo da execução: tempo total, partidas/s e estágios ordenados pelo tempo acumulado."""
+        rss_values = [v for v in (self.peak_rss_mb, peak_rss_mb()) if v is not None]
+        rss = max(rss_values) if rss_values else None
+        stage_total = sum(s['seconds'] for s in self.stages.values()) or 1.0
+        stages = {
+            name: {**stats, 'seconds': round(stats['seconds'], 4), 'peak_mb': round(stats['peak_mb'], 2),
+                   'share': round(stats['seconds'] / stage_total, 4)}
+            for name, stats in sorted(self.stages.items(), key=lambda item: -item[1]['seconds'])
+        }
+        return {
+            'total_seconds': round(total_seconds, 3),
+            'matches': matches,
+            'matches_per_second': round(matches / total_seconds, 2) if total_seconds > 0 else None,
+            'workers': workers,
+            'trace_memory': self.trace_memory,
+            'peak_rss_mb': round(rss, 1) if rss is not None else None,
+            'stages': stages,
+        }
+
+    def print_summary(self, report):
+        print(f"\n⏱️ Perfil por estágio ({report['matches']} partidas, {report['matches_per_second']} partidas/s):")
+        # Estágios dos workers somam o tempo de todos os processos
+        for name, stats in report['stages'].items():
+            memory = f" | pico {stats['peak_mb']:.2f} MB" if self.trace_memory else ""
+            print(f"   {name:<28} {stats['seconds']:>9.2f}s {stats['share']:>6.1%} | {stats['calls']:>8} chamadas{memory}")
+        if report['peak_rss_mb'] is not None:
+            print(f"   Pico de RSS: {report['peak_rss_mb']:.0f} MB")
+
+    def export(self, report, path=PROFILE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Perfil salvo em {path}")
@@ -0,0 +1,405 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from src.process_data.fetch_high_elo_matches import init_match_db, MATCH_TABLES, TIMELINE_SNAPSHOTS
+    from src.process_data.fetch_champions import init_db as init_champions_db, save_version
+    from src.process_data.extract_features import load_data, apply_keywords, save_features
+    from src.process_data.features.role_fixer import ROLE_WEIGHTS, REQUIRED_ROLES
+    from src.process_data.features.damage_profile import SPECIAL_CASES
+except ImportError:
+    from fetch_high_elo_matches import init_match_db, MATCH_TABLES, TIMELINE_SNAPSHOTS
+    from fetch_champions import init_db as init_champions_db, save_version
+    from extract_features import load_data, apply_keywords, save_features
+    from features.role_fixer import ROLE_WEIGHTS, REQUIRED_ROLES
+    from features.damage_profile import SPECIAL_CASES
+
+# Gera um banco com o MESMO schema do crawler (init_match_db) e do fetch_champions (init_db),
+# preenchido com partidas sintéticas, para medir orquestrador / auditoria / treino em escala
+# sem rede. champion_features sai do próprio extract_features, a partir das habilidades geradas.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'data', 'synthetic_database.db')
+
+BATCH_MATCHES = 10000        # Partidas geradas e gravadas por transação
+BASE_MATCH_ID = 3000000000   # Mesmo espaço de IDs do mock da Riot API
+BLUE_SIDE_EDGE = 0.04        # Vantagem (logit) do lado azul, ~51% de vitórias
+
+# (lane, role) que a Riot grava para cada posição; com lane_noise, parte vem errada/NONE
+LANE_LABELS = {
+    'TOP': ('TOP', 'SOLO'), 'JUNGLE': ('JUNGLE', 'NONE'), 'MIDDLE': ('MIDDLE', 'SOLO'),
+    'BOTTOM': ('BOTTOM', 'CARRY'), 'UTILITY': ('BOTTOM', 'SUPPORT'),
+}
+
+# Segundo feitiço por posição (o outro é Flash) e a probabilidade de cada um
+FLASH = 4
+ROLE_SPELLS = {
+    'TOP':     {12: 0.55, 14: 0.30, 6: 0.15},            # TP, Ignite, Ghost
+    'JUNGLE':  {11: 1.0},                                # Smite
+    'MIDDLE':  {12: 0.45, 14: 0.40, 21: 0.10, 6: 0.05},  # TP, Ignite, Barrier, Ghost
+    'BOTTOM':  {7: 0.75, 21: 0.15, 1: 0.10},             # Heal, Barrier, Cleanse
+    'UTILITY': {14: 0.45, 3: 0.40, 7: 0.15},             # Ignite, Exhaust, Heal
+}
+
+# Itens: um item de suporte / pet de jungle por posição + itens completos comuns
+SUPPORT_ITEMS = [3865, 3866, 3867, 3869, 3870, 3871, 3876, 3877]
+JUNGLE_PETS = [1101, 1102, 1103]
+TRINKETS = [3340, 3363, 3364]
+ITEM_POOL = [
+    3031, 3153, 3071, 6672, 3087, 3094, 3006, 3047, 3111, 3020, 3157, 3089, 3135, 3068, 3075,
+    3143, 6653, 4645, 3116, 3742, 6333, 3074, 3078, 3161, 3142, 6691, 3814, 3036, 3046, 3085,
+]
+PERK_STYLES = [8000, 8100, 8200, 8300, 8400]
+
+# Ouro / XP / farm por minuto de cada posição (ordem de REQUIRED_ROLES)
+ROLE_GOLD_PER_MIN = [380, 340, 390, 400, 250]
+ROLE_XP_PER_MIN = [450, 380, 470, 400, 300]
+ROLE_CS_PER_MIN = [7.0, 0.5, 7.5, 8.0, 1.0]
+ROLE_JUNGLE_CS_PER_MIN = [0.2, 5.5, 0.3, 0.1, 0.0]
+
+# Classes (tag principal) e o perfil de stats / textos de habilidade de cada uma
+CLASS_FREQ = {'Fighter': 0.28, 'Mage': 0.22, 'Tank': 0.14, 'Marksman': 0.14, 'Assassin': 0.12, 'Support': 0.10}
+SECONDARY_TAGS = {
+    'Fighter': ['Tank', 'Assassin'], 'Mage': ['Support', 'Assassin'], 'Tank': ['Fighter', 'Support'],
+    'Marksman': ['Mage', 'Assassin'], 'Assassin': ['Fighter', 'Mage'], 'Support': ['Mage', 'Tank'],
+}
+RANGED_CLASSES = {'Mage', 'Marksman', 'Support'}
+
+# Stats base (min, max); tanques ganham vida/armadura, atiradores e magos perdem
+STAT_RANGES = {
+    'hp': (560, 690), 'hpperlevel': (85, 115), 'mp': (280, 500), 'mpperlevel': (25, 60),
+    'movespeed': (325, 350), 'armor': (18, 40), 'armorperlevel': (3.5, 5.2),
+    'spellblock': (28, 32), 'spellblockperlevel': (1.3, 2.1),
+    'hpregen': (3, 9), 'hpregenperlevel': (0.5, 1.0), 'mpregen': (6, 11), 'mpregenperlevel': (0.4, 0.8),
+    'crit': (0, 0), 'attackdamage': (50, 70), 'attackdamageperlevel': (2.5, 4.0),
+    'attackspeedperlevel': (1.5, 3.5), 'attackspeed': (0.6, 0.7),
+}
+CLASS_DURABILITY = {'Tank': 1.08, 'Fighter': 1.03, 'Assassin': 0.97, 'Mage': 0.94, 'Marksman': 0.93, 'Support': 0.95}
+
+# Trechos (PT-BR) com as palavras-chave do extract_features, por classe
+CLASS_PHRASES = {
+    'Fighter': ['avança na direção do alvo', 'regenera vida', 'causa dano baseado na vida máxima', 'lentidão'],
+    'Mage': ['atordoa os inimigos atingidos', 'causa lentidão em área', 'invoca uma torre', 'silêncio'],
+    'Tank': ['arremessa os inimigos ao ar', 'ganha um escudo', 'provoca os inimigos próximos', 'puxa o alvo',
+             'fica imortal por alguns segundos'],
+    'Marksman': ['bônus de velocidade de movimento', 'desliza para trás', 'acúmulos permanentemente', 'lentidão'],
+    'Assassin': ['fica invisível', 'transloca para trás do alvo', 'executa inimigos abaixo de 20% de vida',
+                 'dano verdadeiro'],
+    'Support': ['restaura vida dos aliados', 'concede um escudo', 'enraíza o inimigo', 'puxa um aliado'],
+}
+FILLER_PHRASES = ['causa dano físico aos inimigos', 'causa dano mágico em área', 'aumenta a velocidade de ataque',
+                  'reduz a armadura do alvo', 'ataque básico fortalecido']
+
+def patch_versions(n_patches):
+    """Patches consecutivos no formato do jogo ('14.23', '14.24', '15.1', ...)."""
+    patches = []
+    major, minor = 15, 1
+    for _ in range(n_patches):
+        patches.append(f"{major}.{minor}")
+        minor += 1
+        if minor > 24:
+            major, minor = major + 1, 1
+    return patches
+
+# --- CAMPEÕES ---
+
+class ChampionPool:
+    """
+    Campeões sintéticos: tags, stats por patch, força escondida (que decide as
+    vitórias, então os winrates têm sinal) e o peso de cada campeão em cada posição.
+    """
+    def __init__(self, n_champions, n_patches, rng):
+        self.keys = np.arange(1, n_champions + 1)
+        special = list(SPECIAL_CASES) + ['Blitzcrank', 'Thresh', 'Garen', 'Ezreal', 'Zed']
+        self.names = [special[i] if i < len(special) else f"Campeao{k}" for i, k in enumerate(self.keys)]
+
+        classes = list(CLASS_FREQ)
+        primary = rng.choice(len(classes), size=n_champions, p=list(CLASS_FREQ.values()))
+        self.tags = []
+        for idx in primary:
+            tags = [classes[idx]]
+            if rng.random() < 0.6:
+                tags.append(SECONDARY_TAGS[classes[idx]][rng.integers(2)])
+            self.tags.append(tags)
+
+        # Peso na posição = popularidade x afinidade das tags (pesos do role_fixer)
+        popularity = rng.lognormal(0.0, 0.8, size=n_champions)
+        self.role_weights = []
+        for role in REQUIRED_ROLES:
+            affinity = np.array([sum(ROLE_WEIGHTS[role].get(t, 0) for t in tags) for tags in self.tags]) ** 2
+            weights = popularity * (affinity + 0.01)
+            self.role_weights.append(weights / weights.sum())
+
+        # Força por patch: base do campeão + ajustes de balanceamento a cada patch
+        self.strength = rng.normal(0.0, 0.15, size=n_champions) + rng.normal(0.0, 0.05, size=(n_patches, n_champions))
+        self.stat_scale = 1 + rng.normal(0.0, 0.03, size=(n_patches, n_champions)) * (rng.random((n_patches, n_champions)) < 0.1)
+        self.base_stats = {stat: rng.uniform(lo, hi, size=n_champions) for stat, (lo, hi) in STAT_RANGES.items()}
+        self.spell_texts = [self._spell_texts(tags, rng) for tags in self.tags]
+
+    @staticmethod
+    def _spell_texts(tags, rng):
+        phrases = [p for t in tags for p in CLASS_PHRASES[t]]
+        texts = []
+        for _ in range(4):
+            picked = [phrases[i] for i in rng.choice(len(phrases), size=rng.integers(1, 3), replace=False)]
+            picked.append(FILLER_PHRASES[rng.integers(len(FILLER_PHRASES))])
+            texts.append(". ".join(picked).capitalize() + ".")
+        return texts
+
+    def ddragon_data(self, patch_idx):
+        """'data' no formato do championFull.json (o que fetch_champions.save_version espera)."""
+        data = {}
+        for i, key in enumerate(self.keys):
+            tags = self.tags[i]
+            stats = {stat: float(values[i]) for stat, values in self.base_stats.items()}
+            durability = CLASS_DURABILITY[tags[0]] * self.stat_scale[patch_idx, i]
+            for stat in ('hp', 'hpperlevel', 'armor', 'armorperlevel'):
+                stats[stat] = round(stats[stat] * durability, 3)
+            stats['attackrange'] = 550.0 if tags[0] in RANGED_CLASSES else 150.0
+            stats['attackdamage'] = round(stats['attackdamage'] * self.stat_scale[patch_idx, i], 3)
+            data[f"Champ{key}"] = {
+                'key': str(key), 'name': self.names[i], 'title': 'Campeão sintético', 'tags': tags,
+                'partype': 'Mana',
+                'passive': {'name': 'Passiva', 'description': self.spell_texts[i][0]},
+                'stats': stats,
+                'spells': [{'name': f"{slot} {self.names[i]}", 'description': text,
+                            'cooldownBurn': '10', 'costBurn': '50', 'rangeBurn': '600'}
+                           for slot, text in zip('QWER', self.spell_texts[i])],
+            }
+        return data
+
+# --- PARTIDAS (vetorizado por lote) ---
+
+def _sample(rng, options, n):
+    """n sorteios de um dict {valor: probabilidade}."""
+    values = np.array(list(options))
+    return values[rng.choice(len(values), size=n, p=list(options.values()))]
+
+def _pick_champions(pool, rng, n):
+    """Matriz (n x 10): 5 azuis + 5 vermelhos na ordem de REQUIRED_ROLES, sem campeão repetido na partida."""
+    picks = np.empty((n, 10), dtype=np.int64)
+    todo = np.arange(n)
+    while len(todo):
+        for slot in range(10):
+            weights = pool.role_weights[slot % 5]
+            picks[todo, slot] = rng.choice(len(weights), size=len(todo), p=weights)
+        ordered = np.sort(picks[todo], axis=1)
+        todo = todo[(ordered[:, 1:] == ordered[:, :-1]).any(axis=1)]
+    return picks
+
+def generate_batch(pool, rng, start, n, total, patches, platforms, players, timeline_fraction, lane_noise):
+    """Linhas de n partidas (índices start..start+n-1) no formato de parse_match_rows: { tabela: [tuplas] }."""
+    rows = {table: [] for table in MATCH_TABLES}
+    index = np.arange(start, start + n)
+    patch_idx = index * len(patches) // total
+    platform = rng.integers(len(platforms), size=n)
+    match_ids = [f"{platforms[p]}_{BASE_MATCH_ID + i}" for p, i in zip(platform.tolist(), index.tolist())]
+    versions = [f"{patches[p]}.{500 + p}.{1000 + i % 9000}" for p, i in zip(patch_idx.tolist(), index.tolist())]
+
+    champ_idx = _pick_champions(pool, rng, n)
+    strength = pool.strength[patch_idx[:, None], champ_idx]
+    logit = strength[:, :5].sum(axis=1) - strength[:, 5:].sum(axis=1) + BLUE_SIDE_EDGE
+    blue_win = rng.random(n) < 1 / (1 + np.exp(-logit))
+    winner_team = np.where(blue_win, 100, 200)
+    duration = rng.integers(900, 2700, size=n)
+    rows['matches'] = list(zip(match_ids, versions, duration.tolist(), winner_team.tolist(),
+                               [platforms[p].lower() for p in platform.tolist()]))
+
+    # Times + bans
+    for side, team in enumerate((100, 200)):
+        won = blue_win if team == 100 else ~blue_win
+        kills = lambda lam: rng.poisson(lam + won * lam * 0.6).tolist()
+        firsts = lambda p: (rng.random(n) < np.where(won, p, 1 - p)).tolist()
+        rows['match_teams'].extend(zip(
+            match_ids, [team] * n, won.tolist(), kills(0.6), kills(2.0), kills(0.7), kills(2.0), kills(4.0),
+            kills(0.8), firsts(0.6), firsts(0.65), firsts(0.6), firsts(0.7)))
+        bans = rng.integers(1, len(pool.keys) + 1, size=(n, 5))
+        for turn in range(5):
+            rows['match_bans'].extend(zip(match_ids, [team] * n, bans[:, turn].tolist(),
+                                          [turn + 1 + side * 5] * n))
+
+    # Participantes
+    first_player = rng.integers(players, size=n)
+    for slot in range(10):
+        team = 100 if slot < 5 else 200
+        role = REQUIRED_ROLES[slot % 5]
+        won = blue_win if team == 100 else ~blue_win
+        lane, lane_role = LANE_LABELS[role]
+        lanes, lane_roles = np.full(n, lane, dtype=object), np.full(n, lane_role, dtype=object)
+        # Detecção de posição da Riot errando (NONE ou outra rota), como nos dados reais
+        noisy = rng.random(n) < lane_noise
+        wrong = noisy & (rng.random(n) < 0.4)
+        lanes[noisy], lane_roles[noisy] = 'NONE', 'NONE'
+        lanes[wrong] = np.array(['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM'])[rng.integers(4, size=wrong.sum())]
+        lane_roles[wrong] = 'DUO'
+
+        spell = _sample(rng, ROLE_SPELLS[role], n)
+        flash_first = rng.random(n) < 0.5
+        spell1 = np.where(flash_first, FLASH, spell)
+        spell2 = np.where(flash_first, spell, FLASH)
+        perk_primary = rng.integers(5, size=n)
+        perk_sub = (perk_primary + rng.integers(1, 5, size=n)) % 5
+
+        items = np.array(ITEM_POOL)[rng.integers(len(ITEM_POOL), size=(n, 6))]
+        items[rng.random((n, 6)) < 0.15] = 0
+        if role == 'UTILITY':
+            items[:, 0] = np.array(SUPPORT_ITEMS)[rng.integers(len(SUPPORT_ITEMS), size=n)]
+        elif role == 'JUNGLE':
+            with_pet = rng.random(n) < 0.6
+            items[with_pet, 0] = np.array(JUNGLE_PETS)[rng.integers(len(JUNGLE_PETS), size=with_pet.sum())]
+        trinket = np.array(TRINKETS)[rng.integers(len(TRINKETS), size=n)]
+
+        minutes = duration / 60
+        gold = (minutes * ROLE_GOLD_PER_MIN[slot % 5] * rng.uniform(0.9, 1.15, size=n) * (1 + 0.08 * won)).astype(int)
+        cs = (minutes * ROLE_CS_PER_MIN[slot % 5] * rng.uniform(0.8, 1.1, size=n)).astype(int)
+        damage = rng.integers(5000, 45000, size=n)
+        magic_share = rng.uniform(0, 1, size=n)
+        puuids = [f"synthetic-puuid-{p}" for p in ((first_player + slot * 7919) % players).tolist()]
+
+        rows['match_participants'].extend(zip(
+            match_ids, puuids, pool.keys[champ_idx[:, slot]].tolist(), [team] * n, [slot + 1] * n, won.tolist(),
+            rng.poisson(4 + 2 * won).tolist(), rng.poisson(5 - 2 * won).tolist(), rng.poisson(7, size=n).tolist(),
+            gold.tolist(), (gold * rng.uniform(0.85, 1.0, size=n)).astype(int).tolist(),
+            cs.tolist(), (minutes * ROLE_JUNGLE_CS_PER_MIN[slot % 5]).astype(int).tolist(),
+            rng.integers(5, 90, size=n).tolist(), rng.integers(2, 40, size=n).tolist(), rng.integers(0, 15, size=n).tolist(),
+            spell1.tolist(), spell2.tolist(),
+            np.array(PERK_STYLES)[perk_primary].tolist(), np.array(PERK_STYLES)[perk_sub].tolist(),
+            *[items[:, k].tolist() for k in range(6)], trinket.tolist(),
+            damage.tolist(), (damage * (1 - magic_share)).astype(int).tolist(), (damage * magic_share * 0.9).astype(int).tolist(),
+            (damage * 0.05).astype(int).tolist(), rng.integers(5000, 50000, size=n).tolist(),
+            rng.integers(0, 10000, size=n).tolist(), rng.integers(1000, 40000, size=n).tolist(),
+            rng.integers(0, 60, size=n).tolist(), rng.integers(0, 20000, size=n).tolist(), rng.integers(1, 5, size=n).tolist(),
+            lanes.tolist(), lane_roles.tolist()))
+
+    _generate_timelines(rows, rng, match_ids, blue_win, duration, timeline_fraction)
+    return rows
+
+def _generate_timelines(rows, rng, match_ids, blue_win, duration, timeline_fraction):
+    """Snapshots de TIMELINE_SNAPSHOTS (minuto como timestamp, igual ao crawler); o vencedor tende a liderar."""
+    n = len(match_ids)
+    has_timeline = rng.random(n) < timeline_fraction
+    won = np.concatenate([np.repeat(blue_win[:, None], 5, axis=1), np.repeat(~blue_win[:, None], 5, axis=1)], axis=1)
+    roles = np.arange(10) % 5
+    gold_rate = np.array(ROLE_GOLD_PER_MIN)[roles] * rng.uniform(0.85, 1.15, size=(n, 10)) * (1 + 0.06 * won)
+    xp_rate = np.array(ROLE_XP_PER_MIN)[roles] * rng.uniform(0.9, 1.1, size=(n, 10)) * (1 + 0.04 * won)
+    cs_rate = np.array(ROLE_CS_PER_MIN)[roles] * rng.uniform(0.8, 1.1, size=(n, 10))
+    jungle_rate = np.array(ROLE_JUNGLE_CS_PER_MIN)[roles] * rng.uniform(0.8, 1.1, size=(n, 10))
+    team_edge = np.stack([blue_win, ~blue_win], axis=1)
+
+    kills, towers, dragons = (np.zeros((n, 2), dtype=np.int64) for _ in range(3))
+    previous = 0
+    for minute in sorted(TIMELINE_SNAPSHOTS):
+        keep = has_timeline & (duration // 60 > minute)
+        span = minute - previous
+        previous = minute
+        kills += rng.poisson(span * (0.35 + 0.15 * team_edge))
+        towers += rng.poisson(span * (0.08 + 0.06 * team_edge) * (minute > 10))
+        dragons += rng.poisson(span * (0.06 + 0.04 * team_edge) * (minute > 5))
+        if not keep.any():
+            continue
+
+        gold = (500 + minute * gold_rate).astype(np.int64)[keep]
+        xp = (minute * xp_rate).astype(np.int64)[keep]
+        minions = (minute * cs_rate).astype(np.int64)[keep]
+        jungle = (minute * jungle_rate).astype(np.int64)[keep]
+        level = np.minimum(18, 1 + xp // 700)
+        kept_ids = [m for m, k in zip(match_ids, keep.tolist()) if k]
+        m = len(kept_ids)
+        for p in range(10):
+            rows['match_timeline_participants'].extend(zip(
+                kept_ids, [minute] * m, [p + 1] * m, gold[:, p].tolist(), rng.integers(0, 1500, size=m).tolist(),
+                xp[:, p].tolist(), level[:, p].tolist(), minions[:, p].tolist(), jungle[:, p].tolist(),
+                rng.integers(0, 14000, size=m).tolist(), rng.integers(0, 14000, size=m).tolist()))
+
+        team_gold = np.stack([gold[:, :5].sum(axis=1), gold[:, 5:].sum(axis=1)], axis=1)
+        team_xp = np.stack([xp[:, :5].sum(axis=1), xp[:, 5:].sum(axis=1)], axis=1)
+        cs = minions + jungle
+        team_cs = np.stack([cs[:, :5].sum(axis=1), cs[:, 5:].sum(axis=1)], axis=1)
+        for side, team in enumerate((100, 200)):
+            rows['match_timeline_stats'].extend(zip(
+                kept_ids, [minute] * m, [team] * m, team_gold[:, side].tolist(), team_xp[:, side].tolist(),
+                team_cs[:, side].tolist(), kills[keep, side].tolist(), towers[keep, side].tolist(),
+                dragons[keep, side].tolist(), (team_gold[:, side] - team_gold[:, 1 - side]).tolist()))
+
+def write_rows(conn, rows):
+    for table in MATCH_TABLES:
+        if rows[table]:
+            placeholders = ",".join(["?"] * len(rows[table][0]))
+            conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows[table])
+
+# --- EXECUÇÃO ---
+
+def generate_database(db_path=DEFAULT_DB_PATH, matches=10000, n_patches=3, n_champions=170, platforms=('BR1',),
+                      players=50000, timeline_fraction=0.95, lane_noise=0.1, seed=42, batch_size=BATCH_MATCHES,
+                      overwrite=False):
+    """
+    Cria (ou recria, com overwrite=True) um banco sintético em db_path.
+    Mesma seed = mesmo banco. Retorna um resumo com contagens e tempo.
+    """
+    if os.path.exists(db_path):
+        if not overwrite:
+            raise FileExistsError(f"{db_path} já existe (use overwrite=True / --overwrite).")
+        os.remove(db_path)
+
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+    patches = patch_versions(n_patches)
+    pool = ChampionPool(n_champions, n_patches, rng)
+
+    # Schema exato do crawler e do fetch_champions
+    conn = init_champions_db(db_path)
+    init_match_db(conn)
+    # Banco descartável: sem journal/fsync, a gravação é o gargalo em milhões de linhas
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    print(f"🧪 Gerando {n_champions} campeões em {n_patches} patches ({', '.join(patches)})...")
+    for i, patch in enumerate(patches):
+        save_version(conn, f"{patch}.1", pool.ddragon_data(i))
+    save_features(apply_keywords(load_data(conn)), conn)
+
+    print(f"🧪 Gerando {matches} partidas ({', '.join(platforms)})...")
+    for start in range(0, matches, batch_size):
+        n = min(batch_size, matches - start)
+        rows = generate_batch(pool, rng, start, n, matches, patches, list(platforms), players,
+                              timeline_fraction, lane_noise)
+        write_rows(conn, rows)
+        conn.commit()
+        elapsed = time.time() - start_time
+        sys.stdout.write(f"\r   {start + n}/{matches} partidas | {(start + n) / elapsed:.0f} partidas/s\033[K")
+        sys.stdout.flush()
+
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in MATCH_TABLES + ['champions', 'champion_features']}
+    conn.close()
+    elapsed = time.time() - start_time
+    print(f"\n✅ Banco sintético pronto em {db_path} ({elapsed:.1f}s)")
+    for table, count in counts.items():
+        print(f"   {table}: {count}")
+    return {'db_path': db_path, 'elapsed_s': round(elapsed, 2), 'rows': counts}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um banco sintético com o schema do crawler para benchmarks")
+    parser.add_argument("--out", default=DEFAULT_DB_PATH, help=f"Arquivo do banco (padrão: {DEFAULT_DB_PATH})")
+    parser.add_argument("--matches", type=int, default=10000, help="Número de partidas (ex: 10000 a 5000000)")
+    parser.add_argument("--patches", type=int, default=3, help="Número de patches (partidas distribuídas em ordem)")
+    parser.add_argument("--champions", type=int, default=170, help="Número de campeões")
+    parser.add_argument("--platform", action="append", help="Prefixo de plataforma dos match_ids (padrão: BR1). Pode repetir.")
+    parser.add_argument("--players", type=int, default=50000, help="Tamanho do pool de jogadores (puuids)")
+    parser.add_argument("--timeline-fraction", type=float, default=0.95, help="Fração das partidas com timeline")
+    parser.add_argument("--lane-noise", type=float, default=0.1,
+                        help="Fração de participantes com lane/role errada ou NONE (exercita o role fixer)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=BATCH_MATCHES, help="Partidas por transação")
+    parser.add_argument("--overwrite", action="store_true", help="Apaga o arquivo se já existir")
+    args = parser.parse_args()
+    generate_database(db_path=args.out, matches=args.matches, n_patches=args.patches, n_champions=args.champions,
+                      platforms=args.platform or ['BR1'], players=args.players,
+                      timeline_fraction=args.timeline_fraction, lane_noise=args.lane_noise, seed=args.seed,
+                      batch_size=args.batch_size, overwrite=args.overwrite)
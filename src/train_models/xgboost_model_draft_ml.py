@@ -7,8 +7,16 @@ from sklearn.metrics import accuracy_score, roc_auc_score, classification_report
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
 import numpy as np
 
+# Loader do feature store colunar (exportado pelo feature_orchestrator)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'process_data'))
+try:
+    from src.process_data.feature_store import store_exists, store_matches_db, load_feature_store
+except ImportError:
+    from feature_store import store_exists, store_matches_db, load_feature_store
+
 # Tenta importar SHAP
 try:
     import shap
@@ -46,6 +54,15 @@ MODEL_PARAMS = {
 }
 
 def load_dataset():
+    # Feature store: lê só as colunas de draft (as live_ ficam de fora), sem pd.read_sql
+    if store_matches_db(DB_PATH):
+        df = load_feature_store(exclude_prefixes=('live_',))
+        print(f"Dataset carregado do feature store: {len(df)} partidas.")
+        return df
+    if store_exists():
+        print("⚠️ Feature store desatualizado em relação a game_features "
+              "(rode o orquestrador com --export-store). Lendo do SQLite...")
+
     if not os.path.exists(DB_PATH):
         print(f"❌ Erro: Banco de dados não encontrado em {DB_PATH}")
         return None
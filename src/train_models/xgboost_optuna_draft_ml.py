@@ -9,6 +9,13 @@ import numpy as np
 from sklearn.model_selection import StratifiedKFold
 from sklearn.metrics import accuracy_score
 
+# Loader do feature store colunar (exportado pelo feature_orchestrator)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'process_data'))
+try:
+    from src.process_data.feature_store import store_exists, store_matches_db, load_feature_store
+except ImportError:
+    from feature_store import store_exists, store_matches_db, load_feature_store
+
 # --- CONFIGURAÇÕES DE SILÊNCIO ---
 warnings.filterwarnings('ignore')
 optuna.logging.set_verbosity(optuna.logging.WARNING)
@@ -19,14 +26,21 @@ DB_PATH = os.path.join(BASE_DIR, 'data', 'lol_database.db')
 N_TRIALS = 100
 
 def load_data_for_tuning():
-    if not os.path.exists(DB_PATH):
-        raise FileNotFoundError(f"Banco não encontrado em {DB_PATH}")
+    # Feature store: lê só as colunas de draft (as live_ ficam de fora), sem pd.read_sql
+    if store_matches_db(DB_PATH):
+        df = load_feature_store(exclude_prefixes=('live_',))
+    else:
+        if store_exists():
+            print("⚠️ Feature store desatualizado em relação a game_features "
+                  "(rode o orquestrador com --export-store). Lendo do SQLite...")
+        if not os.path.exists(DB_PATH):
+            raise FileNotFoundError(f"Banco não encontrado em {DB_PATH}")
 
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        df = pd.read_sql("SELECT * FROM game_features", conn)
-    finally:
-        conn.close()
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            df = pd.read_sql("SELECT * FROM game_features", conn)
+        finally:
+            conn.close()
 
     metadata_cols = ['match_id', 'patch_version', 'winner_team']
     live_cols = [c for c in df.columns if c.startswith('live_')]